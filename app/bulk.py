@@ -0,0 +1,210 @@
+"""Batched create/update/delete shared by core items and the items plugin.
+
+Rows are validated one by one so that each bad row is reported with its
+index instead of failing the whole request; all valid rows are then written
+in a single transaction with as few statements as the backend allows:
+multi-row `INSERT ... RETURNING`, `executemany` updates,
+`DELETE ... RETURNING`, and `COPY` for large inserts on Postgres.
+"""
+from __future__ import annotations
+
+import io
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Tuple, Type
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import bindparam, delete, insert, select, text, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from .events import creation_days
+
+
+def json_array_body(max_bytes: int) -> Callable[[Request], Awaitable[List[Any]]]:
+    """Dependency reading a JSON array body of at most `max_bytes`.
+
+    Used instead of `Body(...)`, which parses the whole body before any check
+    runs: an oversized batch is refused from `Content-Length`, or as soon as
+    the streamed body passes the limit, without being materialised.
+    """
+
+    async def read(request: Request) -> List[Any]:
+        length = request.headers.get("content-length", "")
+        if length.isdigit() and int(length) > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Body too large: {length} bytes (max {max_bytes})")
+        body = bytearray()
+        async for chunk in request.stream():
+            body += chunk
+            if len(body) > max_bytes:
+                raise HTTPException(status_code=413, detail=f"Body too large (max {max_bytes} bytes)")
+        try:
+            rows = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Body must be a JSON array")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=422, detail="Body must be a JSON array")
+        return rows
+
+    return read
+
+
+def ensure_batch_size(rows: Sequence[Any], limit: int) -> None:
+    if not rows:
+        raise HTTPException(status_code=422, detail="Batch is empty")
+    if len(rows) > limit:
+        raise HTTPException(status_code=413, detail=f"Batch too large: {len(rows)} rows (max {limit})")
+
+
+def _error(index: int, error: str) -> Dict[str, Any]:
+    return {"index": index, "status": "error", "error": error}
+
+
+def validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in e['loc']) or 'row'}: {e['msg']}" for e in exc.errors())
+
+
+def validate_rows(
+    rows: Sequence[Any], schema: Type[BaseModel]
+) -> Tuple[List[Tuple[int, BaseModel]], List[Dict[str, Any]]]:
+    """Validate each row against `schema`; returns ([(index, model)], [error results])."""
+    valid, errors = [], []
+    for index, row in enumerate(rows):
+        try:
+            valid.append((index, schema.model_validate(row)))
+        except ValidationError as exc:
+            errors.append(_error(index, validation_message(exc)))
+    return valid, errors
+
+
+def _rolled_back(db: Session, indexes: Sequence[int], exc: DBAPIError) -> List[Dict[str, Any]]:
+    db.rollback()
+    reason = str(exc.orig).strip().splitlines()[0] if exc.orig is not None else str(exc)
+    return [_error(index, f"batch rolled back: {reason}") for index in indexes]
+
+
+def _skipped(indexes: Sequence[int]) -> List[Dict[str, Any]]:
+    # Valid rows left unwritten because an atomic batch had errors
+    return [{"index": index, "status": "skipped"} for index in indexes]
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    results.sort(key=lambda r: r["index"])
+    failed = sum(1 for r in results if r["status"] == "error")
+    skipped = sum(1 for r in results if r["status"] == "skipped")
+    return {"succeeded": len(results) - failed - skipped, "failed": failed, "results": results}
+
+
+def _csv_field(value: Any) -> str:
+    if value is None:
+        return "\\N"
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def copy_rows(db: Session, table: str, columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> None:
+    """Stream rows into `table` with Postgres `COPY ... FROM STDIN` on the session's connection."""
+    buf = io.StringIO()
+    for row in rows:
+        buf.write(",".join(_csv_field(v) for v in row))
+        buf.write("\n")
+    buf.seek(0)
+    cols = ", ".join(f'"{c}"' for c in columns)
+    dbapi_conn = db.connection().connection.driver_connection
+    with dbapi_conn.cursor() as cur:
+        cur.copy_expert(f'COPY "{table}" ({cols}) FROM STDIN WITH (FORMAT csv, NULL \'\\N\')', buf)
+
+
+def _reserve_ids(db: Session, table: str, count: int) -> List[int]:
+    stmt = text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :n)")
+    return list(db.scalars(stmt, {"table": table, "n": count}))
+
+
+def insert_rows(db: Session, model, values: List[Dict[str, Any]], copy_threshold: int) -> List[int]:
+    """Insert rows (without committing) and return their ids in input order."""
+    if not values:
+        return []
+    table = model.__table__
+    if db.get_bind().dialect.name == "postgresql" and len(values) >= copy_threshold:
+        # COPY cannot return ids: reserve them from the sequence first, then copy them in explicitly
+        ids = _reserve_ids(db, table.name, len(values))
+        columns = ["id", *values[0].keys()]
+        copy_rows(db, table.name, columns, [(i, *v.values()) for i, v in zip(ids, values)])
+        return ids
+    stmt = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+    return list(db.scalars(stmt, values))
+
+
+def bulk_create(
+    db: Session, model, schema: Type[BaseModel], rows: Sequence[Any], *, copy_threshold: int, atomic: bool = False
+):
+    valid, results = validate_rows(rows, schema)
+    if atomic and results:
+        return summarize(results + _skipped([index for index, _ in valid]))
+    try:
+        ids = insert_rows(db, model, [obj.model_dump() for _, obj in valid], copy_threshold)
+        db.commit()
+    except DBAPIError as exc:
+        return summarize(results + _rolled_back(db, [index for index, _ in valid], exc))
+    results.extend({"index": index, "status": "created", "id": new_id} for (index, _), new_id in zip(valid, ids))
+    return summarize(results)
+
+
+def bulk_update(db: Session, model, schema: Type[BaseModel], rows: Sequence[Any], *, atomic: bool = False):
+    valid, results = validate_rows(rows, schema)
+    table = model.__table__
+    requested = {obj.id for _, obj in valid}
+    existing = set(db.scalars(select(table.c.id).where(table.c.id.in_(requested)))) if requested else set()
+    # Group rows by the set of fields they change so each group is one executemany
+    groups: Dict[Tuple[str, ...], List[Tuple[int, Dict[str, Any]]]] = {}
+    for index, obj in valid:
+        if obj.id not in existing:
+            results.append(_error(index, "Item not found"))
+            continue
+        fields = {k: v for k, v in obj.model_dump(exclude_unset=True).items() if k != "id" and v is not None}
+        groups.setdefault(tuple(sorted(fields)), []).append((index, {"b_id": obj.id, **fields}))
+    if atomic and results:
+        return summarize(results + _skipped([index for members in groups.values() for index, _ in members]))
+    try:
+        for fields, members in groups.items():
+            if fields:
+                stmt = update(table).where(table.c.id == bindparam("b_id")).values({f: bindparam(f) for f in fields})
+                db.execute(stmt, [params for _, params in members])
+        db.commit()
+    except DBAPIError as exc:
+        indexes = [index for members in groups.values() for index, _ in members]
+        return summarize(results + _rolled_back(db, indexes, exc))
+    for members in groups.values():
+        results.extend({"index": index, "status": "updated", "id": params["b_id"]} for index, params in members)
+    return summarize(results)
+
+
+def bulk_delete(db: Session, model, rows: Sequence[Any], *, atomic: bool = False):
+    """Delete rows by id. The result also carries `days`, the creation days of the deleted
+    rows (see `app.events.creation_days`); `BulkResult` leaves it out of the response."""
+    results, targets = [], []
+    for index, row in enumerate(rows):
+        if isinstance(row, int) and not isinstance(row, bool):
+            targets.append((index, row))
+        else:
+            results.append(_error(index, "id must be an integer"))
+    if atomic and results:
+        return summarize(results + _skipped([index for index, _ in targets]))
+    table = model.__table__
+    ids = {row_id for _, row_id in targets}
+    try:
+        stmt = delete(table).where(table.c.id.in_(ids)).returning(table.c.id, table.c.created_at)
+        created = dict(db.execute(stmt).all()) if ids else {}
+    except DBAPIError as exc:
+        return summarize(results + _rolled_back(db, [index for index, _ in targets], exc))
+    deleted = set(created)
+    if atomic and deleted != ids:
+        db.rollback()
+        results += [_error(index, "Item not found") for index, row_id in targets if row_id not in deleted]
+        return summarize(results + _skipped([index for index, row_id in targets if row_id in deleted]))
+    db.commit()
+    for index, row_id in targets:
+        if row_id in deleted:
+            results.append({"index": index, "status": "deleted", "id": row_id})
+        else:
+            results.append(_error(index, "Item not found"))
+    return {**summarize(results), "days": creation_days(created.values())}
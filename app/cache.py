@@ -0,0 +1,268 @@
+"""In-process cache service shared by the core and plugins ("cache" service).
+
+Each namespace is an LRU map with a per-entry TTL, bounded both by entry
+count and by an estimate of its memory footprint. `get_or_load` runs the
+loader once per key even under concurrent misses (single flight); the other
+callers wait for its result. Invalidation by key or tag goes through the
+registry event bus (`CACHE_INVALIDATE_TOPIC`), which the cluster bus relays
+to every worker, so a write on one worker evicts the entry everywhere.
+"""
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, Optional, Set
+
+from .core.interfaces import ServiceRegistry
+
+
+CACHE_INVALIDATE_TOPIC = "cache.invalidate"
+
+_MISSING = object()
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """Rough deep size in bytes of plain data (dicts, lists, strings, numbers)."""
+    size = sys.getsizeof(value)
+    if _depth > 4:
+        return size
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(v, _depth + 1) for v in value)
+    return size
+
+
+@dataclass
+class _Entry:
+    value: Any
+    expires_at: float
+    size: int
+    tags: FrozenSet[str]
+
+
+@dataclass
+class _Flight:
+    done: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: Optional[BaseException] = None
+
+
+class Cache:
+    """One namespace: LRU + TTL, bounded by `max_entries` and `max_bytes`."""
+
+    def __init__(self, name: str, ttl: float, max_entries: int, max_bytes: int) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._bytes = 0
+        # Bumped by every invalidation; loads that started earlier are not stored
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.loads = self.load_errors = 0
+        self.evictions = self.expirations = self.invalidations = self.waits = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()) -> None:
+        with self._lock:
+            self._store(key, value, ttl, frozenset(tags))
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        ttl: Optional[float] = None,
+        tags: Iterable[str] = (),
+        cache_none: bool = False,
+    ) -> Any:
+        """Cached value for `key`, loading it once across concurrent callers on a miss."""
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                generation = self._generation
+            else:
+                self.waits += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            value = loader()
+        except BaseException as exc:
+            flight.error = exc
+            with self._lock:
+                self.load_errors += 1
+            raise
+        else:
+            flight.value = value
+            with self._lock:
+                self.loads += 1
+                if (value is not None or cache_none) and generation == self._generation:
+                    self._store(key, value, ttl, frozenset(tags))
+            return value
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def invalidate_local(
+        self, keys: Iterable[Hashable] = (), tags: Iterable[str] = (), everything: bool = False
+    ) -> int:
+        """Evict entries on this worker only; use `CacheService.invalidate` to reach all workers."""
+        with self._lock:
+            self._generation += 1
+            if everything:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._tags.clear()
+                self._bytes = 0
+            else:
+                targets = set(keys)
+                for tag in tags:
+                    targets |= self._tags.get(tag, set())
+                removed = sum(1 for key in targets if self._remove(key))
+            self.invalidations += removed
+            return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "loads": self.loads,
+                "load_errors": self.load_errors,
+                "single_flight_waits": self.waits,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    # Internal helpers; callers hold self._lock
+    def _lookup(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return _MISSING
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return _MISSING
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def _store(self, key: Hashable, value: Any, ttl: Optional[float], tags: FrozenSet[str]) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = _Entry(value, time.monotonic() + ttl, size, tags)
+        self._bytes += size
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: Hashable) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return True
+
+
+class CacheService:
+    """Registry of named caches with event-bus driven invalidation."""
+
+    def __init__(
+        self, registry: ServiceRegistry, default_ttl: float = 60.0, max_entries: int = 10_000, max_bytes: int = 16 << 20
+    ) -> None:
+        self.registry = registry
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._caches: Dict[str, Cache] = {}
+        self._lock = threading.Lock()
+        # Replaced with ClusterBus.broadcast once the cluster bus exists
+        self._publish: Callable[[str, Any], None] = registry.publish
+        registry.subscribe(CACHE_INVALIDATE_TOPIC, self._on_invalidate)
+
+    def use_broadcast(self, broadcast: Callable[[str, Any], None]) -> None:
+        """Send invalidations through `broadcast` (must also publish locally)."""
+        self._publish = broadcast
+
+    def namespace(
+        self,
+        name: str,
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> Cache:
+        """Get or create the cache `name`; limits apply only when it is first created."""
+        with self._lock:
+            cache = self._caches.get(name)
+            if cache is None:
+                cache = self._caches[name] = Cache(
+                    name,
+                    self.default_ttl if ttl is None else ttl,
+                    max_entries or self.max_entries,
+                    max_bytes or self.max_bytes,
+                )
+            return cache
+
+    def invalidate(
+        self, namespace: str, keys: Iterable[Hashable] = (), tags: Iterable[str] = (), everything: bool = False
+    ) -> None:
+        """Evict keys and/or tagged entries of `namespace` on every worker.
+
+        Keys travel as JSON between workers, so use strings or integers.
+        """
+        payload = {"namespace": namespace, "keys": list(keys), "tags": list(tags), "all": everything}
+        if payload["keys"] or payload["tags"] or everything:
+            self._publish(CACHE_INVALIDATE_TOPIC, payload)
+
+    def _on_invalidate(self, payload: Dict[str, Any]) -> None:
+        cache = self._caches.get(payload.get("namespace"))
+        if cache is not None:
+            cache.invalidate_local(payload.get("keys", ()), payload.get("tags", ()), payload.get("all", False))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            caches = list(self._caches.values())
+        return {cache.name: cache.stats() for cache in caches}
@@ -0,0 +1,442 @@
+"""Negotiated response compression with a cache of precompressed bodies.
+
+`CompressionMiddleware` is pure ASGI. It compresses complete response bodies
+of at least `min_size` bytes with the best encoding the client accepts:
+`zstd` (`zstandard` package), `br` (`brotli` or `brotlicffi`), or `gzip`.
+Encodings whose module is not installed are skipped. Other content types
+(SSE, NDJSON export) and streamed bodies (a first body message with
+`more_body`, as in CSV export) pass through unchanged and unbuffered.
+
+Responses that carry an `ETag`, and are not `private` or `no-store`, are
+cached per URL together with each compressed variant. On the next request
+for that URL, the cached ETag is sent to the app as `If-None-Match`. Routes
+using `app.conditional` answer with `304` after a cheap version lookup, before
+serializing anything, and the middleware then replays the cached variant
+with status 200. Serialization and compression both run once per version of
+a body, and an entry can never be served stale because the app revalidates
+it on every request. A `200` replaces the entry.
+
+Each compressed variant gets its own strong ETag (`"<tag>-br"`), as RFC 9110
+requires. The suffix is stripped from incoming `If-None-Match` headers, so
+the app's conditional GET works unchanged.
+"""
+from __future__ import annotations
+
+import gzip
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import anyio
+
+try:  # optional
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+try:  # optional; brotlicffi has the same API
+    import brotli
+except ImportError:  # pragma: no cover
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+
+# Per-request compression favours speed; cached variants are compressed once, so harder
+LEVELS = {"zstd": (3, 10), "br": (4, 9), "gzip": (6, 9)}
+COMPRESSORS: Dict[str, Callable[[bytes, int], bytes]] = {"gzip": lambda data, level: gzip.compress(data, level, mtime=0)}
+if brotli is not None:
+    COMPRESSORS["br"] = lambda data, level: brotli.compress(data, quality=level)
+if zstandard is not None:
+    COMPRESSORS["zstd"] = lambda data, level: zstandard.ZstdCompressor(level=level).compress(data)
+SUFFIXES = {"zstd": "-zst", "br": "-br", "gzip": "-gz"}
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/problem+json",
+    "application/xml",
+    "application/javascript",
+    "text/html",
+    "text/plain",
+    "text/csv",
+    "text/css",
+    "text/xml",
+)
+# Bodies above this are compressed in a worker thread instead of on the event loop
+OFFLOAD_BYTES = 64 * 1024
+
+
+def available_encodings(preferred: List[str]) -> List[str]:
+    return [e for e in preferred if e in COMPRESSORS]
+
+
+def negotiate(accept_encoding: str, encodings: List[str]) -> Optional[str]:
+    """The encoding to use for an `Accept-Encoding` value (None: identity).
+
+    The highest q-value wins; ties go to the earlier entry of `encodings`.
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def _strip_suffix(etag: str) -> str:
+    for suffix in SUFFIXES.values():
+        if etag.endswith(suffix + '"'):
+            return etag[: -len(suffix) - 1] + '"'
+    return etag
+
+
+def _with_suffix(etag: str, encoding: str) -> str:
+    return etag[:-1] + SUFFIXES[encoding] + '"' if etag.endswith('"') else etag
+
+
+@dataclass
+class CachedBody:
+    etag: str
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    # Wall time of the request that rendered the body
+    render_seconds: float
+    # encoding -> (compressed body, CPU seconds it took)
+    variants: Dict[str, Tuple[bytes, float]] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(v) for v, _ in self.variants.values())
+
+
+class CompressionStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.responses = {"compressed": 0, "identity": 0, "too_small": 0, "not_compressible": 0, "streamed": 0}
+            self.encodings: Dict[str, Dict[str, float]] = {}
+            self.cache = {"hits": 0, "misses": 0, "stores": 0}
+            self.saved = {"compress_cpu_seconds": 0.0, "render_seconds": 0.0}
+
+    def count(self, outcome: str) -> None:
+        with self._lock:
+            self.responses[outcome] += 1
+
+    def compressed(self, encoding: str, size_in: int, size_out: int, cpu: float) -> None:
+        with self._lock:
+            stats = self.encodings.setdefault(encoding, {"bodies": 0, "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0})
+            stats["bodies"] += 1
+            stats["bytes_in"] += size_in
+            stats["bytes_out"] += size_out
+            stats["cpu_seconds"] += cpu
+
+    def cache_event(self, name: str, compress_saved: float = 0.0, render_saved: float = 0.0) -> None:
+        with self._lock:
+            self.cache[name] += 1
+            self.saved["compress_cpu_seconds"] += compress_saved
+            self.saved["render_seconds"] += render_saved
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "responses": dict(self.responses),
+                "encodings": {
+                    name: {
+                        **{k: v for k, v in s.items() if k != "cpu_seconds"},
+                        "ratio": round(s["bytes_in"] / s["bytes_out"], 2) if s["bytes_out"] else None,
+                        "cpu_ms": round(s["cpu_seconds"] * 1000, 1),
+                    }
+                    for name, s in self.encodings.items()
+                },
+                "cache": {
+                    **self.cache,
+                    "compress_cpu_saved_ms": round(self.saved["compress_cpu_seconds"] * 1000, 1),
+                    "render_time_saved_ms": round(self.saved["render_seconds"] * 1000, 1),
+                },
+            }
+
+
+class CompressedBodyCache:
+    """LRU of `CachedBody` by URL, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: "OrderedDict[str, CachedBody]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: str) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CachedBody) -> bool:
+        if entry.size > self.max_entry_bytes:
+            return False
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self._evict()
+        return True
+
+    def add_variant(self, key: str, entry: CachedBody, encoding: str, body: bytes, cpu: float) -> None:
+        with self._lock:
+            if self._entries.get(key) is not entry or encoding in entry.variants:
+                return
+            entry.variants[encoding] = (body, cpu)
+            self._bytes += len(body)
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= old.size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[str]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _content_type(headers: List[Tuple[bytes, bytes]]) -> str:
+    return (_header(headers, b"content-type") or "").split(";")[0].strip().lower()
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware: negotiated compression plus the precompressed body cache."""
+
+    def __init__(
+        self,
+        app,
+        min_size: int = 1024,
+        encodings: Optional[List[str]] = None,
+        cache: Optional[CompressedBodyCache] = None,
+        stats: Optional[CompressionStats] = None,
+    ) -> None:
+        self.app = app
+        self.min_size = min_size
+        self.encodings = available_encodings(encodings or ["zstd", "br", "gzip"])
+        self.cache = cache
+        self.stats = stats or CompressionStats()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = list(scope.get("headers", []))
+        encoding = negotiate(_header(headers, b"accept-encoding") or "", self.encodings)
+        client_tags = raw_tags = None
+        inm = _header(headers, b"if-none-match")
+        if inm is not None:
+            # Conditional requests reach the app with the tags it issued
+            # If-None-Match uses weak comparison, so W/ can go
+            raw_tags = [t.strip().removeprefix("W/") for t in inm.split(",") if t.strip()]
+            client_tags = [_strip_suffix(t) for t in raw_tags]
+            headers = [(k, v) for k, v in headers if k != b"if-none-match"]
+            headers.append((b"if-none-match", ", ".join(client_tags).encode("latin-1")))
+
+        key = None
+        entry = None
+        if self.cache is not None and self.cache.enabled and scope["method"] == "GET":
+            key = scope["path"] + "?" + scope.get("query_string", b"").decode("latin-1")
+            entry = self.cache.get(key)
+            if entry is not None and (client_tags is None or entry.etag not in client_tags):
+                # Ask the app whether the cached version is still current
+                headers = [(k, v) for k, v in headers if k not in (b"if-none-match", b"if-modified-since")]
+                headers.append((b"if-none-match", entry.etag.encode("latin-1")))
+            elif entry is not None:
+                entry = None
+        scope = {**scope, "headers": headers}
+
+        started = time.perf_counter()
+        start_message: Optional[Dict[str, Any]] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                content_type = _content_type(message.get("headers", []))
+                if content_type and not content_type.startswith(COMPRESSIBLE_TYPES):
+                    # SSE, NDJSON, binary: never buffered
+                    passthrough = True
+                    self.stats.count("not_compressible")
+                    await send(message)
+                    return
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+            if message.get("more_body", False):
+                # Streaming body: forward as is
+                passthrough = True
+                self.stats.count("streamed")
+                await send(start_message)
+                await send(message)
+                return
+            await self._finish(
+                start_message, message.get("body", b""), send, encoding, key, entry, client_tags, raw_tags, started
+            )
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _finish(self, start, body, send, encoding, key, entry, client_tags, raw_tags, started) -> None:
+        status = start["status"]
+        headers = list(start.get("headers", []))
+        etag = _header(headers, b"etag")
+
+        if status == 304 and entry is not None and etag == entry.etag:
+            # Cached version is current: replay it, refreshing the validators the app sent
+            elapsed = time.perf_counter() - started
+            fresh = {k.lower() for k, _ in headers if k.lower() not in (b"content-length", b"content-type")}
+            merged = [(k, v) for k, v in entry.headers if k.lower() not in fresh] + [
+                (k, v) for k, v in headers if k.lower() in fresh
+            ]
+            compress_saved = 0.0
+            if encoding is not None and encoding in entry.variants:
+                compress_saved = entry.variants[encoding][1]
+            elif encoding is not None and self._compressible(entry.headers, entry.body):
+                variant, cpu = await self._compress(entry.body, encoding, cached=True)
+                self.cache.add_variant(key, entry, encoding, variant, cpu)
+            self.stats.cache_event("hits", compress_saved, max(0.0, entry.render_seconds - elapsed))
+            await self._send(send, entry.status, merged, entry.body, encoding, entry)
+            return
+
+        cacheable = (
+            key is not None
+            and status == 200
+            and etag is not None
+            and not any(d in (_header(headers, b"cache-control") or "").lower() for d in ("no-store", "private"))
+            and _header(headers, b"content-encoding") is None
+        )
+        if cacheable:
+            elapsed = time.perf_counter() - started
+            new = CachedBody(etag, status, headers, body, elapsed)
+            if self.cache.put(key, new):
+                self.stats.cache_event("stores")
+                if encoding is not None and self._compressible(headers, body):
+                    variant, cpu = await self._compress(body, encoding, cached=True)
+                    self.cache.add_variant(key, new, encoding, variant, cpu)
+            self.stats.cache_event("misses")
+            if client_tags is not None and etag in client_tags:
+                # The client already has this version
+                await self._not_modified(send, [(k, v) for k, v in headers if k.lower() != b"content-length"], raw_tags)
+                return
+            await self._send(send, status, headers, body, encoding, new)
+            return
+        if key is not None and status == 200:
+            self.stats.cache_event("misses")
+        if status == 304:
+            await self._not_modified(send, headers, raw_tags)
+            return
+        await self._send(send, status, headers, body, encoding, None)
+
+    def _compressible(self, headers, body: bytes) -> bool:
+        if _header(headers, b"content-encoding") is not None:
+            return False
+        return _content_type(headers).startswith(COMPRESSIBLE_TYPES) and len(body) >= self.min_size
+
+    async def _compress(self, body: bytes, encoding: str, cached: bool = False) -> Tuple[bytes, float]:
+        level = LEVELS[encoding][1 if cached else 0]
+
+        def run() -> Tuple[bytes, float]:
+            t0 = time.thread_time()
+            out = COMPRESSORS[encoding](body, level)
+            cpu = time.thread_time() - t0
+            self.stats.compressed(encoding, len(body), len(out), cpu)
+            return out, cpu
+
+        if len(body) > OFFLOAD_BYTES:
+            return await anyio.to_thread.run_sync(run)
+        return run()
+
+    async def _not_modified(self, send, headers, raw_tags: Optional[List[str]]) -> None:
+        # Echo the tag of the variant the client holds (suffixed if it was compressed)
+        etag = _header(headers, b"etag")
+        for encoding in SUFFIXES:
+            if etag and raw_tags and _with_suffix(etag, encoding) in raw_tags:
+                headers = self._tagged(headers, encoding)
+                break
+        await send({"type": "http.response.start", "status": 304, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def _send(self, send, status, headers, body, encoding, entry: Optional[CachedBody]) -> None:
+        headers = list(headers)
+        if encoding is not None and status != 206 and self._compressible(headers, body):
+            if entry is not None and encoding in entry.variants:
+                body = entry.variants[encoding][0]
+            else:
+                body, _ = await self._compress(body, encoding)
+            headers = [(k, v) for k, v in self._tagged(headers, encoding) if k.lower() != b"content-length"]
+            headers += [(b"content-encoding", encoding.encode()), (b"content-length", str(len(body)).encode())]
+            self.stats.count("compressed")
+        else:
+            self.stats.count("identity" if encoding is None else "too_small")
+        if self.encodings:
+            headers = self._vary(headers)
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    def _tagged(headers, encoding: str):
+        return [(k, _with_suffix(v.decode("latin-1"), encoding).encode("latin-1") if k.lower() == b"etag" else v) for k, v in headers]
+
+    @staticmethod
+    def _vary(headers):
+        vary = _header(headers, b"vary")
+        if vary is not None and "accept-encoding" in vary.lower():
+            return headers
+        rest = [(k, v) for k, v in headers if k.lower() != b"vary"]
+        value = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+        return rest + [(b"vary", value.encode("latin-1"))]
@@ -0,0 +1,93 @@
+"""Conditional GET support: strong ETags, Last-Modified and 304 responses.
+
+Routes derive `Validators` from the version of the row(s) they are about to
+return (an update timestamp or an immutable id) right after loading them.
+If the client's `If-None-Match` / `If-Modified-Since` still matches, the
+route returns an empty `304 Not Modified` before any serialization;
+otherwise the validators and the route's `Cache-Control` are attached to the
+normal response.
+"""
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Iterable, Optional
+
+from fastapi import Request, Response
+
+from .config import CACHE_CONTROL, CACHE_CONTROL_DEFAULT
+
+
+def cache_control_for(route: str) -> str:
+    """`Cache-Control` for a route group (`CACHE_CONTROL__<ROUTE>`, else `CACHE_CONTROL_DEFAULT`)."""
+    return CACHE_CONTROL.get(route, CACHE_CONTROL_DEFAULT)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; they are stored in UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _token(value: Any) -> str:
+    return _as_utc(value).isoformat() if isinstance(value, datetime) else str(value)
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong, opaque ETag for a representation identified by `parts` (kind, key, version...)."""
+    digest = hashlib.blake2b("\x1f".join(_token(p) for p in parts).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def _etag_list(header: str) -> Iterable[str]:
+    for tag in header.split(","):
+        tag = tag.strip()
+        # If-None-Match uses weak comparison
+        yield tag[2:] if tag.startswith("W/") else tag
+
+
+@dataclass(frozen=True)
+class Validators:
+    etag: str
+    last_modified: Optional[datetime] = None
+
+    @classmethod
+    def for_version(cls, *parts: Any, modified: Optional[datetime] = None) -> "Validators":
+        return cls(etag=make_etag(*parts), last_modified=_as_utc(modified) if modified else None)
+
+    def is_fresh(self, request: Request) -> bool:
+        """True if the client's cached copy is current (RFC 9110 section 13.2.2 precedence)."""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            return any(tag == "*" or tag == self.etag for tag in _etag_list(if_none_match))
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and self.last_modified is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            # HTTP dates have whole-second resolution
+            return self.last_modified.replace(microsecond=0) <= since
+        return False
+
+    def headers(self, cache_control: Optional[str] = None) -> Dict[str, str]:
+        headers = {"ETag": self.etag}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        if cache_control:
+            headers["Cache-Control"] = cache_control
+        return headers
+
+
+def conditional_get(
+    request: Request, response: Response, validators: Validators, route: str
+) -> Optional[Response]:
+    """Return a 304 if the client is current; otherwise set validator headers on `response` and return None."""
+    headers = validators.headers(cache_control_for(route))
+    if validators.is_fresh(request):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -1,4 +1,5 @@
 import os
+import socket
 from dotenv import load_dotenv
 
 # Load environment variables from .env if present
@@ -11,6 +12,18 @@ def _get_bool(value: str | None, default: bool = False) -> bool:
     return value.lower() in {"1", "true", "yes", "on"}
 
 
+def _get_int(value: str | None, default: int) -> int:
+    if value is None or not value.strip():
+        return default
+    return int(value)
+
+
+def _get_float(value: str | None, default: float) -> float:
+    if value is None or not value.strip():
+        return default
+    return float(value)
+
+
 # Centralized settings
 DATABASE_URL: str = os.getenv(
     "DATABASE_URL",
@@ -19,9 +32,142 @@ DATABASE_URL: str = os.getenv(
 )
 APP_NAME: str = os.getenv("APP_NAME", "FastAPI Docker App")
 DEBUG: bool = _get_bool(os.getenv("DEBUG"), default=False)
+# Optional read replicas (comma-separated URLs); GET endpoints are routed to them round-robin
+DATABASE_REPLICA_URLS: list[str] = [
+    u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()
+]
+# Replicas lagging more than this are ejected until they catch up
+DB_REPLICA_MAX_LAG_SECONDS: float = _get_float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS"), 5.0)
+DB_REPLICA_CHECK_INTERVAL_SECONDS: float = _get_float(os.getenv("DB_REPLICA_CHECK_INTERVAL_SECONDS"), 5.0)
+# After a write, the same client reads from the primary for this long
+DB_READ_YOUR_WRITES_SECONDS: float = _get_float(os.getenv("DB_READ_YOUR_WRITES_SECONDS"), 5.0)
+
+# Connection pool profiles; individual DB_POOL_* variables override the profile values
+_POOL_PROFILES: dict[str, dict[str, int]] = {
+    "small": {"size": 2, "max_overflow": 3, "timeout": 10, "recycle": 1800},
+    "default": {"size": 5, "max_overflow": 10, "timeout": 30, "recycle": 1800},
+    "large": {"size": 20, "max_overflow": 30, "timeout": 30, "recycle": 900},
+}
+DB_POOL_PROFILE: str = os.getenv("DB_POOL_PROFILE", "default")
+if DB_POOL_PROFILE not in _POOL_PROFILES:
+    raise ValueError(f"DB_POOL_PROFILE must be one of {sorted(_POOL_PROFILES)}")
+_pool_profile = _POOL_PROFILES[DB_POOL_PROFILE]
+DB_POOL_SIZE: int = _get_int(os.getenv("DB_POOL_SIZE"), _pool_profile["size"])
+DB_MAX_OVERFLOW: int = _get_int(os.getenv("DB_MAX_OVERFLOW"), _pool_profile["max_overflow"])
+DB_POOL_TIMEOUT: float = _get_float(os.getenv("DB_POOL_TIMEOUT"), _pool_profile["timeout"])
+# Seconds after which a connection is replaced on checkout; -1 disables recycling
+DB_POOL_RECYCLE: int = _get_int(os.getenv("DB_POOL_RECYCLE"), _pool_profile["recycle"])
+# Pre-ping tests each connection on checkout (one extra round trip, survives DB restarts)
+DB_POOL_PRE_PING: bool = _get_bool(os.getenv("DB_POOL_PRE_PING"), default=True)
+# LIFO reuse keeps a hot core of connections and lets idle extras time out server-side
+DB_POOL_USE_LIFO: bool = _get_bool(os.getenv("DB_POOL_USE_LIFO"), default=False)
+# Server-side statement timeout in milliseconds (Postgres only); 0 disables
+DB_STATEMENT_TIMEOUT_MS: int = _get_int(os.getenv("DB_STATEMENT_TIMEOUT_MS"), 0)
+
+# Bulk item endpoints: request body size (checked before parsing), rows per request, and
+# batch size from which Postgres inserts use COPY
+BULK_MAX_BYTES: int = _get_int(os.getenv("BULK_MAX_BYTES"), 16 * 1024 * 1024)
+BULK_MAX_ITEMS: int = _get_int(os.getenv("BULK_MAX_ITEMS"), 5000)
+BULK_COPY_THRESHOLD: int = _get_int(os.getenv("BULK_COPY_THRESHOLD"), 1000)
+# Streaming export/import: rows per server-side cursor fetch and per import transaction
+TRANSFER_BATCH_SIZE: int = _get_int(os.getenv("TRANSFER_BATCH_SIZE"), 1000)
+
+# Routers serving list endpoints through orjson without per-row Pydantic validation:
+# "core" (GET /items), plugin names (e.g. "items,copilot_metrics"), or "*" for all
+FAST_JSON_ROUTERS: list[str] = [
+    r.strip() for r in os.getenv("FAST_JSON_ROUTERS", "").split(",") if r.strip()
+]
+
+# Cache-Control for conditional GET routes (ETag/Last-Modified): CACHE_CONTROL__<ROUTE>
+# overrides the default per route group (items, plugin_items, accounts, metrics)
+CACHE_CONTROL_DEFAULT: str = os.getenv("CACHE_CONTROL_DEFAULT", "no-cache")
+CACHE_CONTROL: dict[str, str] = {
+    key[len("CACHE_CONTROL__"):].lower(): value
+    for key, value in os.environ.items()
+    if key.startswith("CACHE_CONTROL__")
+}
+
+# Shared in-process cache ("cache" service): defaults for each namespace, and the
+# TTL of the read-through cache for GET /items/{id} (0 disables it)
+CACHE_DEFAULT_TTL_SECONDS: float = _get_float(os.getenv("CACHE_DEFAULT_TTL_SECONDS"), 60.0)
+CACHE_MAX_ENTRIES: int = _get_int(os.getenv("CACHE_MAX_ENTRIES"), 10_000)
+CACHE_MAX_BYTES: int = _get_int(os.getenv("CACHE_MAX_BYTES"), 16 * 1024 * 1024)
+CACHE_ITEMS_TTL_SECONDS: float = _get_float(os.getenv("CACHE_ITEMS_TTL_SECONDS"), 30.0)
+
+# Request tracing (app/tracing.py): span trees per request, slow-request and slow-query
+# logs (thresholds in ms, 0 disables) and OTLP/JSON export to a file and/or a collector
+# (e.g. http://localhost:4318/v1/traces); TRACING_SAMPLE_RATE applies to export only
+TRACING_ENABLED: bool = _get_bool(os.getenv("TRACING_ENABLED"), default=False)
+TRACING_SAMPLE_RATE: float = _get_float(os.getenv("TRACING_SAMPLE_RATE"), 1.0)
+TRACING_SLOW_REQUEST_MS: float = _get_float(os.getenv("TRACING_SLOW_REQUEST_MS"), 1000.0)
+TRACING_SLOW_QUERY_MS: float = _get_float(os.getenv("TRACING_SLOW_QUERY_MS"), 250.0)
+TRACING_MAX_SPANS: int = _get_int(os.getenv("TRACING_MAX_SPANS"), 1000)
+TRACING_OTLP_FILE: str = os.getenv("TRACING_OTLP_FILE", "")
+TRACING_OTLP_ENDPOINT: str = os.getenv("TRACING_OTLP_ENDPOINT", "")
+TRACING_SERVICE_NAME: str = os.getenv("TRACING_SERVICE_NAME") or APP_NAME
+
+# Response compression (app/compression.py): encodings in order of preference (zstd and br
+# need the zstandard / brotli packages), the smallest body worth compressing, and the
+# per-worker cache of compressed bodies of ETag responses (0 disables the cache)
+COMPRESSION_ENABLED: bool = _get_bool(os.getenv("COMPRESSION_ENABLED"), default=True)
+COMPRESSION_ENCODINGS: list[str] = [
+    e.strip().lower() for e in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",") if e.strip()
+]
+COMPRESSION_MIN_BYTES: int = _get_int(os.getenv("COMPRESSION_MIN_BYTES"), 1024)
+COMPRESSION_CACHE_MAX_BYTES: int = _get_int(os.getenv("COMPRESSION_CACHE_MAX_BYTES"), 32 * 1024 * 1024)
+COMPRESSION_CACHE_MAX_ENTRY_BYTES: int = _get_int(os.getenv("COMPRESSION_CACHE_MAX_ENTRY_BYTES"), 8 * 1024 * 1024)
+
 PLUGINS_ENABLED: list[str] = [
     p.strip() for p in os.getenv("PLUGINS_ENABLED", "hello,analytics").split(",") if p.strip()
 ]
 
+# Health prober: checks run in the background every interval; results older than
+# the freshness window make /readyz report not ready
+HEALTH_PROBE_INTERVAL_SECONDS: float = _get_float(os.getenv("HEALTH_PROBE_INTERVAL_SECONDS"), 5.0)
+HEALTH_FRESHNESS_SECONDS: float = _get_float(os.getenv("HEALTH_FRESHNESS_SECONDS"), 15.0)
+HEALTH_DB_TIMEOUT_SECONDS: float = _get_float(os.getenv("HEALTH_DB_TIMEOUT_SECONDS"), 2.0)
+
+# Cross-worker coordination (Postgres LISTEN/NOTIFY); ignored on other backends
+CLUSTER_CHANNEL: str = os.getenv("CLUSTER_CHANNEL", "app_cluster")
+CLUSTER_WORKER_ID: str = os.getenv("CLUSTER_WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+CLUSTER_HEARTBEAT_SECONDS: float = _get_float(os.getenv("CLUSTER_HEARTBEAT_SECONDS"), 10.0)
+# Workers that have not reported for this long are left out of GET /plugins
+CLUSTER_WORKER_TTL_SECONDS: float = _get_float(os.getenv("CLUSTER_WORKER_TTL_SECONDS"), 30.0)
+
+# Analytics plugin: how often buffered counter deltas are written, and whether /count
+# defaults to the planner estimate (pg_class.reltuples) instead of the maintained counter
+ANALYTICS__FLUSH_SECONDS: float = _get_float(os.getenv("ANALYTICS__FLUSH_SECONDS"), 1.0)
+ANALYTICS__APPROXIMATE_COUNTS: bool = _get_bool(os.getenv("ANALYTICS__APPROXIMATE_COUNTS"), default=False)
+
 # Secret used to encrypt GitHub access tokens (hex, openssl rand -hex 32)
-COPILOT_METRICS__TOKEN_SECRET: str | None = os.getenv("COPILOT_METRICS__TOKEN_SECRET")
\ No newline at end of file
+COPILOT_METRICS__TOKEN_SECRET: str | None = os.getenv("COPILOT_METRICS__TOKEN_SECRET")
+# GitHub API base URL (point it at a standalone simulator for load tests), or answer
+# every GitHub call from the in-process simulator instead of the network
+COPILOT_METRICS__API_URL: str = os.getenv("COPILOT_METRICS__API_URL", "https://api.github.com").rstrip("/")
+COPILOT_METRICS__SIMULATE: bool = _get_bool(os.getenv("COPILOT_METRICS__SIMULATE"), default=False)
+# Monthly range partitions of copilot_metrics on fetched_at (Postgres only): how many
+# future months to keep created, how many past months to keep (0: all) and whether expired
+# partitions are dropped or detached, and how often the upkeep runs
+COPILOT_METRICS__PARTITIONING: bool = _get_bool(os.getenv("COPILOT_METRICS__PARTITIONING"), default=False)
+COPILOT_METRICS__PARTITION_MONTHS_AHEAD: int = _get_int(os.getenv("COPILOT_METRICS__PARTITION_MONTHS_AHEAD"), 3)
+COPILOT_METRICS__RETENTION_MONTHS: int = _get_int(os.getenv("COPILOT_METRICS__RETENTION_MONTHS"), 0)
+COPILOT_METRICS__RETENTION_MODE: str = os.getenv("COPILOT_METRICS__RETENTION_MODE", "drop").lower()
+COPILOT_METRICS__PARTITION_CHECK_SECONDS: float = _get_float(
+    os.getenv("COPILOT_METRICS__PARTITION_CHECK_SECONDS"), 3600.0
+)
+# GET /metrics/stream (SSE): heartbeat interval, events buffered per subscriber before a slow
+# one is disconnected, subscribers per worker, and snapshots replayed on Last-Event-ID resume
+COPILOT_METRICS__STREAM_HEARTBEAT_SECONDS: float = _get_float(os.getenv("COPILOT_METRICS__STREAM_HEARTBEAT_SECONDS"), 15.0)
+COPILOT_METRICS__STREAM_QUEUE_SIZE: int = _get_int(os.getenv("COPILOT_METRICS__STREAM_QUEUE_SIZE"), 256)
+COPILOT_METRICS__STREAM_MAX_SUBSCRIBERS: int = _get_int(os.getenv("COPILOT_METRICS__STREAM_MAX_SUBSCRIBERS"), 10000)
+COPILOT_METRICS__STREAM_REPLAY_LIMIT: int = _get_int(os.getenv("COPILOT_METRICS__STREAM_REPLAY_LIMIT"), 1000)
+# Egress proxy pool for accounts without their own proxy (comma-separated URLs; empty: direct),
+# sticky per account or load-balanced, and when a failing proxy is ejected and for how long
+COPILOT_METRICS__PROXIES: list[str] = [
+    p.strip() for p in os.getenv("COPILOT_METRICS__PROXIES", "").split(",") if p.strip()
+]
+COPILOT_METRICS__PROXY_STICKY: bool = _get_bool(os.getenv("COPILOT_METRICS__PROXY_STICKY"), default=True)
+COPILOT_METRICS__PROXY_EJECT_AFTER: int = _get_int(os.getenv("COPILOT_METRICS__PROXY_EJECT_AFTER"), 3)
+COPILOT_METRICS__PROXY_MAX_ERROR_RATE: float = _get_float(os.getenv("COPILOT_METRICS__PROXY_MAX_ERROR_RATE"), 0.5)
+COPILOT_METRICS__PROXY_EJECT_SECONDS: float = _get_float(os.getenv("COPILOT_METRICS__PROXY_EJECT_SECONDS"), 30.0)
+COPILOT_METRICS__PROXY_MAX_EJECT_SECONDS: float = _get_float(os.getenv("COPILOT_METRICS__PROXY_MAX_EJECT_SECONDS"), 600.0)
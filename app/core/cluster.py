@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import json
+import logging
+import select
+import threading
+import time
+from typing import Any, Callable, List, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from .interfaces import ServiceRegistry
+
+
+logger = logging.getLogger("cluster")
+
+
+class ClusterBus:
+    """Relay selected ServiceRegistry topics to every worker process.
+
+    Topics marked with `relay()` are sent over Postgres `LISTEN/NOTIFY` on a
+    single channel; each worker runs one listener thread that republishes
+    messages from other workers on its local registry. On non-Postgres
+    backends the bus degrades to the in-process event bus (single worker).
+    """
+
+    def __init__(
+        self,
+        registry: ServiceRegistry,
+        engine: Engine,
+        channel: str,
+        worker_id: str,
+        tick_interval: float = 10.0,
+    ) -> None:
+        self.registry = registry
+        self.engine = engine
+        self.channel = channel
+        self.worker_id = worker_id
+        self.tick_interval = tick_interval
+        self._topics: Set[str] = set()
+        self._tick_handlers: List[Callable[[], None]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def enabled(self) -> bool:
+        return self.engine.dialect.name == "postgresql"
+
+    def relay(self, topic: str) -> None:
+        """Mark a topic as cluster-wide."""
+        self._topics.add(topic)
+
+    def on_tick(self, handler: Callable[[], None]) -> None:
+        """Run `handler` periodically from the listener thread (heartbeats)."""
+        self._tick_handlers.append(handler)
+
+    def broadcast(self, topic: str, payload: Any, local: bool = True) -> None:
+        """Publish locally and, for relayed topics, to all other workers."""
+        if local:
+            self.registry.publish(topic, payload)
+        if topic not in self._topics or not self.enabled:
+            return
+        message = json.dumps({"topic": topic, "origin": self.worker_id, "payload": payload})
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text("SELECT pg_notify(:channel, :message)"), {"channel": self.channel, "message": message})
+        except Exception:
+            logger.exception("Failed to broadcast %s", topic)
+
+    def dispatch(self, message: str) -> None:
+        """Republish a raw notification payload on the local registry."""
+        try:
+            data = json.loads(message)
+        except ValueError:
+            logger.warning("Ignoring malformed cluster message: %r", message[:200])
+            return
+        if data.get("origin") == self.worker_id or data.get("topic") not in self._topics:
+            return
+        self.registry.publish(data["topic"], data.get("payload"))
+
+    # Listener lifecycle
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        target = self._listen if self.enabled else self._tick_only
+        self._thread = threading.Thread(target=target, name="cluster-bus", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.tick_interval + 1)
+            self._thread = None
+
+    def _tick(self) -> None:
+        for handler in self._tick_handlers:
+            try:
+                handler()
+            except Exception:
+                logger.exception("Cluster tick handler failed")
+
+    def _tick_only(self) -> None:
+        while not self._stop.wait(self.tick_interval):
+            self._tick()
+
+    def _listen(self) -> None:
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self.engine.raw_connection()
+                dbapi_conn = conn.driver_connection
+                dbapi_conn.rollback()
+                dbapi_conn.autocommit = True
+                with dbapi_conn.cursor() as cur:
+                    cur.execute('LISTEN "%s"' % self.channel.replace('"', '""'))
+                logger.info("Listening on channel %s as %s", self.channel, self.worker_id)
+                next_tick = time.monotonic()
+                while not self._stop.is_set():
+                    now = time.monotonic()
+                    if now >= next_tick:
+                        self._tick()
+                        next_tick = now + self.tick_interval
+                    ready, _, _ = select.select([dbapi_conn], [], [], min(1.0, self.tick_interval))
+                    if not ready:
+                        continue
+                    dbapi_conn.poll()
+                    while dbapi_conn.notifies:
+                        self.dispatch(dbapi_conn.notifies.pop(0).payload)
+            except Exception:
+                logger.exception("Cluster listener failed; reconnecting")
+                self._stop.wait(1.0)
+            finally:
+                if conn is not None:
+                    # The connection was switched to autocommit; never hand it back to the pool
+                    try:
+                        conn.invalidate()
+                    except Exception:
+                        pass
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Any, Dict, Iterable, Optional, Type
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Type
 
 from fastapi import APIRouter, FastAPI
 
@@ -44,6 +44,14 @@ class ModuleInterface(ABC):
         """Return a list of middlewares to add to the app (optional)."""
         return []
 
+    def migrations(self) -> Sequence[Any]:
+        """Return the plugin's schema migration chain (`app.migrations.Migration`), applied before start()."""
+        return []
+
+    def readiness_checks(self) -> Iterable["ReadinessCheck"]:
+        """Return checks that must pass for the app to report ready (optional)."""
+        return []
+
 
 @dataclass
 class MiddlewareDef:
@@ -51,6 +59,15 @@ class MiddlewareDef:
     kwargs: Dict[str, Any] | None = None
 
 
+@dataclass
+class ReadinessCheck:
+    """A probe run by the background health prober; it fails by raising or returning False."""
+
+    name: str
+    check: Callable[[], Any]
+    timeout: float = 2.0
+
+
 class ServiceRegistry:
     """Simple registry for services and an event bus."""
 
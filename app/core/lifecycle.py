@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from .cluster import ClusterBus
+from .manager import ModuleState, PluginManager
+
+
+logger = logging.getLogger("plugins")
+
+LIFECYCLE_TOPIC = "plugins.lifecycle"
+_ACTIONS = {"load": "loaded", "start": "started", "stop": "stopped"}
+_STATUS_ACTIONS = {status: action for action, status in _ACTIONS.items()}
+
+
+class PluginStateSync:
+    """Keep plugin lifecycle state consistent across worker processes.
+
+    Lifecycle commands are applied locally, persisted as the desired state
+    and broadcast on the cluster bus. Each worker reports its own state, so
+    `aggregate()` can show every live worker's view of every plugin.
+    """
+
+    def __init__(self, manager: PluginManager, bus: ClusterBus, session_factory, worker_ttl: float = 30.0) -> None:
+        self.manager = manager
+        self.bus = bus
+        self.session_factory = session_factory
+        self.worker_ttl = worker_ttl
+        self._lock = threading.RLock()
+        bus.relay(LIFECYCLE_TOPIC)
+        bus.registry.subscribe(LIFECYCLE_TOPIC, self.handle)
+        bus.on_tick(self.report)
+
+    @property
+    def worker_id(self) -> str:
+        return self.bus.worker_id
+
+    def command(self, name: str, action: str) -> ModuleState:
+        """Apply a lifecycle action here, persist it and notify other workers."""
+        state = self._apply(name, action)
+        if state.status != "failed":
+            self._persist_desired(name, _ACTIONS[action])
+            self.bus.broadcast(LIFECYCLE_TOPIC, {"name": name, "action": action}, local=False)
+        self.report()
+        return state
+
+    def handle(self, payload: Dict[str, Any]) -> None:
+        """Apply a lifecycle command received from another worker."""
+        name, action = payload.get("name"), payload.get("action")
+        if action not in _ACTIONS or not name:
+            return
+        try:
+            self._apply(name, action, autoload=True)
+        except Exception:
+            logger.exception("Failed to apply %s for plugin %s", action, name)
+        self.report()
+
+    def reconcile(self) -> None:
+        """Converge local plugins on the persisted desired states (worker boot)."""
+        from app.models import PluginDesiredState
+
+        with self.session_factory() as db:
+            desired = {row.name: row.status for row in db.query(PluginDesiredState).all()}
+        for name, status in desired.items():
+            current = self.manager.states.get(name)
+            if current and current.status == status:
+                continue
+            try:
+                self._apply(name, _STATUS_ACTIONS[status], autoload=True)
+            except Exception:
+                logger.exception("Failed to reconcile plugin %s to %s", name, status)
+
+    def report(self) -> None:
+        """Upsert this worker's view of every plugin (also serves as heartbeat)."""
+        from app.models import PluginWorkerState
+
+        now = datetime.now(timezone.utc)
+        try:
+            with self._lock, self.session_factory() as db:
+                for st in self.manager.list_states():
+                    db.merge(
+                        PluginWorkerState(
+                            worker_id=self.worker_id,
+                            name=st.name,
+                            version=st.version,
+                            status=st.status,
+                            error=st.error,
+                            reported_at=now,
+                        )
+                    )
+                db.commit()
+        except Exception:
+            logger.exception("Failed to report plugin states for worker %s", self.worker_id)
+
+    def retire(self) -> None:
+        """Remove this worker's reported rows (graceful shutdown)."""
+        from app.models import PluginWorkerState
+
+        try:
+            with self.session_factory() as db:
+                db.query(PluginWorkerState).filter(PluginWorkerState.worker_id == self.worker_id).delete()
+                db.commit()
+        except Exception:
+            logger.exception("Failed to retire worker %s", self.worker_id)
+
+    def aggregate(self) -> List[Dict[str, Any]]:
+        """Local states merged with the desired and per-worker states from the database."""
+        from app.models import PluginDesiredState, PluginWorkerState
+
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.worker_ttl)
+        out: Dict[str, Dict[str, Any]] = {
+            st.name: {**st.__dict__, "desired": None, "workers": {}} for st in self.manager.list_states()
+        }
+        with self.session_factory() as db:
+            for row in db.query(PluginDesiredState).all():
+                out.setdefault(row.name, self._remote_only(row.name))["desired"] = row.status
+            rows = db.query(PluginWorkerState).filter(PluginWorkerState.reported_at >= cutoff).all()
+            for row in rows:
+                entry = out.setdefault(row.name, self._remote_only(row.name))
+                entry["workers"][row.worker_id] = {"status": row.status, "error": row.error}
+        return list(out.values())
+
+    def _persist_desired(self, name: str, status: str) -> None:
+        from app.models import PluginDesiredState
+
+        with self.session_factory() as db:
+            db.merge(PluginDesiredState(name=name, status=status))
+            db.commit()
+
+    def _remote_only(self, name: str) -> Dict[str, Any]:
+        return {"name": name, "version": "unknown", "status": "unknown", "error": None, "desired": None, "workers": {}}
+
+    def _apply(self, name: str, action: str, autoload: bool = False) -> ModuleState:
+        with self._lock:
+            if action == "load":
+                return self.manager.load(name)
+            if autoload and name not in self.manager.modules:
+                # A worker booted with a different PLUGINS_ENABLED may not have it yet
+                loaded = self.manager.load(name)
+                if loaded.status == "failed":
+                    return loaded
+            if action == "start":
+                return self.manager.start(name)
+            return self.manager.stop(name)
@@ -4,11 +4,11 @@ import importlib
 import logging
 import pkgutil
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 
 from fastapi import APIRouter, FastAPI, HTTPException
 
-from .interfaces import ModuleInterface, ServiceRegistry, MiddlewareDef
+from .interfaces import ModuleInterface, ServiceRegistry, MiddlewareDef, ReadinessCheck
 
 
 logger = logging.getLogger("plugins")
@@ -29,6 +29,11 @@ class PluginManager:
         self.registry = ServiceRegistry()
         self.modules: Dict[str, ModuleInterface] = {}
         self.states: Dict[str, ModuleState] = {}
+        self._load_handlers: List[Callable[[str], None]] = []
+
+    def on_load(self, handler: Callable[[str], None]) -> None:
+        """Call `handler(name)` after each successful plugin load (startup or runtime)."""
+        self._load_handlers.append(handler)
 
     def register_core_services(self) -> None:
         # Example: register core services available to plugins
@@ -39,6 +44,43 @@ class PluginManager:
             self.registry.register_service("db_session_dep", get_db)
         except Exception:
             logger.warning("Could not register db_session_dep service")
+        # Session dependency for read-only endpoints (routed to replicas when configured)
+        try:
+            from app.db import get_read_db
+
+            self.registry.register_service("read_db_session_dep", get_read_db)
+        except Exception:
+            logger.warning("Could not register read_db_session_dep service")
+        # AsyncSession dependency for plugins with async endpoints
+        try:
+            from app.db import get_async_db
+
+            self.registry.register_service("async_db_session_dep", get_async_db)
+        except Exception:
+            logger.warning("Could not register async_db_session_dep service")
+        # AsyncSession counterpart of read_db_session_dep
+        try:
+            from app.db import get_async_read_db
+
+            self.registry.register_service("async_read_db_session_dep", get_async_read_db)
+        except Exception:
+            logger.warning("Could not register async_read_db_session_dep service")
+        # Namespaced TTL/LRU caches with invalidation over the event bus
+        try:
+            from app.cache import CacheService
+            from app.config import CACHE_DEFAULT_TTL_SECONDS, CACHE_MAX_BYTES, CACHE_MAX_ENTRIES
+
+            self.registry.register_service(
+                "cache",
+                CacheService(
+                    self.registry,
+                    default_ttl=CACHE_DEFAULT_TTL_SECONDS,
+                    max_entries=CACHE_MAX_ENTRIES,
+                    max_bytes=CACHE_MAX_BYTES,
+                ),
+            )
+        except Exception:
+            logger.warning("Could not register cache service")
 
     def discover_available(self) -> List[str]:
         """List plugin packages available under base_package."""
@@ -79,6 +121,11 @@ class PluginManager:
             state = ModuleState(name=name, version=getattr(plugin, "version", "0.0.0"), status="loaded")
             self.states[name] = state
             logger.info("Loaded plugin: %s", name)
+            for handler in self._load_handlers:
+                try:
+                    handler(name)
+                except Exception:
+                    logger.exception("Load handler failed for plugin %s", name)
             return state
         except Exception as exc:
             state = ModuleState(name=name, version="unknown", status="failed", error=str(exc))
@@ -91,6 +138,7 @@ class PluginManager:
         if not plugin:
             raise HTTPException(status_code=404, detail=f"Plugin {name} not loaded")
         try:
+            self._migrate(name, plugin)
             plugin.start()
             st = self.states[name]
             st.status = "started"
@@ -103,6 +151,25 @@ class PluginManager:
             logger.exception("Failed to start plugin %s: %s", name, exc)
             return st
 
+    def migration_chains(self) -> Dict[str, list]:
+        """Migration chains of loaded plugins, keyed by plugin name."""
+        chains: Dict[str, list] = {}
+        for name, plugin in self.modules.items():
+            migrations = list(plugin.migrations())
+            if migrations:
+                chains[name] = migrations
+        return chains
+
+    def _migrate(self, name: str, plugin: ModuleInterface) -> None:
+        migrations = list(plugin.migrations())
+        if not migrations:
+            return
+        from app.db import engine
+        from app.migrations import migrate
+
+        # No-op (and no query) when the chain was already verified at boot
+        migrate(engine, {name: migrations})
+
     def stop(self, name: str) -> ModuleState:
         plugin = self.modules.get(name)
         if not plugin:
@@ -133,6 +200,20 @@ class PluginManager:
     def list_states(self) -> List[ModuleState]:
         return list(self.states.values())
 
+    def readiness_checks(self) -> List[ReadinessCheck]:
+        """Readiness checks of started plugins, named `plugin:<plugin>:<check>`."""
+        checks: List[ReadinessCheck] = []
+        for name, plugin in list(self.modules.items()):
+            st = self.states.get(name)
+            if not st or st.status != "started":
+                continue
+            try:
+                for chk in plugin.readiness_checks():
+                    checks.append(ReadinessCheck(name=f"plugin:{name}:{chk.name}", check=chk.check, timeout=chk.timeout))
+            except Exception:
+                logger.exception("Failed to collect readiness checks for plugin %s", name)
+        return checks
+
     def register_module(self, module: ModuleInterface) -> ModuleState:
         """Manually register a module (useful for testing/dynamic embedding)."""
         name = getattr(module, "name", module.__class__.__name__.lower())
@@ -1,8 +1,11 @@
-from typing import List, Optional
+from typing import Any, List, Optional, Sequence, Tuple
 
+from sqlalchemy import Row, delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from . import models, schemas
+from .pagination import keyset_select, split_page
 
 
 def create_item(db: Session, item: schemas.ItemCreate) -> models.Item:
@@ -17,27 +20,105 @@ def get_item(db: Session, item_id: int) -> Optional[models.Item]:
     return db.query(models.Item).filter(models.Item.id == item_id).first()
 
 
-def get_items(db: Session, skip: int = 0, limit: int = 100) -> List[models.Item]:
+def get_items(
+    db: Session, skip: int = 0, limit: int = 100, columns: Optional[Sequence[Any]] = None
+) -> List[models.Item]:
+    """Items by offset; with `columns`, plain rows of those columns instead of ORM objects."""
+    if columns is not None:
+        return list(db.execute(select(*columns).offset(skip).limit(limit)))
     return db.query(models.Item).offset(skip).limit(limit).all()
 
 
+def get_items_page(
+    db: Session,
+    after: Optional[Tuple[Any, ...]],
+    limit: int = 100,
+    sort: str = "id",
+    columns: Optional[Sequence[Any]] = None,
+) -> Tuple[List[models.Item], Optional[str]]:
+    """Keyset page of items after the decoded cursor `after`; returns (items, next_cursor)."""
+    base = select(*columns) if columns is not None else select(models.Item)
+    stmt = keyset_select(base, models.Item, sort, after, limit, db.get_bind().dialect.name)
+    rows = db.execute(stmt).all() if columns is not None else list(db.scalars(stmt))
+    return split_page(rows, sort, limit)
+
+
 def update_item(db: Session, item_id: int, item: schemas.ItemUpdate) -> Optional[models.Item]:
-    db_item = get_item(db, item_id)
-    if not db_item:
+    """Apply the non-null fields of `item` with a single `UPDATE ... RETURNING`."""
+    values = item.model_dump(exclude_none=True)
+    if not values:
+        return get_item(db, item_id)
+    stmt = update(models.Item).where(models.Item.id == item_id).values(**values).returning(models.Item)
+    db_item = db.scalars(stmt).first()
+    if db_item is None:
         return None
-    if item.name is not None:
-        db_item.name = item.name
-    if item.description is not None:
-        db_item.description = item.description
+    # Detach before commit so the returned row is not expired and reloaded
+    db.expunge(db_item)
     db.commit()
-    db.refresh(db_item)
     return db_item
 
 
-def delete_item(db: Session, item_id: int) -> bool:
-    db_item = get_item(db, item_id)
-    if not db_item:
-        return False
-    db.delete(db_item)
+def delete_item(db: Session, item_id: int) -> Optional[Row]:
+    """Delete one item; returns its (id, created_at), or None if there was none."""
+    stmt = delete(models.Item).where(models.Item.id == item_id).returning(models.Item.id, models.Item.created_at)
+    deleted = db.execute(stmt).first()
+    if deleted is None:
+        return None
     db.commit()
-    return True
\ No newline at end of file
+    return deleted
+
+
+# Async equivalents (AsyncSession from get_async_db)
+async def create_item_async(db: AsyncSession, item: schemas.ItemCreate) -> models.Item:
+    db_item = models.Item(name=item.name, description=item.description)
+    db.add(db_item)
+    await db.commit()
+    await db.refresh(db_item)
+    return db_item
+
+
+async def get_item_async(db: AsyncSession, item_id: int) -> Optional[models.Item]:
+    result = await db.execute(select(models.Item).where(models.Item.id == item_id))
+    return result.scalars().first()
+
+
+async def get_items_async(
+    db: AsyncSession, skip: int = 0, limit: int = 100, columns: Optional[Sequence[Any]] = None
+) -> List[models.Item]:
+    if columns is not None:
+        return list(await db.execute(select(*columns).offset(skip).limit(limit)))
+    result = await db.execute(select(models.Item).offset(skip).limit(limit))
+    return list(result.scalars().all())
+
+
+async def get_items_page_async(
+    db: AsyncSession,
+    after: Optional[Tuple[Any, ...]],
+    limit: int = 100,
+    sort: str = "id",
+    columns: Optional[Sequence[Any]] = None,
+) -> Tuple[List[models.Item], Optional[str]]:
+    base = select(*columns) if columns is not None else select(models.Item)
+    stmt = keyset_select(base, models.Item, sort, after, limit, db.get_bind().dialect.name)
+    rows = (await db.execute(stmt)).all() if columns is not None else list(await db.scalars(stmt))
+    return split_page(rows, sort, limit)
+
+
+async def update_item_async(db: AsyncSession, item_id: int, item: schemas.ItemUpdate) -> Optional[models.Item]:
+    values = item.model_dump(exclude_none=True)
+    if not values:
+        return await get_item_async(db, item_id)
+    stmt = update(models.Item).where(models.Item.id == item_id).values(**values).returning(models.Item)
+    db_item = (await db.scalars(stmt)).first()
+    if db_item is None:
+        return None
+    await db.commit()
+    return db_item
+
+
+async def delete_item_async(db: AsyncSession, item_id: int) -> bool:
+    deleted = await db.scalar(delete(models.Item).where(models.Item.id == item_id).returning(models.Item.id))
+    if deleted is None:
+        return False
+    await db.commit()
+    return True
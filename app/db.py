@@ -1,27 +1,122 @@
 import logging
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import Engine, create_engine, make_url, text
 from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-from .config import DATABASE_URL
-from .models import Base
+from .config import (
+    DATABASE_REPLICA_URLS,
+    DATABASE_URL,
+    DB_REPLICA_CHECK_INTERVAL_SECONDS,
+    DB_REPLICA_MAX_LAG_SECONDS,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_POOL_USE_LIFO,
+    DB_STATEMENT_TIMEOUT_MS,
+)
+from .pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, PoolMetrics
+from .replicas import ReplicaRouter, prefer_primary
 
 
 logger = logging.getLogger("db")
 
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """Pool sizing and connection settings from app.config for the given URL."""
+    parsed = make_url(url)
+    options: dict = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # In-memory SQLite needs its single shared connection; keep the dialect's default pool
+        return options
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_use_lifo=DB_POOL_USE_LIFO,
+    )
+    if DB_STATEMENT_TIMEOUT_MS and parsed.get_backend_name() == "postgresql":
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
 # Create synchronous SQLAlchemy engine using DATABASE_URL
-engine = create_engine(DATABASE_URL, pool_pre_ping=True, future=True)
+engine = create_engine(DATABASE_URL, future=True, **engine_options(DATABASE_URL))
+pool_metrics = PoolMetrics("primary")
+pool_metrics.attach(engine)
+async_pool_metrics = PoolMetrics("primary_async")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read replicas share the pool settings of the primary
+replica_router = ReplicaRouter(
+    [create_engine(url, future=True, **engine_options(url)) for url in DATABASE_REPLICA_URLS],
+    max_lag=DB_REPLICA_MAX_LAG_SECONDS,
+    check_interval=DB_REPLICA_CHECK_INTERVAL_SECONDS,
+)
+
+# Async drivers used for the same database; the async engine is created lazily so
+# deployments that never use it do not need the driver installed.
+_ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+_async_engine: AsyncEngine | None = None
+_async_sessionmaker: async_sessionmaker[AsyncSession] | None = None
+# Async engines of the read replicas, by their sync engine
+_async_replicas: dict[Engine, AsyncEngine] = {}
+
+
+def to_async_url(url: str) -> str:
+    """Translate a sync DATABASE_URL into the equivalent async driver URL."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver configured for backend {backend!r}")
+    return parsed.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        async_url = to_async_url(DATABASE_URL)
+        _async_engine = create_async_engine(async_url, **engine_options(async_url, is_async=True))
+        async_pool_metrics.attach(_async_engine.sync_engine)
+        # Objects stay usable after commit; lazy refreshes are not possible under asyncio
+        _async_sessionmaker = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
+def async_read_engine() -> AsyncEngine:
+    """Async counterpart of `read_engine`: a healthy replica, else the primary."""
+    target = None if prefer_primary.get() else replica_router.pick()
+    if target is None:
+        return get_async_engine()
+    replica = _async_replicas.get(target)
+    if replica is None:
+        async_url = to_async_url(target.url.render_as_string(hide_password=False))
+        replica = _async_replicas[target] = create_async_engine(async_url, **engine_options(async_url, is_async=True))
+    return replica
+
+
+def init_db(plugin_chains: dict | None = None) -> None:
+    """Apply pending schema migrations for the core and the given plugin chains.
+
+    All chains are checked with a single version query; a worker only takes the
+    migration lock when something is actually pending.
+    """
+    from .migrations import migrate
+    from .migrations.core import MIGRATIONS as CORE_MIGRATIONS
 
-def init_db() -> None:
-    """Create all tables if they don't exist."""
     try:
-        Base.metadata.create_all(bind=engine)
-        logger.info("Database tables ensured.")
+        applied = migrate(engine, {"core": CORE_MIGRATIONS, **(plugin_chains or {})})
+        logger.info("Database schema up to date%s.", f" (applied {applied})" if applied else "")
     except Exception as exc:
-        logger.exception("Failed to create tables: %s", exc)
+        logger.exception("Failed to migrate database: %s", exc)
         raise
 
 
@@ -41,4 +136,32 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def read_engine() -> Engine:
+    """Engine for read-only work: a healthy replica, else the primary."""
+    target = None if prefer_primary.get() else replica_router.pick()
+    return target if target is not None else engine
+
+
+def get_read_db():
+    """Session for read-only endpoints: a healthy replica, else the primary."""
+    db = SessionLocal(bind=read_engine())
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    get_async_engine()
+    async with _async_sessionmaker() as db:
+        yield db
+
+
+async def get_async_read_db():
+    """AsyncSession for read-only endpoints: a healthy replica, else the primary."""
+    get_async_engine()
+    async with _async_sessionmaker(bind=async_read_engine()) as db:
+        yield db
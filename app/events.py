@@ -0,0 +1,44 @@
+"""Event-bus topics published by the item write paths.
+
+Published on the in-process `ServiceRegistry` bus after the write commits.
+Payload: `{"table": <table name>, "count": <rows>, "at": <aware UTC datetime>}`.
+Deletes also carry `"days"`: the UTC creation days of the deleted rows
+(`{date: rows}`), so per-day histograms can count the rows that still exist.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+ITEMS_CREATED = "items.created"
+ITEMS_DELETED = "items.deleted"
+
+
+def creation_days(created: Iterable[Optional[datetime]]) -> Dict[date, int]:
+    """Rows per UTC day of their `created_at` (naive values are UTC, as SQLite returns them)."""
+    days: Counter = Counter()
+    for at in created:
+        if at is not None:
+            days[(at if at.tzinfo is None else at.astimezone(timezone.utc)).date()] += 1
+    return dict(days)
+
+
+def item_event(table: str, count: int = 1, days: Optional[Dict[date, int]] = None) -> Dict[str, Any]:
+    event = {"table": table, "count": count, "at": datetime.now(timezone.utc)}
+    if days is not None:
+        event["days"] = days
+    return event
+
+
+def publish_items(
+    publish: Callable[[str, Any], None] | None,
+    topic: str,
+    table: str,
+    count: int = 1,
+    days: Optional[Dict[date, int]] = None,
+) -> None:
+    """Publish an item event unless nothing was written (or no bus is wired)."""
+    if publish is not None and count > 0:
+        publish(topic, item_event(table, count, days))
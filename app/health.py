@@ -0,0 +1,150 @@
+"""Background health prober with cached readiness results."""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .core.interfaces import ReadinessCheck
+
+
+logger = logging.getLogger("health")
+
+
+@dataclass
+class CheckResult:
+    ok: bool
+    checked_at: float
+    duration_ms: float
+    error: Optional[str] = None
+
+    def as_dict(self, freshness: float, now: float) -> Dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "stale": now - self.checked_at > freshness,
+            "age_s": round(now - self.checked_at, 3),
+            "duration_ms": round(self.duration_ms, 3),
+            "error": self.error,
+        }
+
+
+class HealthProber:
+    """Runs readiness checks in the background and serves their cached results.
+
+    Each check runs in a small thread pool with its own timeout. A check that
+    is still running from a previous round (e.g. a hung connection) is not
+    resubmitted; its cached result simply ages until it is reported stale.
+    """
+
+    def __init__(self, interval: float = 5.0, freshness: float = 15.0, max_workers: int = 4) -> None:
+        self.interval = interval
+        self.freshness = freshness
+        self._checks: Dict[str, ReadinessCheck] = {}
+        self._sources: List[Callable[[], Iterable[ReadinessCheck]]] = []
+        self._results: Dict[str, CheckResult] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="health-check")
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def register(self, check: ReadinessCheck) -> None:
+        self._checks[check.name] = check
+
+    def add_source(self, source: Callable[[], Iterable[ReadinessCheck]]) -> None:
+        """Add a callable evaluated every round (e.g. checks of currently started plugins)."""
+        self._sources.append(source)
+
+    def all_checks(self) -> List[ReadinessCheck]:
+        checks = list(self._checks.values())
+        for source in self._sources:
+            try:
+                checks.extend(source())
+            except Exception:
+                logger.exception("Failed to collect readiness checks")
+        return checks
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="health-prober", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.probe()
+            self._stop.wait(self.interval)
+
+    def probe(self) -> None:
+        """Run one round of all checks, each bounded by its own timeout."""
+        with self._probe_lock:
+            checks = self.all_checks()
+            submitted = []
+            for chk in checks:
+                pending = self._inflight.get(chk.name)
+                if pending is not None and not pending.done():
+                    continue
+                self._inflight[chk.name] = self._executor.submit(self._timed, chk)
+                submitted.append(chk)
+            for chk in submitted:
+                started = time.time()
+                try:
+                    result = self._inflight[chk.name].result(timeout=chk.timeout)
+                except FutureTimeoutError:
+                    result = CheckResult(False, started, chk.timeout * 1000, f"timed out after {chk.timeout}s")
+                with self._lock:
+                    self._results[chk.name] = result
+            # Forget results of checks that no longer exist (e.g. stopped plugins)
+            names = {chk.name for chk in checks}
+            with self._lock:
+                for name in list(self._results):
+                    if name not in names:
+                        del self._results[name]
+
+    @staticmethod
+    def _timed(chk: ReadinessCheck) -> CheckResult:
+        started = time.time()
+        t0 = time.perf_counter()
+        try:
+            ok = chk.check() is not False
+            error = None if ok else "check returned False"
+        except Exception as exc:
+            ok, error = False, f"{type(exc).__name__}: {exc}"
+        return CheckResult(ok, started, (time.perf_counter() - t0) * 1000, error)
+
+    def result(self, name: str) -> Optional[CheckResult]:
+        with self._lock:
+            return self._results.get(name)
+
+    def readiness(self) -> Dict[str, Any]:
+        """Cached readiness; probes inline only when no background prober is running."""
+        now = time.time()
+        with self._lock:
+            results = dict(self._results)
+        if not self.running and (not results or any(now - r.checked_at > self.freshness for r in results.values())):
+            self.probe()
+            now = time.time()
+            with self._lock:
+                results = dict(self._results)
+        checks = {name: r.as_dict(self.freshness, now) for name, r in results.items()}
+        missing = {chk.name for chk in self.all_checks()} - set(checks)
+        for name in missing:
+            checks[name] = {"ok": False, "stale": True, "age_s": None, "duration_ms": None, "error": "not probed yet"}
+        ready = all(c["ok"] and not c["stale"] for c in checks.values())
+        return {"status": "ready" if ready else "not_ready", "checks": checks}
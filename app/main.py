@@ -1,31 +1,121 @@
 import logging
-from typing import List
+from typing import Any, List, Literal, Optional, Union
 
-from fastapi import Depends, FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from . import crud, schemas
-from .db import check_db_connection, get_db, init_db
+from . import bulk, crud, models, schemas
+from .cache import CACHE_INVALIDATE_TOPIC
+from .events import ITEMS_CREATED, ITEMS_DELETED, creation_days, publish_items
+from .db import (
+    SessionLocal,
+    async_pool_metrics,
+    check_db_connection,
+    engine,
+    get_async_read_db,
+    get_db,
+    get_read_db,
+    init_db,
+    pool_metrics,
+    read_engine,
+    replica_router,
+)
+from .compression import CompressedBodyCache, CompressionMiddleware, CompressionStats, available_encodings
+from .conditional import Validators, conditional_get
+from .core.cluster import ClusterBus
+from .core.interfaces import ReadinessCheck
+from .core.lifecycle import PluginStateSync
 from .core.manager import PluginManager
-from .config import PLUGINS_ENABLED
+from .config import (
+    BULK_COPY_THRESHOLD,
+    BULK_MAX_BYTES,
+    BULK_MAX_ITEMS,
+    CACHE_ITEMS_TTL_SECONDS,
+    CLUSTER_CHANNEL,
+    CLUSTER_HEARTBEAT_SECONDS,
+    CLUSTER_WORKER_ID,
+    CLUSTER_WORKER_TTL_SECONDS,
+    COMPRESSION_CACHE_MAX_BYTES,
+    COMPRESSION_CACHE_MAX_ENTRY_BYTES,
+    COMPRESSION_ENABLED,
+    COMPRESSION_ENCODINGS,
+    COMPRESSION_MIN_BYTES,
+    DB_READ_YOUR_WRITES_SECONDS,
+    HEALTH_DB_TIMEOUT_SECONDS,
+    HEALTH_FRESHNESS_SECONDS,
+    HEALTH_PROBE_INTERVAL_SECONDS,
+    PLUGINS_ENABLED,
+    TRANSFER_BATCH_SIZE,
+)
+from .health import HealthProber
+from .pagination import InvalidCursor, decode_cursor
+from .replicas import ReadConsistencyMiddleware, prefer_primary
+from .responses import FastJSONResponse, RowSerializer, fast_json_enabled, response_class
+from .search import search_items
+from .tracing import TracingMiddleware, instrument_middleware, instrument_routes, tracer
+from .transfer import MEDIA_TYPES, ImportResponse, export_rows, import_rows
 from fastapi import APIRouter
 
 
-app = FastAPI(title="FastAPI + PostgreSQL (Docker)")
+# Opt-in orjson rendering and validation-free list serialization (FAST_JSON_ROUTERS)
+fast_json = fast_json_enabled("core")
+app = FastAPI(title="FastAPI + PostgreSQL (Docker)", default_response_class=response_class("core"))
+item_rows = RowSerializer(schemas.ItemRead)
 logger = logging.getLogger("uvicorn")
 # Initialize plugin manager early so middleware can be registered before app startup.
 plugin_manager: PluginManager = PluginManager(app)
 plugin_manager.register_core_services()
+# Lifecycle commands are persisted and relayed to every worker via LISTEN/NOTIFY
+cluster_bus = ClusterBus(
+    plugin_manager.registry, engine, CLUSTER_CHANNEL, CLUSTER_WORKER_ID, tick_interval=CLUSTER_HEARTBEAT_SECONDS
+)
+plugin_manager.registry.register_service("cluster_bus", cluster_bus)
+# Cache invalidations reach every worker
+cache_service = plugin_manager.registry.get_service("cache")
+cluster_bus.relay(CACHE_INVALIDATE_TOPIC)
+cache_service.use_broadcast(cluster_bus.broadcast)
+item_cache = cache_service.namespace("items", ttl=CACHE_ITEMS_TTL_SECONDS)
+plugin_sync = PluginStateSync(plugin_manager, cluster_bus, SessionLocal, worker_ttl=CLUSTER_WORKER_TTL_SECONDS)
+# Readiness is probed in the background; health endpoints only read cached results
+health_prober = HealthProber(interval=HEALTH_PROBE_INTERVAL_SECONDS, freshness=HEALTH_FRESHNESS_SECONDS)
+health_prober.register(ReadinessCheck(name="database", check=check_db_connection, timeout=HEALTH_DB_TIMEOUT_SECONDS))
+health_prober.add_source(plugin_manager.readiness_checks)
+plugin_manager.registry.register_service("health", health_prober)
 for name in PLUGINS_ENABLED:
     # Pre-load plugins so that any declared middlewares are added before startup.
     # Plugin start is deferred to the startup event below.
     plugin_manager.load(name)
+if tracer.enabled:
+    # Plugins loaded at runtime (POST /plugins/load, cluster relay) get route spans too
+    plugin_manager.on_load(lambda name: instrument_routes(app))
+if replica_router.replicas:
+    # Pin a client's reads to the primary shortly after it writes
+    app.add_middleware(ReadConsistencyMiddleware, window=DB_READ_YOUR_WRITES_SECONDS)
+# Compression wraps everything but tracing; cached bodies skip serialization on revalidation
+compression_stats = CompressionStats()
+compression_cache = CompressedBodyCache(COMPRESSION_CACHE_MAX_BYTES, COMPRESSION_CACHE_MAX_ENTRY_BYTES)
+if COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        min_size=COMPRESSION_MIN_BYTES,
+        encodings=COMPRESSION_ENCODINGS,
+        cache=compression_cache,
+        stats=compression_stats,
+    )
+if tracer.enabled:
+    # Outermost user middleware; the ones registered above get their own spans
+    instrument_middleware(app)
+    app.add_middleware(TracingMiddleware)
+    tracer.instrument_engines()
 
 
 @app.on_event("startup")
 def on_startup():
     try:
-        init_db()
+        # One version check for the core and every loaded plugin's migration chain
+        init_db(plugin_manager.migration_chains())
         check_db_connection()
         logger.info("Database connection established.")
         # Start already loaded plugins (deferred until DB is ready)
@@ -33,6 +123,16 @@ def on_startup():
             st = plugin_manager.states.get(name)
             if st and st.status == "loaded":
                 plugin_manager.start(name)
+        # Apply lifecycle commands issued while this worker was down, then follow new ones
+        plugin_sync.reconcile()
+        plugin_sync.report()
+        cluster_bus.start()
+        health_prober.start()
+        replica_router.start()
+        if tracer.enabled:
+            # Every router (core and plugins) is included by now
+            instrument_routes(app)
+            tracer.exporter.start()
         logger.info("Plugins initialized: %s", PLUGINS_ENABLED)
     except Exception:
         logger.exception("Database initialization or connection failed during startup.")
@@ -40,13 +140,78 @@ def on_startup():
         raise
 
 
+@app.on_event("shutdown")
+def on_shutdown():
+    tracer.exporter.stop()
+    replica_router.stop()
+    health_prober.stop()
+    cluster_bus.stop()
+    plugin_sync.retire()
+
+
 @app.get("/health")
 def health():
-    try:
-        ok = check_db_connection()
-        return {"status": "ok", "database": "ok" if ok else "error"}
-    except Exception:
+    database = health_prober.readiness()["checks"].get("database")
+    if not database or not database["ok"]:
         raise HTTPException(status_code=500, detail="Database connection failed")
+    return {"status": "ok", "database": "ok", "pool": pool_metrics.summary()}
+
+
+@app.get("/livez")
+def livez():
+    # Process liveness only; never touches the database
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    state = health_prober.readiness()
+    return JSONResponse(state, status_code=200 if state["status"] == "ready" else 503)
+
+
+# Operational endpoints
+admin_router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@admin_router.get("/pool")
+def pool_stats():
+    return {"primary": pool_metrics.snapshot(), "primary_async": async_pool_metrics.snapshot()}
+
+
+@admin_router.get("/replicas")
+def replica_status():
+    return replica_router.status()
+
+
+@admin_router.get("/cache")
+def cache_stats():
+    return cache_service.stats()
+
+
+@admin_router.delete("/cache/{namespace}")
+def cache_clear(namespace: str):
+    cache_service.invalidate(namespace, everything=True)
+    return {"status": "cleared", "namespace": namespace}
+
+
+@admin_router.get("/compression")
+def compression_report():
+    return {
+        "enabled": COMPRESSION_ENABLED,
+        "available_encodings": available_encodings(COMPRESSION_ENCODINGS),
+        "min_bytes": COMPRESSION_MIN_BYTES,
+        **compression_stats.snapshot(),
+        "cache_store": compression_cache.stats(),
+    }
+
+
+@admin_router.delete("/compression/cache")
+def compression_cache_clear():
+    compression_cache.clear()
+    return {"status": "cleared"}
+
+
+app.include_router(admin_router)
 
 
 # Plugin management endpoints
@@ -57,14 +222,14 @@ plugins_router = APIRouter(prefix="/plugins", tags=["plugins"])
 def list_plugins():
     if not plugin_manager:
         raise HTTPException(status_code=503, detail="Plugin manager not initialized")
-    return [s.__dict__ for s in plugin_manager.list_states()]
+    return plugin_sync.aggregate()
 
 
 @plugins_router.post("/load/{name}")
 def load_plugin(name: str):
     if not plugin_manager:
         raise HTTPException(status_code=503, detail="Plugin manager not initialized")
-    state = plugin_manager.load(name)
+    state = plugin_sync.command(name, "load")
     return state.__dict__
 
 
@@ -72,7 +237,7 @@ def load_plugin(name: str):
 def start_plugin(name: str):
     if not plugin_manager:
         raise HTTPException(status_code=503, detail="Plugin manager not initialized")
-    state = plugin_manager.start(name)
+    state = plugin_sync.command(name, "start")
     return state.__dict__
 
 
@@ -80,7 +245,7 @@ def start_plugin(name: str):
 def stop_plugin(name: str):
     if not plugin_manager:
         raise HTTPException(status_code=503, detail="Plugin manager not initialized")
-    state = plugin_manager.stop(name)
+    state = plugin_sync.command(name, "stop")
     return state.__dict__
 
 
@@ -89,20 +254,133 @@ app.include_router(plugins_router)
 
 @app.post("/items", response_model=schemas.ItemRead)
 def create_item(item: schemas.ItemCreate, db: Session = Depends(get_db)):
-    return crud.create_item(db, item)
+    db_item = crud.create_item(db, item)
+    publish_items(plugin_manager.registry.publish, ITEMS_CREATED, "items")
+    return db_item
+
+
+@app.get("/items", response_model=Union[List[schemas.ItemRead], schemas.ItemPage])
+async def read_items(
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    sort: Literal["id", "created_at"] = "id",
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    # Offset mode (plain list) unless a cursor is given; pass `after=` (empty) for the first cursor page
+    columns = item_rows.columns(models.Item) if fast_json else None
+    if after is None:
+        items = await crud.get_items_async(db, skip, limit, columns=columns)
+        return item_rows.response(items) if fast_json else items
+    try:
+        cursor = decode_cursor(after, sort)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    items, next_cursor = await crud.get_items_page_async(db, cursor, limit, sort, columns=columns)
+    if fast_json:
+        return FastJSONResponse({"items": item_rows.rows(items), "next_cursor": next_cursor})
+    return {"items": items, "next_cursor": next_cursor}
 
 
-@app.get("/items", response_model=List[schemas.ItemRead])
-def read_items(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_items(db, skip, limit)
+@app.get("/items/search", response_model=schemas.ItemSearchPage)
+def search_items_endpoint(
+    q: str = Query(..., min_length=1, max_length=200),
+    mode: Literal["fulltext", "prefix", "substring"] = "fulltext",
+    limit: int = Query(20, ge=1, le=100),
+    after: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    try:
+        hits, next_cursor = search_items(db, models.Item, q, mode, after, limit)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    items = [{**schemas.ItemRead.model_validate(obj).model_dump(), "rank": rank} for obj, rank in hits]
+    return {"items": items, "next_cursor": next_cursor}
 
 
-@app.get("/items/{item_id}", response_model=schemas.ItemRead)
-def read_item(item_id: int, db: Session = Depends(get_db)):
+@app.get("/items/export")
+def export_items(fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format")):
+    # Streams from its own server-side cursor; memory does not grow with the table
+    return StreamingResponse(
+        export_rows(read_engine(), models.Item, item_rows, fmt, TRANSFER_BATCH_SIZE),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="items.{fmt}"'},
+    )
+
+
+@app.post("/items/import")
+async def import_items(request: Request, fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format")):
+    def created(count: int) -> None:
+        publish_items(plugin_manager.registry.publish, ITEMS_CREATED, "items", count)
+
+    events = import_rows(
+        request.stream(), fmt, SessionLocal, models.Item, schemas.ItemCreate, TRANSFER_BATCH_SIZE, on_batch=created
+    )
+    return ImportResponse(events)
+
+
+# Bulk bodies are size-checked while they are read, before they are parsed
+bulk_rows = bulk.json_array_body(BULK_MAX_BYTES)
+
+
+# Search, transfer and bulk routes are declared before /items/{item_id} so "bulk" is not parsed as an id
+@app.post("/items/bulk", response_model=schemas.BulkResult)
+def create_items_bulk(rows: List[Any] = Depends(bulk_rows), atomic: bool = False, db: Session = Depends(get_db)):
+    bulk.ensure_batch_size(rows, BULK_MAX_ITEMS)
+    result = bulk.bulk_create(
+        db, models.Item, schemas.ItemCreate, rows, copy_threshold=BULK_COPY_THRESHOLD, atomic=atomic
+    )
+    publish_items(plugin_manager.registry.publish, ITEMS_CREATED, "items", result["succeeded"])
+    return result
+
+
+@app.patch("/items/bulk", response_model=schemas.BulkResult)
+def update_items_bulk(rows: List[Any] = Depends(bulk_rows), atomic: bool = False, db: Session = Depends(get_db)):
+    bulk.ensure_batch_size(rows, BULK_MAX_ITEMS)
+    result = bulk.bulk_update(db, models.Item, schemas.ItemBulkUpdate, rows, atomic=atomic)
+    _invalidate_items(r["id"] for r in result["results"] if r["status"] == "updated")
+    return result
+
+
+@app.delete("/items/bulk", response_model=schemas.BulkResult)
+def delete_items_bulk(ids: List[Any] = Depends(bulk_rows), atomic: bool = False, db: Session = Depends(get_db)):
+    bulk.ensure_batch_size(ids, BULK_MAX_ITEMS)
+    result = bulk.bulk_delete(db, models.Item, ids, atomic=atomic)
+    _invalidate_items(r["id"] for r in result["results"] if r["status"] == "deleted")
+    publish_items(plugin_manager.registry.publish, ITEMS_DELETED, "items", result["succeeded"], result.get("days"))
+    return result
+
+
+def _invalidate_items(ids) -> None:
+    cache_service.invalidate("items", keys=list(ids))
+
+
+def _load_item(db: Session, item_id: int) -> Optional[dict]:
     db_item = crud.get_item(db, item_id)
-    if not db_item:
+    return schemas.ItemRead.model_validate(db_item).model_dump() if db_item else None
+
+
+def _load_primary_item(item_id: int) -> Optional[dict]:
+    with SessionLocal() as db:
+        return _load_item(db, item_id)
+
+
+@app.get("/items/{item_id}", response_model=schemas.ItemRead)
+def read_item(item_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    if prefer_primary.get():
+        # Pinned after a write: read the primary directly, not a cached copy
+        item = _load_item(db, item_id)
+    else:
+        # Read-through cache of the response data; writes below invalidate it on every worker.
+        # Misses load from the primary, so a lagging replica cannot refill it with a pre-write row.
+        item = item_cache.get_or_load(item_id, lambda: _load_primary_item(item_id))
+    if item is None:
         raise HTTPException(status_code=404, detail="Item not found")
-    return db_item
+    # 304 before serialization when the client's ETag/Last-Modified is current
+    modified = item["updated_at"] or item["created_at"]
+    validators = Validators.for_version("items", item_id, modified, modified=modified)
+    not_modified = conditional_get(request, response, validators, "items")
+    return not_modified if not_modified is not None else item
 
 
 @app.put("/items/{item_id}", response_model=schemas.ItemRead)
@@ -110,12 +388,15 @@ def update_item(item_id: int, item: schemas.ItemUpdate, db: Session = Depends(ge
     db_item = crud.update_item(db, item_id, item)
     if not db_item:
         raise HTTPException(status_code=404, detail="Item not found")
+    _invalidate_items([item_id])
     return db_item
 
 
 @app.delete("/items/{item_id}")
 def delete_item(item_id: int, db: Session = Depends(get_db)):
-    ok = crud.delete_item(db, item_id)
-    if not ok:
+    deleted = crud.delete_item(db, item_id)
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Item not found")
+    publish_items(plugin_manager.registry.publish, ITEMS_DELETED, "items", days=creation_days([deleted.created_at]))
+    _invalidate_items([item_id])
     return {"status": "deleted"}
\ No newline at end of file
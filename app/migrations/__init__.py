@@ -0,0 +1,24 @@
+"""Versioned schema migrations with one chain for the core and one per plugin.
+
+A chain is an ordered list of `Migration`s. `migrate()` compares the head of
+every chain with the versions recorded in `schema_migrations` using a single
+query; only when something is pending does it take a cluster-wide lock
+(Postgres advisory lock) and apply the missing steps.
+"""
+from __future__ import annotations
+
+from .base import Migration, add_column, create_index, create_tables, index_migration, run_sql
+from .runner import MigrationError, migrate, pending_migrations
+
+
+__all__ = [
+    "Migration",
+    "MigrationError",
+    "add_column",
+    "create_index",
+    "create_tables",
+    "index_migration",
+    "migrate",
+    "pending_migrations",
+    "run_sql",
+]
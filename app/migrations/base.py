@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Mapping, Sequence
+
+from sqlalchemy import Table, inspect, text
+from sqlalchemy.engine import Connection
+
+
+@dataclass(frozen=True)
+class Migration:
+    """One step of a migration chain.
+
+    `upgrade` receives a connection. Transactional migrations run inside the
+    same transaction that records the new version; non-transactional ones
+    (e.g. `CREATE INDEX CONCURRENTLY`) get an autocommit connection and must
+    be idempotent, since a crash can leave them applied but unrecorded.
+    """
+
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+    transactional: bool = True
+
+
+def create_tables(*tables: Table) -> Callable[[Connection], None]:
+    """Create tables that do not exist yet (baseline for databases made by create_all)."""
+
+    def upgrade(conn: Connection) -> None:
+        for table in tables:
+            table.create(bind=conn, checkfirst=True)
+
+    return upgrade
+
+
+def run_sql(*statements: str, dialects: Sequence[str] | None = None) -> Callable[[Connection], None]:
+    """Execute raw SQL statements, optionally only on the given dialects."""
+
+    def upgrade(conn: Connection) -> None:
+        if dialects is not None and conn.dialect.name not in dialects:
+            return
+        for stmt in statements:
+            conn.execute(text(stmt))
+
+    return upgrade
+
+
+def add_column(
+    table: str,
+    name: str,
+    ddl: str | Mapping[str, str],
+    *,
+    backfill: str | None = None,
+    default: str | Mapping[str, str] | None = None,
+) -> Callable[[Connection], None]:
+    """Add a column unless it exists (baselines create tables from the current models).
+
+    `ddl` is the column type and constraints, or a mapping of dialect name to
+    them with `"*"` as the fallback. `backfill` is an optional SQL expression
+    assigned to rows where the new column is NULL. `default` (SQL, or a mapping
+    by dialect; dialects without an entry are skipped, as SQLite cannot alter a
+    default) is set only after the backfill, so existing rows get the backfill
+    value rather than the time of the migration.
+    """
+
+    def upgrade(conn: Connection) -> None:
+        if name in {c["name"] for c in inspect(conn).get_columns(table)}:
+            return
+        spec = ddl if isinstance(ddl, str) else ddl.get(conn.dialect.name, ddl["*"])
+        conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN "{name}" {spec}'))
+        if backfill:
+            conn.execute(text(f'UPDATE "{table}" SET "{name}" = {backfill} WHERE "{name}" IS NULL'))
+        value = default
+        if value is not None and not isinstance(value, str):
+            value = value.get(conn.dialect.name, value.get("*"))
+        if value is not None:
+            conn.execute(text(f'ALTER TABLE "{table}" ALTER COLUMN "{name}" SET DEFAULT {value}'))
+
+    return upgrade
+
+
+def _partitions(conn: Connection, table: str) -> list[str] | None:
+    """Names of a partitioned Postgres table's partitions; None for a plain table."""
+    partitioned = conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = CAST(:t AS regclass)"), {"t": table}
+    ).first()
+    if not partitioned:
+        return None
+    return list(
+        conn.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = CAST(:t AS regclass) ORDER BY c.relname"
+            ),
+            {"t": table},
+        ).scalars()
+    )
+
+
+def _partition_index_name(name: str, table: str, partition: str) -> str:
+    """Index name on one partition, e.g. ix_metrics_at -> ix_metrics_p202406_at."""
+    child = name.replace(table, partition, 1) if table in name else f"{name}_{partition}"
+    return child[:63]
+
+
+def create_index(
+    name: str,
+    table: str,
+    columns: str,
+    *,
+    unique: bool = False,
+    using: str | None = None,
+    where: str | None = None,
+    dialects: Sequence[str] | None = None,
+) -> Callable[[Connection], None]:
+    """Upgrade callable creating an index; use it in a non-transactional migration.
+
+    On Postgres the index is built `CONCURRENTLY`, so writes to the table are
+    not blocked; an invalid index left by an interrupted build is dropped and
+    rebuilt. A partitioned table cannot be indexed concurrently, so each
+    partition gets its own concurrent build (see `_partition_index_name`), and
+    the parent index is created `ON ONLY` the table and has them attached;
+    partitions created later inherit it. Other backends get a plain
+    `CREATE INDEX IF NOT EXISTS`.
+    `columns` is raw SQL, e.g. `"account_id, id DESC"`. With `dialects`, other
+    backends skip the index (e.g. GIN/trigram expressions that only exist on Postgres).
+    """
+
+    def statement(index: str, target: str, is_pg: bool, concurrently: bool) -> str:
+        parts = [
+            "CREATE",
+            "UNIQUE" if unique else "",
+            "INDEX",
+            "CONCURRENTLY" if concurrently else "",
+            f'IF NOT EXISTS "{index}" ON {target}',
+            f"USING {using}" if using and is_pg else "",
+            f"({columns})",
+            f"WHERE {where}" if where else "",
+        ]
+        return " ".join(p for p in parts if p)
+
+    def is_valid(conn: Connection, index: str) -> bool | None:
+        return conn.execute(
+            text("SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"),
+            {"name": index},
+        ).scalar()
+
+    def build(conn: Connection, index: str, relation: str) -> None:
+        partitions = _partitions(conn, relation)
+        if partitions is None:
+            if is_valid(conn, index) is False:
+                conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index}"'))
+            conn.execute(text(statement(index, f'"{relation}"', True, True)))
+            return
+        if is_valid(conn, index):
+            return
+        children = [(_partition_index_name(index, relation, p), p) for p in partitions]
+        for child, partition in children:
+            build(conn, child, partition)
+        # Catalog-only; the parent index turns valid once every partition has one attached
+        conn.execute(text(statement(index, f'ONLY "{relation}"', True, False)))
+        for child, _ in children:
+            conn.execute(text(f'ALTER INDEX "{index}" ATTACH PARTITION "{child}"'))
+
+    def upgrade(conn: Connection) -> None:
+        if dialects is not None and conn.dialect.name not in dialects:
+            return
+        if conn.dialect.name == "postgresql":
+            build(conn, name, table)
+        else:
+            conn.execute(text(statement(name, f'"{table}"', False, False)))
+
+    return upgrade
+
+
+def index_migration(version: int, name: str, table: str, columns: str, **kwargs) -> Migration:
+    """Shorthand for a migration consisting of a single concurrent index build."""
+    return Migration(
+        version=version,
+        description=f"index {name} on {table} ({columns})",
+        upgrade=create_index(name, table, columns, **kwargs),
+        transactional=False,
+    )
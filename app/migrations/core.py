@@ -0,0 +1,35 @@
+"""Migration chain for core tables (`app/models.py`)."""
+from app import models
+from app.search import index_migrations as search_index_migrations
+
+from .base import Migration, add_column, create_tables, index_migration
+
+
+MIGRATIONS = [
+    Migration(
+        version=1,
+        description="baseline: items, plugin lifecycle state",
+        upgrade=create_tables(
+            models.Item.__table__,
+            models.PluginDesiredState.__table__,
+            models.PluginWorkerState.__table__,
+        ),
+    ),
+    # Keyset pagination ordered by (created_at, id)
+    index_migration(2, "ix_items_created_at_id", "items", "created_at, id"),
+    # GET /items/search: tsvector, trigram and prefix indexes (v3-v7)
+    *search_index_migrations("items", 3),
+    # Modification time for ETag/Last-Modified: added without a default, backfilled from created_at,
+    # then given its default (a DEFAULT in the ADD COLUMN would stamp every row with the migration time)
+    Migration(
+        version=8,
+        description="items.updated_at",
+        upgrade=add_column(
+            "items",
+            "updated_at",
+            {"postgresql": "TIMESTAMP WITH TIME ZONE", "*": "DATETIME"},
+            backfill="created_at",
+            default={"postgresql": "now()"},
+        ),
+    ),
+]
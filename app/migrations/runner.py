@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Mapping, Sequence
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+
+from .base import Migration
+
+
+logger = logging.getLogger("migrations")
+
+# Kept outside the application metadata so create_all/drop_all never touch it
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("chain", String(255), primary_key=True),
+    Column("version", Integer, nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+# Arbitrary constant identifying the migration advisory lock ("migr")
+ADVISORY_LOCK_KEY = 0x6D696772
+
+# Chains verified up to date in this process: chain -> head version
+_verified: Dict[str, int] = {}
+_local_lock = threading.Lock()
+
+
+class MigrationError(RuntimeError):
+    pass
+
+
+def _validate(chain: str, migrations: Sequence[Migration]) -> None:
+    versions = [m.version for m in migrations]
+    if versions != sorted(set(versions)) or (versions and versions[0] < 1):
+        raise MigrationError(f"Migration chain {chain!r} must have unique, increasing versions >= 1: {versions}")
+
+
+def _head(migrations: Sequence[Migration]) -> int:
+    return migrations[-1].version if migrations else 0
+
+
+def _current_versions(engine: Engine) -> Dict[str, int]:
+    try:
+        with engine.connect() as conn:
+            return {row.chain: row.version for row in conn.execute(select(schema_migrations))}
+    except DBAPIError:
+        # Fresh database: the version table does not exist yet
+        return {}
+
+
+def pending_migrations(engine: Engine, chains: Mapping[str, Sequence[Migration]]) -> Dict[str, List[Migration]]:
+    """Pending steps per chain, using one query against `schema_migrations`."""
+    current = _current_versions(engine)
+    return {
+        chain: [m for m in migrations if m.version > current.get(chain, 0)]
+        for chain, migrations in chains.items()
+        if _head(migrations) > current.get(chain, 0)
+    }
+
+
+@contextmanager
+def _cluster_lock(engine: Engine) -> Iterator[None]:
+    """Serialize migrations across processes (Postgres) and threads (everywhere)."""
+    with _local_lock:
+        if engine.dialect.name != "postgresql":
+            yield
+            return
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY})
+
+
+def _record(conn, chain: str, version: int) -> None:
+    values = {"version": version, "applied_at": datetime.now(timezone.utc)}
+    updated = conn.execute(schema_migrations.update().where(schema_migrations.c.chain == chain).values(**values))
+    if updated.rowcount == 0:
+        conn.execute(schema_migrations.insert().values(chain=chain, **values))
+
+
+def _apply(engine: Engine, chain: str, migration: Migration) -> None:
+    logger.info("Applying migration %s:%s (%s)", chain, migration.version, migration.description)
+    if migration.transactional:
+        with engine.begin() as conn:
+            migration.upgrade(conn)
+            _record(conn, chain, migration.version)
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        migration.upgrade(conn)
+    with engine.begin() as conn:
+        _record(conn, chain, migration.version)
+
+
+def migrate(engine: Engine, chains: Mapping[str, Sequence[Migration]]) -> Dict[str, int]:
+    """Bring every chain to its head version; returns the number of steps applied per chain.
+
+    Chains already verified in this process are skipped without any query.
+    """
+    todo = {c: list(m) for c, m in chains.items() if _verified.get(c) != _head(m)}
+    if not todo:
+        return {}
+    for chain, migrations in todo.items():
+        _validate(chain, migrations)
+
+    applied: Dict[str, int] = {}
+    if pending_migrations(engine, todo):
+        with _cluster_lock(engine):
+            schema_migrations.create(bind=engine, checkfirst=True)
+            # Another worker may have finished while we waited for the lock
+            for chain, steps in pending_migrations(engine, todo).items():
+                for migration in steps:
+                    try:
+                        _apply(engine, chain, migration)
+                    except Exception as exc:
+                        raise MigrationError(f"Migration {chain}:{migration.version} failed: {exc}") from exc
+                applied[chain] = len(steps)
+    for chain, migrations in todo.items():
+        _verified[chain] = _head(migrations)
+    return applied
+
+
+def reset_verified() -> None:
+    """Forget which chains were verified (tests, or after restoring a database)."""
+    _verified.clear()
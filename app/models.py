@@ -1,3 +1,5 @@
+from datetime import datetime, timezone
+
 from sqlalchemy.orm import declarative_base
 from sqlalchemy import Column, Integer, String, Text, DateTime, func
 
@@ -5,10 +7,40 @@ from sqlalchemy import Column, Integer, String, Text, DateTime, func
 Base = declarative_base()
 
 
+def utcnow() -> datetime:
+    # Client-side so that every UPDATE gets a distinct, microsecond-precision value
+    # (SQLite's CURRENT_TIMESTAMP only has whole seconds); used for ETags
+    return datetime.now(timezone.utc)
+
+
 class Item(Base):
     __tablename__ = "items"
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False, index=True)
     description = Column(Text, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=utcnow)
+
+
+class PluginDesiredState(Base):
+    """Cluster-wide lifecycle state requested through the /plugins endpoints."""
+
+    __tablename__ = "plugin_states"
+
+    name = Column(String(255), primary_key=True)
+    status = Column(String(32), nullable=False)  # loaded|started|stopped
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class PluginWorkerState(Base):
+    """Plugin state as last reported by each worker process."""
+
+    __tablename__ = "plugin_worker_states"
+
+    worker_id = Column(String(255), primary_key=True)
+    name = Column(String(255), primary_key=True)
+    version = Column(String(64), nullable=False)
+    status = Column(String(32), nullable=False)
+    error = Column(Text, nullable=True)
+    reported_at = Column(DateTime(timezone=True), nullable=False, index=True)
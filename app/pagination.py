@@ -0,0 +1,95 @@
+"""Keyset (cursor) pagination shared by the core and plugin item listings.
+
+A cursor is an opaque URL-safe token holding the sort mode and the sort key
+of the last row of the previous page. The next page is the rows strictly
+after that key in index order, so every page costs the same regardless of
+its depth (unlike OFFSET, which scans and discards every preceding row).
+"""
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, func, literal, tuple_
+
+
+SORT_KEYS = ("id", "created_at")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort: str, values: Sequence[Any]) -> str:
+    key = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps({"s": sort, "k": key}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_key(cursor: str, sort: str) -> List[Any]:
+    """Raw key values of a cursor issued for `sort` (no per-sort type conversion)."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if data["s"] != sort:
+            raise InvalidCursor(f"cursor was issued for sort={data['s']!r}")
+        if not isinstance(data["k"], list):
+            raise InvalidCursor("malformed cursor")
+        return data["k"]
+    except InvalidCursor:
+        raise
+    except (ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor("malformed cursor") from exc
+
+
+def decode_cursor(cursor: str, sort: str) -> Optional[Tuple[Any, ...]]:
+    """Decode a cursor for `sort`; an empty cursor means "from the start"."""
+    if not cursor:
+        return None
+    key = decode_key(cursor, sort)
+    try:
+        if sort == "created_at":
+            created_at, row_id = key
+            return datetime.fromisoformat(created_at), int(row_id)
+        (row_id,) = key
+        return (int(row_id),)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("malformed cursor") from exc
+
+
+def _sort_columns(model, sort: str):
+    if sort not in SORT_KEYS:
+        raise InvalidCursor(f"sort must be one of {SORT_KEYS}")
+    return (model.created_at, model.id) if sort == "created_at" else (model.id,)
+
+
+def keyset_select(
+    stmt: Select, model, sort: str, after: Optional[Tuple[Any, ...]], limit: int, dialect: str = "postgresql"
+) -> Select:
+    """Restrict `stmt` to the page after `after`, fetching one extra row to detect the next page."""
+    columns = _sort_columns(model, sort)
+    if after is not None:
+        if len(columns) == 1:
+            stmt = stmt.where(columns[0] > after[0])
+        elif dialect == "sqlite":
+            # SQLite keeps timestamps as text in two formats (server default without
+            # fractional seconds, bound values with); normalize both sides
+            created_at, row_id = columns
+            stmt = stmt.where(
+                tuple_(func.datetime(created_at), row_id)
+                > tuple_(func.datetime(literal(after[0], created_at.type)), after[1])
+            )
+        else:
+            stmt = stmt.where(tuple_(*columns) > tuple_(*after))
+    return stmt.order_by(*columns).limit(limit + 1)
+
+
+def split_page(rows: List[Any], sort: str, limit: int) -> Tuple[List[Any], Optional[str]]:
+    """Trim the extra row and build the cursor for the next page (None on the last page)."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    values = (last.created_at, last.id) if sort == "created_at" else (last.id,)
+    return rows, encode_cursor(sort, values)
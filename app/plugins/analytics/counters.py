@@ -0,0 +1,228 @@
+"""Incrementally maintained row counters and per-day creation histograms.
+
+A histogram bucket is the number of rows created that day that still exist:
+creations add to their day and deletes subtract from the creation days they
+carry, so the maintained buckets match what `recount` rebuilds from the table.
+
+Item writes publish ITEMS_CREATED/ITEMS_DELETED on the registry event bus
+(see `app.events`). Deltas are buffered in memory and flushed periodically as
+atomic `value = value + n` increments, so every worker's writes land in the
+same rows without a hot-row update per request. Reads are single primary-key
+lookups plus this worker's unflushed deltas; `recount` rebuilds a counter and
+its histogram from the table itself when drift is suspected.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import column, delete, func, inspect, select, table, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .models import AnalyticsCounter, AnalyticsDailyCount
+
+
+logger = logging.getLogger("analytics.counters")
+
+# Tables whose counters may be (re)built from the table itself
+TRACKED_TABLES = ("items", "plugin_items")
+
+_RELTUPLES_SQL = text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)")
+
+
+def _upsert(dialect: str):
+    return sqlite.insert if dialect == "sqlite" else postgresql.insert
+
+
+def _as_date(value: Any) -> date:
+    # SQLite returns date() results as text
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+class ItemCounters:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        flush_interval: float = 1.0,
+        tracked: Iterable[str] = TRACKED_TABLES,
+    ) -> None:
+        self._session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.tracked = tuple(tracked)
+        self._pending: Dict[str, int] = defaultdict(int)
+        self._pending_days: Dict[Tuple[str, date], int] = defaultdict(int)
+        self._lock = threading.Lock()
+        # Serializes flush and recount so a recount never races a half-applied flush
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # Event bus handlers
+    def on_created(self, payload: Dict[str, Any]) -> None:
+        at = payload.get("at") or datetime.now(timezone.utc)
+        self.add(payload["table"], payload.get("count", 1), at.astimezone(timezone.utc).date())
+
+    def on_deleted(self, payload: Dict[str, Any]) -> None:
+        self.add(payload["table"], -payload.get("count", 1))
+        for day, n in (payload.get("days") or {}).items():
+            self.add_day(payload["table"], day, -n)
+
+    def add(self, name: str, delta: int, day: Optional[date] = None) -> None:
+        with self._lock:
+            self._pending[name] += delta
+            if day is not None:
+                self._pending_days[(name, day)] += delta
+
+    def add_day(self, name: str, day: date, delta: int) -> None:
+        """Adjust one histogram bucket only (the counter itself is left alone)."""
+        with self._lock:
+            self._pending_days[(name, day)] += delta
+
+    def flush(self) -> None:
+        """Write buffered deltas; on failure they are put back for the next attempt."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, defaultdict(int)
+                days, self._pending_days = self._pending_days, defaultdict(int)
+            pending = {k: v for k, v in pending.items() if v}
+            if not pending and not days:
+                return
+            try:
+                with self._session_factory() as db:
+                    self._apply(db, pending, days)
+                    db.commit()
+            except Exception:
+                logger.exception("Flushing analytics counters failed; keeping deltas")
+                with self._lock:
+                    for name, delta in pending.items():
+                        self._pending[name] += delta
+                    for key, delta in days.items():
+                        self._pending_days[key] += delta
+
+    def _apply(self, db: Session, pending: Dict[str, int], days: Dict[Tuple[str, date], int]) -> None:
+        for name, delta in pending.items():
+            # Counters that were never initialized are left to recount
+            db.execute(
+                update(AnalyticsCounter)
+                .where(AnalyticsCounter.name == name)
+                .values(value=AnalyticsCounter.value + delta)
+                .execution_options(synchronize_session=False)
+            )
+        if days:
+            stmt = _upsert(db.get_bind().dialect.name)(AnalyticsDailyCount)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["name", "day"], set_={"value": AnalyticsDailyCount.value + stmt.excluded.value}
+            )
+            db.execute(stmt, [{"name": name, "day": day, "value": value} for (name, day), value in days.items()])
+
+    # Reads
+    def get(self, name: str) -> Optional[int]:
+        """Current count for `name`, or None if it is not tracked (or its table does not exist)."""
+        with self._session_factory() as db:
+            value = db.scalar(select(AnalyticsCounter.value).where(AnalyticsCounter.name == name))
+        if value is None:
+            if not self.recount([name]):
+                return None
+            return self.get(name)
+        with self._lock:
+            return value + self._pending.get(name, 0)
+
+    def all(self) -> Dict[str, int]:
+        with self._session_factory() as db:
+            stored = dict(db.execute(select(AnalyticsCounter.name, AnalyticsCounter.value)).all())
+        with self._lock:
+            return {name: value + self._pending.get(name, 0) for name, value in stored.items()}
+
+    def approximate(self, name: str) -> Optional[int]:
+        """Planner estimate from `pg_class.reltuples` (Postgres only; None if unknown)."""
+        if name not in self.tracked:
+            return None
+        with self._session_factory() as db:
+            if db.get_bind().dialect.name != "postgresql":
+                return None
+            estimate = db.scalar(_RELTUPLES_SQL, {"name": name})
+        # -1 means the table was never vacuumed/analyzed
+        return estimate if estimate is not None and estimate >= 0 else None
+
+    def timeseries(self, name: str, start: date, end: date) -> List[Dict[str, Any]]:
+        """Rows per creation day in [start, end] that still exist, including days with none."""
+        with self._session_factory() as db:
+            rows = db.execute(
+                select(AnalyticsDailyCount.day, AnalyticsDailyCount.value).where(
+                    AnalyticsDailyCount.name == name,
+                    AnalyticsDailyCount.day >= start,
+                    AnalyticsDailyCount.day <= end,
+                )
+            ).all()
+        counts = {day: value for day, value in rows}
+        with self._lock:
+            for (pending_name, day), delta in self._pending_days.items():
+                if pending_name == name and start <= day <= end:
+                    counts[day] = counts.get(day, 0) + delta
+        return [
+            {"day": start + timedelta(days=i), "count": counts.get(start + timedelta(days=i), 0)}
+            for i in range((end - start).days + 1)
+        ]
+
+    # Reconciliation
+    def recount(self, names: Optional[Iterable[str]] = None) -> List[str]:
+        """Rebuild counters and histograms from the tables; returns the names rebuilt."""
+        self.flush()
+        rebuilt = []
+        with self._flush_lock, self._session_factory() as db:
+            inspector = inspect(db.get_bind())
+            for name in names or self.tracked:
+                if name not in self.tracked or not inspector.has_table(name):
+                    continue
+                self._rebuild(db, name)
+                rebuilt.append(name)
+            db.commit()
+        return rebuilt
+
+    def _rebuild(self, db: Session, name: str) -> None:
+        dialect = db.get_bind().dialect.name
+        source = table(name, column("created_at"))
+        created = source.c.created_at
+        day = func.date(created) if dialect == "sqlite" else func.date(func.timezone("UTC", created))
+        total = db.scalar(select(func.count()).select_from(source))
+        histogram = db.execute(select(day, func.count()).select_from(source).group_by(day)).all()
+
+        stmt = _upsert(dialect)(AnalyticsCounter).values(name=name, value=total)
+        db.execute(stmt.on_conflict_do_update(index_elements=["name"], set_={"value": total}))
+        db.execute(delete(AnalyticsDailyCount).where(AnalyticsDailyCount.name == name))
+        if histogram:
+            db.execute(
+                AnalyticsDailyCount.__table__.insert(),
+                [{"name": name, "day": _as_date(d), "value": n} for d, n in histogram if d is not None],
+            )
+
+    def ensure_initialized(self) -> None:
+        """Build counters for tracked tables that do not have one yet."""
+        with self._session_factory() as db:
+            existing = set(db.scalars(select(AnalyticsCounter.name)))
+        missing = [name for name in self.tracked if name not in existing]
+        if missing:
+            self.recount(missing)
+
+    # Background flushing
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="analytics-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 1)
+            self._thread = None
+        self.flush()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
@@ -0,0 +1,12 @@
+from app.migrations import Migration, create_tables
+
+from .models import AnalyticsCounter, AnalyticsDailyCount
+
+
+MIGRATIONS = [
+    Migration(
+        version=1,
+        description="baseline: analytics_counters, analytics_daily_counts",
+        upgrade=create_tables(AnalyticsCounter.__table__, AnalyticsDailyCount.__table__),
+    ),
+]
@@ -0,0 +1,23 @@
+from sqlalchemy import BigInteger, Column, Date, DateTime, String, func
+
+from app.models import Base
+
+
+class AnalyticsCounter(Base):
+    """Maintained row count per tracked table."""
+
+    __tablename__ = "analytics_counters"
+
+    name = Column(String(64), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class AnalyticsDailyCount(Base):
+    """Rows created per UTC day per tracked table."""
+
+    __tablename__ = "analytics_daily_counts"
+
+    name = Column(String(64), primary_key=True)
+    day = Column(Date, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
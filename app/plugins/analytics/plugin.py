@@ -1,31 +1,45 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter
 
+from app.config import ANALYTICS__FLUSH_SECONDS
 from app.core.interfaces import ModuleInterface, ServiceRegistry
-from app import models
+from app.db import SessionLocal
+from app.events import ITEMS_CREATED, ITEMS_DELETED
+
+from .counters import ItemCounters
+from .routes import build_router
 
 
 class Plugin(ModuleInterface):
     name = "analytics"
-    version = "1.0.0"
+    version = "1.1.0"
 
     def __init__(self) -> None:
-        self._db_dep = None
         self.router = APIRouter()
+        self.counters: ItemCounters | None = None
 
     def init(self, app, registry: ServiceRegistry) -> None:
-        self._db_dep = registry.get_service("db_session_dep")
+        from . import models  # noqa: F401
 
-        @self.router.get("/count")
-        def count_items(db: Session = Depends(self._db_dep)):
-            # Count items from the items table
-            return {"items_count": db.query(models.Item).count()}
+        # Counts are maintained from write events instead of COUNT(*) per request
+        self.counters = ItemCounters(SessionLocal, flush_interval=ANALYTICS__FLUSH_SECONDS)
+        registry.subscribe(ITEMS_CREATED, self.counters.on_created)
+        registry.subscribe(ITEMS_DELETED, self.counters.on_deleted)
+        self.router = build_router(self.counters)
 
     def start(self) -> None:
-        pass
+        self.counters.ensure_initialized()
+        self.counters.start()
 
     def stop(self) -> None:
-        pass
+        self.counters.stop()
 
     def get_router(self) -> APIRouter:
-        return self.router
\ No newline at end of file
+        return self.router
+
+    def provides(self):
+        return {"analytics.counters": self.counters}
+
+    def migrations(self):
+        from .migrations import MIGRATIONS
+
+        return MIGRATIONS
@@ -0,0 +1,62 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.config import ANALYTICS__APPROXIMATE_COUNTS
+
+from .counters import ItemCounters
+
+
+MAX_TIMESERIES_DAYS = 366
+
+
+def build_router(counters: ItemCounters) -> APIRouter:
+    router = APIRouter()
+
+    def _count(name: str, approximate: bool):
+        value = counters.approximate(name) if approximate else None
+        if value is not None:
+            return value, True
+        # No estimate available (or not requested): maintained counter
+        return counters.get(name), False
+
+    @router.get("/count")
+    def count_items(approximate: bool = ANALYTICS__APPROXIMATE_COUNTS):
+        value, approx = _count("items", approximate)
+        return {"items_count": value or 0, "approximate": approx}
+
+    @router.get("/counts")
+    def counts(approximate: bool = ANALYTICS__APPROXIMATE_COUNTS):
+        if not approximate:
+            return {"counts": counters.all(), "approximate": False}
+        result = {}
+        for name in counters.tracked:
+            value, approx = _count(name, True)
+            if value is not None:
+                result[name] = {"count": value, "approximate": approx}
+        return {"counts": result, "approximate": True}
+
+    @router.get("/timeseries")
+    def timeseries(
+        name: str = "items",
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        days: int = Query(30, ge=1, le=MAX_TIMESERIES_DAYS),
+    ):
+        if name not in counters.tracked:
+            raise HTTPException(status_code=404, detail=f"Unknown counter: {name}")
+        end = end or datetime.now(timezone.utc).date()
+        start = start or end - timedelta(days=days - 1)
+        if start > end or (end - start).days >= MAX_TIMESERIES_DAYS:
+            raise HTTPException(status_code=400, detail=f"Range must be 1..{MAX_TIMESERIES_DAYS} days")
+        return {"name": name, "interval": "day", "buckets": counters.timeseries(name, start, end)}
+
+    @router.post("/recount")
+    def recount(name: Optional[str] = None):
+        if name is not None and name not in counters.tracked:
+            raise HTTPException(status_code=404, detail=f"Unknown counter: {name}")
+        rebuilt = counters.recount([name] if name else None)
+        return {"recounted": rebuilt, "counts": counters.all()}
+
+    return router
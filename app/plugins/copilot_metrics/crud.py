@@ -1,5 +1,9 @@
-from typing import List, Optional
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .models import GithubAccount, CopilotMetrics
@@ -15,7 +19,9 @@ def create_or_update_account(
     token_ciphertext: str,
     token_nonce: str,
     token_salt: str,
+    proxy: str | None = None,
 ) -> GithubAccount:
+    # `proxy` None keeps the account's stored proxy on re-import
     acc = db.query(GithubAccount).filter(GithubAccount.github_user_id == github_user_id).first()
     if acc:
         acc.login = login
@@ -24,6 +30,8 @@ def create_or_update_account(
         acc.token_ciphertext = token_ciphertext
         acc.token_nonce = token_nonce
         acc.token_salt = token_salt
+        if proxy is not None:
+            acc.proxy = proxy
     else:
         acc = GithubAccount(
             login=login,
@@ -33,6 +41,7 @@ def create_or_update_account(
             token_ciphertext=token_ciphertext,
             token_nonce=token_nonce,
             token_salt=token_salt,
+            proxy=proxy,
         )
         db.add(acc)
     db.commit()
@@ -40,14 +49,80 @@ def create_or_update_account(
     return acc
 
 
-def list_accounts(db: Session) -> List[GithubAccount]:
-    return db.query(GithubAccount).order_by(GithubAccount.id.desc()).all()
+def list_accounts(
+    db: Session, columns: Optional[Sequence[Any]] = None, ids: Optional[Iterable[int]] = None
+) -> List[GithubAccount]:
+    """All accounts (or those in `ids`), newest first; with `columns`, plain rows instead of ORM objects."""
+    stmt = select(*columns) if columns is not None else select(GithubAccount)
+    if ids is not None:
+        stmt = stmt.where(GithubAccount.id.in_(list(ids)))
+    stmt = stmt.order_by(GithubAccount.id.desc())
+    if columns is not None:
+        return list(db.execute(stmt))
+    return list(db.scalars(stmt))
+
+
+# "Latest" means newest fetched_at, then highest id, everywhere (LATEST_ORDER). `since` is
+# compared to fetched_at directly (never through a function or a cast), so on a partitioned
+# copilot_metrics Postgres skips the months before it at plan time. Without `since`, the
+# latest snapshot of several accounts reads every partition: any month may hold one.
+LATEST_ORDER = (CopilotMetrics.fetched_at.desc(), CopilotMetrics.id.desc())
+
+
+def _latest_ids(
+    ids: Optional[Iterable[int]] = None, since: Optional[datetime] = None, up_to_id: Optional[int] = None
+):
+    # Newest snapshot id per account, ranked along ix_copilot_metrics_account_id_fetched_at
+    rank = func.row_number().over(partition_by=CopilotMetrics.account_id, order_by=LATEST_ORDER)
+    stmt = select(CopilotMetrics.account_id, CopilotMetrics.id.label("metrics_id"), rank.label("rank"))
+    if ids is not None:
+        stmt = stmt.where(CopilotMetrics.account_id.in_(list(ids)))
+    if since is not None:
+        stmt = stmt.where(CopilotMetrics.fetched_at >= since)
+    if up_to_id is not None:
+        stmt = stmt.where(CopilotMetrics.id <= up_to_id)
+    ranked = stmt.subquery("ranked")
+    return select(ranked.c.account_id, ranked.c.metrics_id).where(ranked.c.rank == 1).subquery("latest")
+
+
+def _join_latest(stmt, latest, since: Optional[datetime], outer: bool = False):
+    # Repeat the range on the joined side: the subquery's predicate does not prune the outer scan
+    on = CopilotMetrics.id == latest.c.metrics_id
+    if since is not None:
+        on = on & (CopilotMetrics.fetched_at >= since)
+    return stmt.outerjoin(CopilotMetrics, on) if outer else stmt.join(latest, on)
+
+
+def list_accounts_with_latest(
+    db: Session, ids: Optional[Iterable[int]] = None, since: Optional[datetime] = None
+) -> List[Tuple[GithubAccount, Optional[CopilotMetrics]]]:
+    """(account, latest snapshot or None) pairs, newest account first, in one query.
+
+    With `since`, only snapshots fetched at or after it count as the latest.
+    """
+    ids = list(ids) if ids is not None else None
+    latest = _latest_ids(ids, since)
+    stmt = select(GithubAccount, CopilotMetrics).outerjoin(latest, latest.c.account_id == GithubAccount.id)
+    stmt = _join_latest(stmt, latest, since, outer=True).order_by(GithubAccount.id.desc())
+    if ids is not None:
+        stmt = stmt.where(GithubAccount.id.in_(ids))
+    return [(acc, m) for acc, m in db.execute(stmt)]
 
 
 def get_account(db: Session, account_id: int) -> Optional[GithubAccount]:
     return db.query(GithubAccount).filter(GithubAccount.id == account_id).first()
 
 
+def set_account_proxy(db: Session, account_id: int, proxy: Optional[str]) -> Optional[GithubAccount]:
+    acc = get_account(db, account_id)
+    if acc is None:
+        return None
+    acc.proxy = proxy
+    db.commit()
+    db.refresh(acc)
+    return acc
+
+
 def save_metrics(db: Session, account_id: int, payload_json: str) -> CopilotMetrics:
     m = CopilotMetrics(account_id=account_id, payload=payload_json)
     db.add(m)
@@ -56,21 +131,88 @@ def save_metrics(db: Session, account_id: int, payload_json: str) -> CopilotMetr
     return m
 
 
-def latest_metrics_for_account(db: Session, account_id: int) -> Optional[CopilotMetrics]:
-    return (
-        db.query(CopilotMetrics)
-        .filter(CopilotMetrics.account_id == account_id)
-        .order_by(CopilotMetrics.id.desc())
-        .first()
-    )
+def latest_metrics_for_account(
+    db: Session, account_id: int, since: Optional[datetime] = None
+) -> Optional[CopilotMetrics]:
+    # Ordered by the partition key first: partitions are scanned newest month first and
+    # the scan stops at the first row (ix_copilot_metrics_account_id_fetched_at)
+    q = db.query(CopilotMetrics).filter(CopilotMetrics.account_id == account_id)
+    if since is not None:
+        q = q.filter(CopilotMetrics.fetched_at >= since)
+    return q.order_by(*LATEST_ORDER).first()
 
 
-def latest_metrics_all(db: Session) -> List[CopilotMetrics]:
-    # Simple approach: latest per account by max(id)
-    # Depending on DB, we could do window func; here fetch latest by grouping in Python
-    all_metrics = db.query(CopilotMetrics).order_by(CopilotMetrics.account_id, CopilotMetrics.id.desc()).all()
-    latest_by_account = {}
-    for m in all_metrics:
-        if m.account_id not in latest_by_account:
-            latest_by_account[m.account_id] = m
-    return list(latest_by_account.values())
\ No newline at end of file
+def latest_metrics_all(
+    db: Session, ids: Optional[Iterable[int]] = None, since: Optional[datetime] = None
+) -> List[CopilotMetrics]:
+    """Latest snapshot of every account (or of the accounts in `ids`), by account id."""
+    latest = _latest_ids(ids, since)
+    stmt = _join_latest(select(CopilotMetrics), latest, since).order_by(CopilotMetrics.account_id)
+    return list(db.scalars(stmt))
+
+
+def metrics_history(
+    db: Session,
+    account_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 100,
+) -> List[CopilotMetrics]:
+    """An account's snapshots with start <= fetched_at < end, newest first."""
+    stmt = select(CopilotMetrics).where(CopilotMetrics.account_id == account_id)
+    if start is not None:
+        stmt = stmt.where(CopilotMetrics.fetched_at >= start)
+    if end is not None:
+        stmt = stmt.where(CopilotMetrics.fetched_at < end)
+    stmt = stmt.order_by(*LATEST_ORDER).limit(limit)
+    return list(db.scalars(stmt))
+
+
+def metrics_after(
+    db: Session, after_id: int, ids: Optional[Iterable[int]] = None, limit: int = 1000
+) -> Tuple[List[CopilotMetrics], Dict[int, Any]]:
+    """Snapshots with id > `after_id` (oldest first, at most `limit`), and the decoded payload
+    each of their accounts had up to `after_id`, to tell which ones changed quotas."""
+    ids = list(ids) if ids is not None else None
+    stmt = select(CopilotMetrics).where(CopilotMetrics.id > after_id)
+    if ids is not None:
+        stmt = stmt.where(CopilotMetrics.account_id.in_(ids))
+    rows = list(db.scalars(stmt.order_by(CopilotMetrics.id).limit(limit)))
+    accounts = sorted({m.account_id for m in rows})
+    previous: Dict[int, Any] = {}
+    if accounts:
+        latest = _latest_ids(accounts, up_to_id=after_id)
+        for m in db.scalars(select(CopilotMetrics).join(latest, CopilotMetrics.id == latest.c.metrics_id)):
+            previous[m.account_id] = json.loads(m.payload)
+    return rows, previous
+
+
+# Async equivalents of the read paths (AsyncSession from "async_db_session_dep")
+async def list_accounts_async(db: AsyncSession) -> List[GithubAccount]:
+    result = await db.execute(select(GithubAccount).order_by(GithubAccount.id.desc()))
+    return list(result.scalars().all())
+
+
+async def get_account_async(db: AsyncSession, account_id: int) -> Optional[GithubAccount]:
+    result = await db.execute(select(GithubAccount).where(GithubAccount.id == account_id))
+    return result.scalars().first()
+
+
+async def latest_metrics_for_account_async(
+    db: AsyncSession, account_id: int, since: Optional[datetime] = None
+) -> Optional[CopilotMetrics]:
+    stmt = select(CopilotMetrics).where(CopilotMetrics.account_id == account_id)
+    if since is not None:
+        stmt = stmt.where(CopilotMetrics.fetched_at >= since)
+    result = await db.execute(stmt.order_by(*LATEST_ORDER).limit(1))
+    return result.scalars().first()
+
+
+async def latest_metrics_all_async(
+    db: AsyncSession, ids: Optional[Iterable[int]] = None, since: Optional[datetime] = None
+) -> List[CopilotMetrics]:
+    latest = _latest_ids(ids, since)
+    result = await db.execute(
+        _join_latest(select(CopilotMetrics), latest, since).order_by(CopilotMetrics.account_id)
+    )
+    return list(result.scalars().all())
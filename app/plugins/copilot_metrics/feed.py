@@ -0,0 +1,250 @@
+"""Server-Sent Events feed of newly saved metrics snapshots.
+
+`CopilotMetricsService.fetch_metrics` publishes `METRICS_SAVED` with a small
+summary of the snapshot (plan, quotas, whether the quotas changed). The topic
+is relayed by the cluster bus (Postgres `LISTEN/NOTIFY`), so every worker's
+`MetricsFeed` sees snapshots saved by any worker. The payload stays well
+under the 8000-byte NOTIFY limit because it never carries the raw payload.
+
+Fan-out happens on the event loop: each event is encoded once, and each
+subscriber is only a bounded `asyncio.Queue` indexed by the account ids it
+follows. A single heartbeat task pings every subscriber. A subscriber that
+falls `queue_size` events behind is disconnected instead of buffering without
+bound; it reconnects with `Last-Event-ID` (the snapshot id) and the missed
+snapshots are replayed from the database.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from .crud import metrics_after
+from .models import CopilotMetrics
+
+
+logger = logging.getLogger(__name__)
+
+METRICS_SAVED = "copilot_metrics.saved"
+QUOTA_FIELDS = ("entitlement", "remaining", "percent_remaining", "unlimited")
+# Reconnect delay suggested to EventSource clients
+RETRY_MS = 3000
+PING = b": ping\n\n"
+
+
+def summarize_metrics(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Plan and quota fields of a serialized snapshot (`CopilotMetricsSummary`)."""
+    payload = snapshot["payload"] or {}
+    quotas = payload.get("quota_snapshots") or {}
+    return {
+        "id": snapshot["id"],
+        "fetched_at": snapshot["fetched_at"],
+        "copilot_plan": payload.get("copilot_plan"),
+        "access_type_sku": payload.get("access_type_sku"),
+        "chat_enabled": payload.get("chat_enabled"),
+        "quota_reset_date": payload.get("quota_reset_date"),
+        "quotas": {
+            kind: {f: quota[f] for f in QUOTA_FIELDS if f in quota}
+            for kind, quota in quotas.items()
+            if isinstance(quota, dict)
+        },
+    }
+
+
+def snapshot_event(m: CopilotMetrics, payload: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """`METRICS_SAVED` payload for snapshot `m`; `previous` is the account's prior payload, if any."""
+    summary = summarize_metrics({"id": m.id, "fetched_at": m.fetched_at.isoformat(), "payload": payload})
+    before = summarize_metrics({"id": None, "fetched_at": None, "payload": previous})["quotas"] if previous else None
+    return {**summary, "account_id": m.account_id, "quota_changed": before != summary["quotas"]}
+
+
+def sse_frame(event: str, data: Any, event_id: Optional[int] = None) -> bytes:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class Subscriber:
+    __slots__ = ("queue", "accounts", "quota_only", "replayed")
+
+    def __init__(self, queue_size: int, accounts: Optional[Iterable[int]], quota_only: bool) -> None:
+        # (snapshot id, frame); None ends the stream
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.accounts = frozenset(accounts) if accounts is not None else None
+        self.quota_only = quota_only
+        # Snapshot ids already sent by the Last-Event-ID replay
+        self.replayed: FrozenSet[int] = frozenset()
+
+
+class MetricsFeed:
+    def __init__(
+        self,
+        session_factory,
+        heartbeat: float = 15.0,
+        queue_size: int = 256,
+        max_subscribers: int = 10000,
+        replay_limit: int = 1000,
+    ) -> None:
+        self.session_factory = session_factory
+        self.heartbeat = heartbeat
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.replay_limit = replay_limit
+        self._subscribers: Set[Subscriber] = set()
+        # Unfiltered subscribers, and the others by followed account
+        self._all: Set[Subscriber] = set()
+        self._by_account: Dict[int, Set[Subscriber]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.published = self.dropped = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    # Producer side: any thread
+    def on_saved(self, event: Dict[str, Any]) -> None:
+        """`METRICS_SAVED` handler; hands the event to the loop that serves the streams."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._fanout, event)
+        except RuntimeError:
+            # Loop shut down between the check and the call
+            pass
+
+    def close(self) -> None:
+        """End every open stream (plugin stop); clients reconnect to another worker."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._end_all)
+        except RuntimeError:
+            pass
+
+    # Event loop side
+    def _fanout(self, event: Dict[str, Any]) -> None:
+        self.published += 1
+        targets = self._by_account.get(event.get("account_id"), set())
+        if not (targets or self._all):
+            return
+        item = (event["id"], sse_frame("snapshot", event, event["id"]))
+        for sub in (*self._all, *targets):
+            if sub.quota_only and not event.get("quota_changed"):
+                continue
+            try:
+                sub.queue.put_nowait(item)
+            except asyncio.QueueFull:
+                self._evict(sub)
+
+    def _evict(self, sub: Subscriber) -> None:
+        # Too slow to keep up: end its stream; it resumes from Last-Event-ID
+        self.dropped += 1
+        logger.info("Ending a metrics stream that fell %d events behind", self.queue_size)
+        self._end(sub)
+
+    @staticmethod
+    def _end(sub: Subscriber) -> None:
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(None)
+
+    def _end_all(self) -> None:
+        for sub in self._subscribers:
+            # Deliver what is already queued first, if there is room for the end marker
+            try:
+                sub.queue.put_nowait(None)
+            except asyncio.QueueFull:
+                self._end(sub)
+
+    async def _ping(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            for sub in self._subscribers:
+                if not sub.queue.full():
+                    sub.queue.put_nowait((0, PING))
+
+    def subscribe(self, accounts: Optional[Iterable[int]] = None, quota_only: bool = False) -> Subscriber:
+        """Register a subscriber on the running loop (call from the endpoint)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._heartbeat_task = None
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = loop.create_task(self._ping())
+        sub = Subscriber(self.queue_size, accounts, quota_only)
+        self._subscribers.add(sub)
+        if sub.accounts is None:
+            self._all.add(sub)
+        for account_id in sub.accounts or ():
+            self._by_account.setdefault(account_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self._subscribers.discard(sub)
+        self._all.discard(sub)
+        for account_id in sub.accounts or ():
+            subs = self._by_account.get(account_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._by_account[account_id]
+
+    def replay(
+        self, after_id: int, accounts: Optional[List[int]], quota_only: bool
+    ) -> Tuple[List[bytes], FrozenSet[int]]:
+        """Frames for snapshots saved after `after_id`, and the ids of the snapshots they cover.
+
+        When more than `replay_limit` were missed, a single `reset` event instead:
+        the client should reload `GET /metrics` and keep streaming.
+        """
+        db = self.session_factory()
+        try:
+            rows, previous = metrics_after(db, after_id, accounts, self.replay_limit + 1)
+        finally:
+            db.close()
+        if len(rows) > self.replay_limit:
+            return [sse_frame("reset", {"reason": "too_far_behind", "last_event_id": after_id})], frozenset()
+        frames = []
+        for m in rows:
+            payload = json.loads(m.payload)
+            event = snapshot_event(m, payload, previous.get(m.account_id))
+            previous[m.account_id] = payload
+            if not quota_only or event["quota_changed"]:
+                frames.append(sse_frame("snapshot", event, m.id))
+        return frames, frozenset(m.id for m in rows)
+
+    async def stream(
+        self,
+        accounts: Optional[Iterable[int]] = None,
+        quota_only: bool = False,
+        last_event_id: Optional[int] = None,
+    ) -> AsyncIterator[bytes]:
+        """An SSE body; subscribed while it is iterated, until the client goes away or the stream is ended."""
+        sub = self.subscribe(accounts, quota_only)
+        try:
+            yield f"retry: {RETRY_MS}\n\n".encode()
+            if last_event_id is not None:
+                # Subscribed before replaying: anything saved meanwhile is queued, and skipped below if replayed
+                accounts = sorted(sub.accounts) if sub.accounts is not None else None
+                frames, sub.replayed = await run_in_threadpool(self.replay, last_event_id, accounts, sub.quota_only)
+                for frame in frames:
+                    yield frame
+            while True:
+                item = await sub.queue.get()
+                if item is None:
+                    return
+                event_id, frame = item
+                # Only replayed ids are duplicates: ids commit out of order across threads and workers
+                if event_id in sub.replayed:
+                    continue
+                yield frame
+        finally:
+            self.unsubscribe(sub)
+
+    def stats(self) -> Dict[str, int]:
+        return {"subscribers": self.subscriber_count, "published": self.published, "dropped": self.dropped}
@@ -0,0 +1,21 @@
+from app.migrations import Migration, add_column, create_tables, index_migration
+
+from .models import CopilotMetrics, GithubAccount
+
+
+MIGRATIONS = [
+    Migration(
+        version=1,
+        description="baseline: copilot_github_accounts, copilot_metrics",
+        upgrade=create_tables(GithubAccount.__table__, CopilotMetrics.__table__),
+    ),
+    # Latest snapshot per account: index-only descent instead of sorting all of an account's rows
+    index_migration(2, "ix_copilot_metrics_account_id_id", "copilot_metrics", "account_id, id DESC"),
+    # History by time range and `?since=` filters; with partitioning, one index per month
+    index_migration(3, "ix_copilot_metrics_account_id_fetched_at", "copilot_metrics", "account_id, fetched_at DESC"),
+    Migration(
+        version=4,
+        description="copilot_github_accounts.proxy",
+        upgrade=add_column("copilot_github_accounts", "proxy", "TEXT"),
+    ),
+]
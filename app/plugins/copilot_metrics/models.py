@@ -1,7 +1,7 @@
 from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, func
 from sqlalchemy.orm import relationship
 
-from app.models import Base
+from app.models import Base, utcnow
 
 
 class GithubAccount(Base):
@@ -12,6 +12,8 @@ class GithubAccount(Base):
     github_user_id = Column(Integer, nullable=False, index=True)
     node_id = Column(String(255), nullable=True)
     avatar_url = Column(Text, nullable=True)
+    # Egress proxy for this account's GitHub calls (None: the shared proxy pool)
+    proxy = Column(Text, nullable=True)
 
     # Encrypted token storage (AES-GCM)
     token_ciphertext = Column(Text, nullable=False)
@@ -19,9 +21,18 @@ class GithubAccount(Base):
     token_salt = Column(String(255), nullable=False)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
-
-    metrics = relationship("CopilotMetrics", back_populates="account", cascade="all, delete-orphan")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=utcnow, nullable=False)
+
+    # Full snapshot history: never loaded implicitly (touching it without an explicit
+    # loader option raises); deletes rely on ON DELETE CASCADE instead of loading it
+    metrics = relationship(
+        "CopilotMetrics",
+        back_populates="account",
+        cascade="all, delete-orphan",
+        lazy="raise_on_sql",
+        passive_deletes=True,
+        order_by="CopilotMetrics.id",
+    )
 
 
 class CopilotMetrics(Base):
@@ -0,0 +1,336 @@
+"""Optional monthly range partitioning of `copilot_metrics` on `fetched_at` (Postgres).
+
+Enabled with `COPILOT_METRICS__PARTITIONING`. On plugin start, and then every
+`COPILOT_METRICS__PARTITION_CHECK_SECONDS`, `PartitionMaintainer.maintain()`
+does three things under an advisory lock, so only one worker acts at a time:
+
+1. Converts a plain `copilot_metrics` table into a partitioned one. Rows are
+   not copied: the old table is renamed to `copilot_metrics_legacy` and
+   attached as the partition for everything before the next month. The scans
+   happen first, without blocking writes: the `(id, fetched_at)` unique index
+   is built `CONCURRENTLY` and a `NOT VALID` CHECK matching the partition
+   bound is then validated. The ACCESS EXCLUSIVE transaction only swaps the
+   primary key onto that index, renames, and attaches without a scan.
+2. Creates monthly partitions (`copilot_metrics_pYYYYMM`) for the current
+   month and `COPILOT_METRICS__PARTITION_MONTHS_AHEAD` months after it. There
+   is no default partition, so a row never lands in a catch-all that later
+   blocks partition creation.
+3. With `COPILOT_METRICS__RETENTION_MONTHS` > 0, removes partitions that end
+   before the retention cutoff: `DROP` by default, or `DETACH` to keep them as
+   standalone tables for archiving. Either way no row-by-row `DELETE` runs
+   and nothing is left to vacuum.
+
+The primary key of a partitioned table must include the partition key, so it
+becomes `(id, fetched_at)`. Ids still come from the same sequence.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+
+logger = logging.getLogger(__name__)
+
+PARENT = "copilot_metrics"
+LEGACY = "copilot_metrics_legacy"
+# Built before conversion and adopted as the legacy partition's primary key
+LEGACY_KEY = f"{LEGACY}_pkey"
+BOUND = f"{LEGACY}_bound"
+# Serializes maintenance across workers (pg_advisory_xact_lock key)
+LOCK_KEY = 0x636D_7061
+RETENTION_MODES = ("drop", "detach")
+
+
+def month_start(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    years, month = divmod(value.month - 1 + months, 12)
+    return value.replace(year=value.year + years, month=month + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARENT}_p{month:%Y%m}"
+
+
+@dataclass(frozen=True)
+class Partition:
+    name: str
+    # None for MINVALUE / MAXVALUE
+    lower: Optional[datetime]
+    upper: Optional[datetime]
+    rows_estimate: int = 0
+
+
+_BOUND = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+def _parse_bound(value: str) -> Optional[datetime]:
+    value = value.strip().strip("'")
+    if value.upper() in ("MINVALUE", "MAXVALUE"):
+        return None
+    # pg renders offsets as +00 / +05:30
+    value = re.sub(r"([+-]\d{2})$", r"\1:00", value)
+    return datetime.fromisoformat(value).astimezone(timezone.utc)
+
+
+def parse_bounds(expr: str) -> Optional[tuple]:
+    """(lower, upper) from `pg_get_expr(relpartbound)`; None for a DEFAULT partition."""
+    match = _BOUND.search(expr)
+    if not match:
+        return None
+    return _parse_bound(match.group(1)), _parse_bound(match.group(2))
+
+
+def months_to_create(partitions: List[Partition], now: datetime, months_ahead: int) -> List[datetime]:
+    """Month starts from the current month to `months_ahead` later that no partition covers yet."""
+    covered_until = max((p.upper for p in partitions if p.upper is not None), default=None)
+    first = month_start(now)
+    months = [add_months(first, i) for i in range(months_ahead + 1)]
+    return [m for m in months if covered_until is None or m >= covered_until]
+
+
+def expired(partitions: List[Partition], now: datetime, retention_months: int) -> List[Partition]:
+    """Partitions whose whole range is older than the retention window (current month + N before it)."""
+    if retention_months <= 0:
+        return []
+    cutoff = add_months(month_start(now), -retention_months)
+    return [p for p in partitions if p.upper is not None and p.upper <= cutoff]
+
+
+class PartitionMaintainer:
+    def __init__(
+        self,
+        engine: Engine,
+        months_ahead: int = 3,
+        retention_months: int = 0,
+        retention_mode: str = "drop",
+        interval: float = 3600.0,
+    ) -> None:
+        if retention_mode not in RETENTION_MODES:
+            raise ValueError(f"retention_mode must be one of {RETENTION_MODES}")
+        self.engine = engine
+        self.months_ahead = months_ahead
+        self.retention_months = retention_months
+        self.retention_mode = retention_mode
+        self.interval = interval
+        self.last_run: Dict[str, Any] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def supported(self) -> bool:
+        return self.engine.dialect.name == "postgresql"
+
+    # Introspection
+    def is_partitioned(self, conn: Connection) -> bool:
+        return bool(
+            conn.execute(
+                text(
+                    "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+                    "WHERE c.relname = :t AND pg_table_is_visible(c.oid)"
+                ),
+                {"t": PARENT},
+            ).scalar()
+        )
+
+    def partitions(self, conn: Connection) -> List[Partition]:
+        rows = conn.execute(
+            text(
+                "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint "
+                "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = CAST(:t AS regclass)"
+            ),
+            {"t": PARENT},
+        )
+        out = []
+        for name, expr, tuples in rows:
+            bounds = parse_bounds(expr or "")
+            if bounds is not None:
+                out.append(Partition(name, bounds[0], bounds[1], max(int(tuples or 0), 0)))
+        return sorted(out, key=lambda p: p.lower or datetime.min.replace(tzinfo=timezone.utc))
+
+    # Steps
+    def prepare(self, now: datetime) -> Optional[datetime]:
+        """Scan the plain table outside the conversion lock; returns the legacy partition's upper bound.
+
+        Runs in autocommit: `CREATE INDEX CONCURRENTLY` and `VALIDATE CONSTRAINT`
+        only take SHARE UPDATE EXCLUSIVE, so reads and writes carry on. Returns
+        None if another worker has already converted the table.
+        """
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:k)"), {"k": LOCK_KEY})
+            try:
+                if self.is_partitioned(conn):
+                    return None
+                newest = conn.execute(text(f'SELECT max(fetched_at) FROM "{PARENT}"')).scalar()
+                boundary = add_months(month_start(max(now, newest) if newest else now), 1)
+                # A failed concurrent build leaves an invalid index behind
+                valid = conn.execute(
+                    text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:i)"), {"i": LEGACY_KEY}
+                ).scalar()
+                if valid is False:
+                    conn.execute(text(f'DROP INDEX CONCURRENTLY "{LEGACY_KEY}"'))
+                conn.execute(
+                    text(f'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS "{LEGACY_KEY}" ON "{PARENT}" (id, fetched_at)')
+                )
+                # NOT VALID only locks briefly; VALIDATE scans without blocking writes
+                conn.execute(text(f'ALTER TABLE "{PARENT}" DROP CONSTRAINT IF EXISTS "{BOUND}"'))
+                conn.execute(
+                    text(
+                        f'ALTER TABLE "{PARENT}" ADD CONSTRAINT "{BOUND}" '
+                        f"CHECK (fetched_at IS NOT NULL AND fetched_at < '{boundary.isoformat()}') NOT VALID"
+                    )
+                )
+                conn.execute(text(f'ALTER TABLE "{PARENT}" VALIDATE CONSTRAINT "{BOUND}"'))
+                return boundary
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": LOCK_KEY})
+
+    def convert(self, conn: Connection, boundary: datetime) -> None:
+        """Turn the prepared plain table into a partitioned one; catalog changes only."""
+        sequence = conn.execute(text("SELECT pg_get_serial_sequence(:t, 'id')"), {"t": PARENT}).scalar()
+        # A partition cannot keep its own primary key; the prebuilt index becomes the (id, fetched_at) one
+        primary_key = conn.execute(
+            text("SELECT conname FROM pg_constraint WHERE conrelid = CAST(:t AS regclass) AND contype = 'p'"),
+            {"t": PARENT},
+        ).scalar()
+        drop = f'DROP CONSTRAINT "{primary_key}", ' if primary_key else ""
+        conn.execute(text(f'ALTER TABLE "{PARENT}" {drop}ADD CONSTRAINT "{LEGACY_KEY}" PRIMARY KEY USING INDEX "{LEGACY_KEY}"'))
+        indexes = conn.execute(
+            text(
+                "SELECT indexname, indexdef FROM pg_indexes "
+                "WHERE tablename = :t AND schemaname = current_schema() AND indexname <> :k"
+            ),
+            {"t": PARENT, "k": LEGACY_KEY},
+        ).all()
+
+        # Free the index names for the partitioned parent
+        for name, _ in indexes:
+            conn.execute(text(f'ALTER INDEX "{name}" RENAME TO "{(name + "_legacy")[:63]}"'))
+        conn.execute(text(f'ALTER TABLE "{PARENT}" RENAME TO "{LEGACY}"'))
+        default = f"DEFAULT nextval('{sequence}'::regclass)" if sequence else ""
+        conn.execute(
+            text(
+                f'CREATE TABLE "{PARENT}" ('
+                f"id integer NOT NULL {default}, "
+                "account_id integer NOT NULL REFERENCES copilot_github_accounts(id) ON DELETE CASCADE, "
+                "fetched_at timestamp with time zone NOT NULL DEFAULT now(), "
+                "payload text NOT NULL, "
+                "PRIMARY KEY (id, fetched_at)"
+                ") PARTITION BY RANGE (fetched_at)"
+            )
+        )
+        if sequence:
+            conn.execute(text(f'ALTER SEQUENCE {sequence} OWNED BY "{PARENT}".id'))
+        # The validated bound CHECK lets ATTACH skip its scan; the legacy primary key is attached, not rebuilt
+        conn.execute(
+            text(
+                f'ALTER TABLE "{PARENT}" ATTACH PARTITION "{LEGACY}" '
+                f"FOR VALUES FROM (MINVALUE) TO ('{boundary.isoformat()}')"
+            )
+        )
+        # Same secondary indexes on the parent; matching legacy indexes are attached, not rebuilt
+        for _, definition in indexes:
+            if definition.startswith("CREATE INDEX"):
+                conn.execute(text(definition))
+        logger.info("Partitioned %s; existing rows kept in %s (before %s)", PARENT, LEGACY, boundary.date())
+
+    def create_partitions(self, conn: Connection, now: datetime) -> List[str]:
+        created = []
+        for month in months_to_create(self.partitions(conn), now, self.months_ahead):
+            name = partition_name(month)
+            conn.execute(
+                text(
+                    f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{PARENT}" '
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+                )
+            )
+            created.append(name)
+        return created
+
+    def apply_retention(self, conn: Connection, now: datetime) -> List[str]:
+        removed = []
+        for p in expired(self.partitions(conn), now, self.retention_months):
+            if self.retention_mode == "detach":
+                conn.execute(text(f'ALTER TABLE "{PARENT}" DETACH PARTITION "{p.name}"'))
+            else:
+                conn.execute(text(f'DROP TABLE "{p.name}"'))
+            removed.append(p.name)
+        return removed
+
+    def maintain(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Convert if needed, create upcoming partitions and apply retention (Postgres only)."""
+        if not self.supported:
+            return {"supported": False}
+        now = now or datetime.now(timezone.utc)
+        result: Dict[str, Any] = {"supported": True, "converted": False, "created": [], "removed": []}
+        with self.engine.connect() as conn:
+            partitioned = self.is_partitioned(conn)
+        # The scans run first; only the catalog swap below holds ACCESS EXCLUSIVE
+        boundary = None if partitioned else self.prepare(now)
+        with self.engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": LOCK_KEY})
+            if boundary is not None and not self.is_partitioned(conn):
+                self.convert(conn, boundary)
+                result["converted"] = True
+            result["created"] = self.create_partitions(conn, now)
+            result["removed"] = self.apply_retention(conn, now)
+        if result["created"] or result["removed"]:
+            logger.info("Partitions created: %s; %s: %s", result["created"], self.retention_mode, result["removed"])
+        self.last_run = {**result, "at": now.isoformat()}
+        return result
+
+    def status(self) -> Dict[str, Any]:
+        if not self.supported:
+            return {"supported": False, "partitions": []}
+        with self.engine.connect() as conn:
+            partitioned = self.is_partitioned(conn)
+            parts = self.partitions(conn) if partitioned else []
+        return {
+            "supported": True,
+            "partitioned": partitioned,
+            "months_ahead": self.months_ahead,
+            "retention_months": self.retention_months,
+            "retention_mode": self.retention_mode,
+            "last_run": self.last_run,
+            "partitions": [
+                {
+                    "name": p.name,
+                    "from": p.lower.isoformat() if p.lower else None,
+                    "to": p.upper.isoformat() if p.upper else None,
+                    "rows_estimate": p.rows_estimate,
+                }
+                for p in parts
+            ],
+        }
+
+    # Background upkeep
+    def start(self) -> None:
+        if not self.supported or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="copilot-metrics-partitions", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.maintain()
+            except Exception:
+                logger.exception("Partition maintenance failed")
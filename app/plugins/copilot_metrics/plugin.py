@@ -1,12 +1,38 @@
+import logging
+
 from fastapi import APIRouter
 
+from app.config import (
+    COPILOT_METRICS__PARTITION_CHECK_SECONDS,
+    COPILOT_METRICS__PARTITION_MONTHS_AHEAD,
+    COPILOT_METRICS__PARTITIONING,
+    COPILOT_METRICS__PROXIES,
+    COPILOT_METRICS__PROXY_EJECT_AFTER,
+    COPILOT_METRICS__PROXY_EJECT_SECONDS,
+    COPILOT_METRICS__PROXY_MAX_EJECT_SECONDS,
+    COPILOT_METRICS__PROXY_MAX_ERROR_RATE,
+    COPILOT_METRICS__PROXY_STICKY,
+    COPILOT_METRICS__RETENTION_MODE,
+    COPILOT_METRICS__RETENTION_MONTHS,
+    COPILOT_METRICS__SIMULATE,
+    COPILOT_METRICS__STREAM_HEARTBEAT_SECONDS,
+    COPILOT_METRICS__STREAM_MAX_SUBSCRIBERS,
+    COPILOT_METRICS__STREAM_QUEUE_SIZE,
+    COPILOT_METRICS__STREAM_REPLAY_LIMIT,
+)
 from app.core.interfaces import ModuleInterface, ServiceRegistry
-from app.db import engine
-from app.models import Base
+from app.db import SessionLocal, engine
+from app.responses import fast_json_enabled
 
+from .feed import METRICS_SAVED, MetricsFeed
+from .partitions import PartitionMaintainer
+from .proxies import ProxyPool
 from .routes import build_router
 
 
+logger = logging.getLogger(__name__)
+
+
 class Plugin(ModuleInterface):
     name = "copilot_metrics"
     version = "1.0.0"
@@ -15,22 +41,89 @@ class Plugin(ModuleInterface):
         self.router: APIRouter | None = None
         self._db_dep = None
         self._services = {}
+        self.partitions: PartitionMaintainer | None = None
+        self.feed: MetricsFeed | None = None
+        self.proxy_pool: ProxyPool | None = None
 
     def init(self, app, registry: ServiceRegistry) -> None:
         # Ensure models are imported into metadata
         from . import models  # noqa: F401
 
         self._db_dep = registry.get_service("db_session_dep")
-        self.router = build_router(self._db_dep)
+        # Another module (or a test) may register "copilot_metrics.transport" to replace the network
+        transport = registry.get_service("copilot_metrics.transport")
+        if transport is None and COPILOT_METRICS__SIMULATE:
+            from .simulator import GitHubSimulator
+
+            transport = GitHubSimulator()
+        if COPILOT_METRICS__PARTITIONING:
+            self.partitions = PartitionMaintainer(
+                engine,
+                months_ahead=COPILOT_METRICS__PARTITION_MONTHS_AHEAD,
+                retention_months=COPILOT_METRICS__RETENTION_MONTHS,
+                retention_mode=COPILOT_METRICS__RETENTION_MODE,
+                interval=COPILOT_METRICS__PARTITION_CHECK_SECONDS,
+            )
+            self._services["copilot_metrics.partitions"] = self.partitions
+        if COPILOT_METRICS__PROXIES:
+            self.proxy_pool = ProxyPool(
+                COPILOT_METRICS__PROXIES,
+                sticky=COPILOT_METRICS__PROXY_STICKY,
+                eject_after=COPILOT_METRICS__PROXY_EJECT_AFTER,
+                max_error_rate=COPILOT_METRICS__PROXY_MAX_ERROR_RATE,
+                eject_seconds=COPILOT_METRICS__PROXY_EJECT_SECONDS,
+                max_eject_seconds=COPILOT_METRICS__PROXY_MAX_EJECT_SECONDS,
+            )
+            self._services["copilot_metrics.proxy_pool"] = self.proxy_pool
+        # New snapshots reach the SSE feed of every worker through the cluster bus
+        self.feed = MetricsFeed(
+            SessionLocal,
+            heartbeat=COPILOT_METRICS__STREAM_HEARTBEAT_SECONDS,
+            queue_size=COPILOT_METRICS__STREAM_QUEUE_SIZE,
+            max_subscribers=COPILOT_METRICS__STREAM_MAX_SUBSCRIBERS,
+            replay_limit=COPILOT_METRICS__STREAM_REPLAY_LIMIT,
+        )
+        self._services["copilot_metrics.feed"] = self.feed
+        registry.subscribe(METRICS_SAVED, self.feed.on_saved)
+        publish = registry.publish
+        bus = registry.get_service("cluster_bus")
+        if bus is not None:
+            bus.relay(METRICS_SAVED)
+            publish = bus.broadcast
+        self.router = build_router(
+            self._db_dep,
+            registry.get_service("read_db_session_dep"),
+            fast_json=fast_json_enabled(self.name),
+            transport=transport,
+            partitions=self.partitions,
+            publish=publish,
+            feed=self.feed,
+            proxy_pool=self.proxy_pool,
+        )
 
     def start(self) -> None:
-        Base.metadata.create_all(bind=engine)
+        if self.partitions is None:
+            return
+        if not self.partitions.supported:
+            logger.warning("COPILOT_METRICS__PARTITIONING needs PostgreSQL; %s tables stay unpartitioned", engine.dialect.name)
+            return
+        # Migrations have run by now; convert on first start, then keep future months created
+        self.partitions.maintain()
+        self.partitions.start()
 
     def stop(self) -> None:
-        pass
+        if self.feed is not None:
+            self.feed.close()
+        if self.partitions is not None:
+            self.partitions.stop()
 
     def get_router(self) -> APIRouter:
         return self.router  # type: ignore[return-value]
 
     def provides(self):
-        return self._services
\ No newline at end of file
+        return self._services
+
+    def migrations(self):
+        from .migrations import MIGRATIONS
+
+        return MIGRATIONS
\ No newline at end of file
@@ -0,0 +1,190 @@
+"""Health-scored pool of egress proxies for GitHub calls.
+
+Accounts with their own stored proxy always use it. All other fetches draw
+from the pool (`COPILOT_METRICS__PROXIES`), so traffic spreads over every
+egress IP instead of hitting GitHub's per-IP limits from one.
+
+Health is tracked passively from real requests. Each proxy keeps an EWMA of
+latency and of its failure rate, a count of consecutive failures, and the
+number of requests in flight. A failure is a transport error (connect, proxy
+handshake, timeout), a 429, or a 5xx. Other 4xx responses are about the
+token, not the egress. A proxy is ejected after `eject_after` consecutive
+failures, or when its failure rate goes above `max_error_rate`. The ejection
+lasts `eject_seconds`, doubling on each repeat up to `max_eject_seconds`.
+After that the proxy is half-open: it is picked again, and one failure
+ejects it at once.
+
+Selection:
+- sticky (the default): rendezvous hashing of (account, proxy) over the
+  healthy proxies. Each account keeps its egress IP, and when a proxy is
+  ejected only its own accounts move.
+- not sticky: the better of two random healthy proxies, scored by latency,
+  failure rate and requests in flight.
+
+If every proxy is ejected, the one whose ejection ends first is used. State
+is per worker process.
+"""
+from __future__ import annotations
+
+import hashlib
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+
+# Weight of the newest sample in the latency / failure-rate averages
+EWMA_ALPHA = 0.2
+# Failure-rate ejection needs this many requests first
+MIN_SAMPLES = 10
+
+
+def redact_proxy(url: Optional[str]) -> Optional[str]:
+    """`url` without its password (proxies often embed credentials)."""
+    if not url:
+        return url
+    parts = urlsplit(url)
+    if parts.password is None:
+        return url
+    netloc = f"{parts.username}:***@{parts.hostname}" + (f":{parts.port}" if parts.port else "")
+    return urlunsplit(parts._replace(netloc=netloc))
+
+
+def validate_proxy(url: str) -> str:
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https", "socks5", "socks5h") or not parts.hostname:
+        raise ValueError("proxy must be an http://, https:// or socks5:// URL with a host")
+    return url
+
+
+def is_proxy_failure(status_code: Optional[int]) -> bool:
+    """Whether a response (None: no response at all) counts against the proxy it went through."""
+    return status_code is None or status_code == 429 or status_code >= 500
+
+
+@dataclass
+class ProxyState:
+    url: str
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    in_flight: int = 0
+    latency_ms: float = 0.0
+    error_rate: float = 0.0
+    ejections: int = 0
+    ejected_until: float = 0.0
+    last_error: Optional[str] = None
+
+    def score(self) -> float:
+        # Lower is better; an untried proxy scores as fast, so it gets traffic
+        return (self.latency_ms or 1.0) * (1.0 + 4.0 * self.error_rate) * (1 + self.in_flight)
+
+
+class ProxyPool:
+    def __init__(
+        self,
+        proxies: Iterable[str],
+        sticky: bool = True,
+        eject_after: int = 3,
+        max_error_rate: float = 0.5,
+        eject_seconds: float = 30.0,
+        max_eject_seconds: float = 600.0,
+        clock=time.monotonic,
+    ) -> None:
+        self._states: Dict[str, ProxyState] = {url: ProxyState(validate_proxy(url)) for url in proxies}
+        self.sticky = sticky
+        self.eject_after = eject_after
+        self.max_error_rate = max_error_rate
+        self.eject_seconds = eject_seconds
+        self.max_eject_seconds = max_eject_seconds
+        self._clock = clock
+        self._rng = random.Random()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, url: object) -> bool:
+        return url in self._states
+
+    def healthy(self) -> List[str]:
+        now = self._clock()
+        with self._lock:
+            return [s.url for s in self._states.values() if s.ejected_until <= now]
+
+    def choose(self, account_id: Optional[int] = None) -> Optional[str]:
+        """A proxy for one request (None when the pool is empty), counted as in flight until `report`."""
+        if not self._states:
+            return None
+        now = self._clock()
+        with self._lock:
+            candidates = [s for s in self._states.values() if s.ejected_until <= now]
+            if not candidates:
+                state = min(self._states.values(), key=lambda s: s.ejected_until)
+            elif self.sticky and account_id is not None:
+                state = max(candidates, key=lambda s: _rendezvous(account_id, s.url))
+            else:
+                pair = self._rng.sample(candidates, min(2, len(candidates)))
+                state = min(pair, key=ProxyState.score)
+            state.in_flight += 1
+            return state.url
+
+    def report(self, url: Optional[str], ok: bool, latency: float, error: Optional[str] = None) -> None:
+        """Outcome of a request sent through `url` (`latency` in seconds); unknown urls are ignored."""
+        state = self._states.get(url) if url else None
+        if state is None:
+            return
+        now = self._clock()
+        with self._lock:
+            state.in_flight = max(0, state.in_flight - 1)
+            state.requests += 1
+            sample = latency * 1000.0
+            state.latency_ms = sample if state.requests == 1 else state.latency_ms + EWMA_ALPHA * (sample - state.latency_ms)
+            state.error_rate += EWMA_ALPHA * ((0.0 if ok else 1.0) - state.error_rate)
+            if ok:
+                state.consecutive_failures = 0
+                if state.ejected_until <= now:
+                    # Recovered: the next ejection starts from the base duration again
+                    state.ejections = 0
+                return
+            state.failures += 1
+            state.consecutive_failures += 1
+            state.last_error = error
+            if state.ejected_until > now:
+                # Already ejected (a request that was in flight); do not extend it
+                return
+            half_open = state.ejections > 0
+            if (
+                half_open
+                or state.consecutive_failures >= self.eject_after
+                or (state.requests >= MIN_SAMPLES and state.error_rate > self.max_error_rate)
+            ):
+                duration = min(self.eject_seconds * 2 ** state.ejections, self.max_eject_seconds)
+                state.ejections += 1
+                state.ejected_until = now + duration
+                state.consecutive_failures = 0
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = self._clock()
+        with self._lock:
+            return [
+                {
+                    "proxy": redact_proxy(s.url),
+                    "healthy": s.ejected_until <= now,
+                    "ejected_for_s": round(max(0.0, s.ejected_until - now), 1),
+                    "ejections": s.ejections,
+                    "requests": s.requests,
+                    "failures": s.failures,
+                    "in_flight": s.in_flight,
+                    "latency_ms": round(s.latency_ms, 1),
+                    "error_rate": round(s.error_rate, 3),
+                    "last_error": s.last_error,
+                }
+                for s in self._states.values()
+            ]
+
+
+def _rendezvous(account_id: int, url: str) -> int:
+    return int.from_bytes(hashlib.blake2b(f"{account_id}|{url}".encode(), digest_size=8).digest(), "big")
@@ -1,17 +1,72 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
-from .schemas import ImportAccountRequest, GithubAccountRead, CopilotMetricsRead
-from .crud import list_accounts, get_account, latest_metrics_for_account, latest_metrics_all
+from app.conditional import Validators, conditional_get
+from app.responses import FastJSONResponse, RowSerializer
+
+from .schemas import AccountProxyUpdate, ImportAccountRequest, GithubAccountRead, GithubAccountWithMetrics, CopilotMetricsRead
+from .models import GithubAccount
+from .crud import (
+    list_accounts,
+    list_accounts_with_latest,
+    get_account,
+    latest_metrics_for_account,
+    latest_metrics_all,
+    metrics_history,
+    set_account_proxy,
+)
+from .feed import summarize_metrics
+from .proxies import redact_proxy, validate_proxy
 from .services import CopilotMetricsService
 
 
-def build_router(db_dep) -> APIRouter:
-    router = APIRouter()
+# Upper bound on `?ids=` lists
+MAX_BATCH_IDS = 500
+INCLUDES = ("latest_metrics", "latest_metrics_summary")
+MAX_HISTORY = 1000
+SINCE_DESCRIPTION = "Only consider snapshots fetched at or after this time (ISO 8601)"
+
+
+def parse_ids(raw: Optional[str]) -> Optional[List[int]]:
+    """`?ids=1,2,3` as a sorted list of unique ids (None when absent)."""
+    if raw is None:
+        return None
+    try:
+        ids = sorted({int(part) for part in raw.split(",") if part.strip()})
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be comma-separated integers")
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    return ids
+
+
+def build_router(
+    db_dep,
+    read_db_dep=None,
+    fast_json=False,
+    transport=None,
+    partitions=None,
+    publish=None,
+    feed=None,
+    proxy_pool=None,
+) -> APIRouter:
+    # fast_json: orjson rendering, list routes skip per-row response_model validation
+    # transport: httpx transport for GitHub calls (None: the network)
+    # partitions: PartitionMaintainer when COPILOT_METRICS__PARTITIONING is on (GET /partitions)
+    # publish: receives METRICS_SAVED for each new snapshot; feed: MetricsFeed behind GET /metrics/stream
+    # proxy_pool: ProxyPool for accounts without a stored proxy (GET /proxies)
+    router = APIRouter(default_response_class=FastJSONResponse) if fast_json else APIRouter()
+    read_db_dep = read_db_dep or db_dep
+    account_rows = RowSerializer(GithubAccountRead)
+    metrics_rows = RowSerializer(CopilotMetricsRead, json_fields=("payload",))
 
     @router.post("/accounts/import")
     def import_account(req: ImportAccountRequest, db: Session = Depends(db_dep)):
-        svc = CopilotMetricsService(db_dep)
+        svc = CopilotMetricsService(db_dep, transport=transport, proxy_pool=proxy_pool)
         try:
             account_id = svc.import_account(req.token, proxy=req.proxy)
         except Exception as exc:
@@ -19,30 +74,111 @@ def build_router(db_dep) -> APIRouter:
         return {"account_id": account_id}
 
     @router.get("/accounts", response_model=list[GithubAccountRead])
-    def get_accounts(db: Session = Depends(db_dep)):
-        return list_accounts(db)
+    def get_accounts(
+        ids: Optional[str] = Query(None, description="Comma-separated account ids"),
+        include: Optional[Literal["latest_metrics", "latest_metrics_summary"]] = Query(
+            None, description="Embed each account's latest snapshot, or its plan/quota summary"
+        ),
+        since: Optional[datetime] = Query(None, description=SINCE_DESCRIPTION),
+        db: Session = Depends(read_db_dep),
+    ):
+        id_list = parse_ids(ids)
+        if include is None:
+            if fast_json:
+                return account_rows.response(list_accounts(db, columns=account_rows.columns(GithubAccount), ids=id_list))
+            return list_accounts(db, ids=id_list)
+        # One joined query for accounts and their latest snapshots
+        out = []
+        for acc, m in list_accounts_with_latest(db, id_list, since):
+            row = account_rows.row(acc)
+            snapshot = metrics_rows.row(m) if m is not None else None
+            if snapshot is not None and include == "latest_metrics_summary":
+                snapshot = summarize_metrics(snapshot)
+            row[include] = snapshot
+            out.append(row)
+        if fast_json:
+            return FastJSONResponse(out)
+        other = {i for i in INCLUDES if i != include}
+        return JSONResponse(
+            [GithubAccountWithMetrics.model_validate(r).model_dump(mode="json", exclude=other) for r in out]
+        )
 
     @router.get("/accounts/{account_id}", response_model=GithubAccountRead)
-    def get_account_one(account_id: int, db: Session = Depends(db_dep)):
+    def get_account_one(account_id: int, request: Request, response: Response, db: Session = Depends(read_db_dep)):
         acc = get_account(db, account_id)
         if not acc:
             raise HTTPException(status_code=404, detail="Account not found")
-        return acc
+        validators = Validators.for_version("accounts", acc.id, acc.updated_at, modified=acc.updated_at)
+        not_modified = conditional_get(request, response, validators, "accounts")
+        return not_modified if not_modified is not None else acc
+
+    @router.put("/accounts/{account_id}/proxy")
+    def put_account_proxy(account_id: int, req: AccountProxyUpdate, db: Session = Depends(db_dep)):
+        proxy = req.proxy or None
+        if proxy is not None:
+            try:
+                validate_proxy(proxy)
+            except ValueError as exc:
+                raise HTTPException(status_code=422, detail=str(exc))
+        acc = set_account_proxy(db, account_id, proxy)
+        if acc is None:
+            raise HTTPException(status_code=404, detail="Account not found")
+        return {"account_id": acc.id, "proxy": redact_proxy(acc.proxy)}
+
+    @router.get("/proxies")
+    def get_proxies():
+        if proxy_pool is None:
+            return {"enabled": False, "proxies": []}
+        return {"enabled": True, "sticky": proxy_pool.sticky, "proxies": proxy_pool.stats()}
 
     @router.post("/metrics/fetch/{account_id}")
     def fetch_metrics(account_id: int, db: Session = Depends(db_dep)):
-        svc = CopilotMetricsService(db_dep)
+        svc = CopilotMetricsService(db_dep, transport=transport, publish=publish, proxy_pool=proxy_pool)
         try:
             metrics_id = svc.fetch_metrics(account_id)
         except Exception as exc:
             raise HTTPException(status_code=400, detail=str(exc))
         return {"metrics_id": metrics_id}
 
+    @router.get("/metrics/stream", response_class=StreamingResponse)
+    async def stream_metrics(
+        request: Request,
+        ids: Optional[str] = Query(None, description="Comma-separated account ids (default: all accounts)"),
+        quota_only: bool = Query(False, description="Only snapshots whose quotas differ from the previous one"),
+        last_event_id: Optional[int] = Query(None, description="Resume after this snapshot id (or the Last-Event-ID header)"),
+    ):
+        if feed is None:
+            raise HTTPException(status_code=404, detail="Metrics stream is not enabled")
+        id_list = parse_ids(ids)
+        resume = request.headers.get("last-event-id")
+        try:
+            resume_id = int(resume) if resume else last_event_id
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Last-Event-ID must be a snapshot id")
+        if feed.subscriber_count >= feed.max_subscribers:
+            raise HTTPException(status_code=503, detail="Too many metrics stream subscribers", headers={"Retry-After": "5"})
+        return StreamingResponse(
+            feed.stream(id_list, quota_only, resume_id),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
     @router.get("/metrics/{account_id}", response_model=CopilotMetricsRead)
-    def get_metrics_one(account_id: int, db: Session = Depends(db_dep)):
-        m = latest_metrics_for_account(db, account_id)
+    def get_metrics_one(
+        account_id: int,
+        request: Request,
+        response: Response,
+        since: Optional[datetime] = Query(None, description=SINCE_DESCRIPTION),
+        db: Session = Depends(read_db_dep),
+    ):
+        m = latest_metrics_for_account(db, account_id, since)
         if not m:
             raise HTTPException(status_code=404, detail="Metrics not found")
+        # Snapshots are immutable: the latest id identifies the representation
+        validators = Validators.for_version("metrics", account_id, m.id, modified=m.fetched_at)
+        not_modified = conditional_get(request, response, validators, "metrics")
+        if not_modified is not None:
+            return not_modified
         # Convert payload JSON string to dict for response model
         from pydantic import TypeAdapter
         adapter = TypeAdapter(dict)
@@ -50,8 +186,23 @@ def build_router(db_dep) -> APIRouter:
         return {"id": m.id, "account_id": m.account_id, "fetched_at": m.fetched_at, "payload": payload}
 
     @router.get("/metrics", response_model=list[CopilotMetricsRead])
-    def get_metrics_all(db: Session = Depends(db_dep)):
-        metrics = latest_metrics_all(db)
+    def get_metrics_all(
+        request: Request,
+        response: Response,
+        ids: Optional[str] = Query(None, description="Comma-separated account ids"),
+        since: Optional[datetime] = Query(None, description=SINCE_DESCRIPTION),
+        db: Session = Depends(read_db_dep),
+    ):
+        metrics = latest_metrics_all(db, parse_ids(ids), since)
+        validators = Validators.for_version(
+            "metrics", *sorted((m.account_id, m.id) for m in metrics),
+            modified=max((m.fetched_at for m in metrics), default=None),
+        )
+        not_modified = conditional_get(request, response, validators, "metrics")
+        if not_modified is not None:
+            return not_modified
+        if fast_json:
+            return metrics_rows.response(metrics)
         from pydantic import TypeAdapter
         adapter = TypeAdapter(dict)
         out = []
@@ -60,4 +211,36 @@ def build_router(db_dep) -> APIRouter:
             out.append({"id": m.id, "account_id": m.account_id, "fetched_at": m.fetched_at, "payload": payload})
         return out
 
+    @router.get("/metrics/{account_id}/history", response_model=list[CopilotMetricsRead])
+    def get_metrics_history(
+        account_id: int,
+        start: Optional[datetime] = Query(None, description="Inclusive lower bound on fetched_at"),
+        end: Optional[datetime] = Query(None, description="Exclusive upper bound on fetched_at"),
+        limit: int = Query(100, ge=1, le=MAX_HISTORY),
+        db: Session = Depends(read_db_dep),
+    ):
+        if start is not None and end is not None:
+            try:
+                empty = start >= end
+            except TypeError:
+                raise HTTPException(status_code=422, detail="start and end must both have, or both omit, a UTC offset")
+            if empty:
+                raise HTTPException(status_code=422, detail="start must be before end")
+        # A bounded range touches only the partitions (months) it overlaps
+        metrics = metrics_history(db, account_id, start, end, limit)
+        if fast_json:
+            return metrics_rows.response(metrics)
+        from pydantic import TypeAdapter
+        adapter = TypeAdapter(dict)
+        return [
+            {"id": m.id, "account_id": m.account_id, "fetched_at": m.fetched_at, "payload": adapter.validate_json(m.payload)}
+            for m in metrics
+        ]
+
+    @router.get("/partitions")
+    def get_partitions():
+        if partitions is None:
+            return {"enabled": False, "partitions": []}
+        return {"enabled": True, **partitions.status()}
+
     return router
\ No newline at end of file
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from pydantic import BaseModel
 
@@ -9,6 +9,11 @@ class ImportAccountRequest(BaseModel):
     proxy: Optional[str] = None
 
 
+class AccountProxyUpdate(BaseModel):
+    # None: use the shared proxy pool
+    proxy: Optional[str] = None
+
+
 class GithubAccountRead(BaseModel):
     id: int
     login: str
@@ -29,4 +34,23 @@ class CopilotMetricsRead(BaseModel):
     payload: dict
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class CopilotMetricsSummary(BaseModel):
+    """Plan and quota fields of a snapshot, without the rest of the payload."""
+
+    id: int
+    fetched_at: datetime
+    copilot_plan: Optional[str] = None
+    access_type_sku: Optional[str] = None
+    chat_enabled: Optional[bool] = None
+    quota_reset_date: Optional[str] = None
+    quotas: Dict[str, Dict[str, Any]] = {}
+
+
+class GithubAccountWithMetrics(GithubAccountRead):
+    """`GET /accounts?include=...`: only the requested field is present."""
+
+    latest_metrics: Optional[CopilotMetricsRead] = None
+    latest_metrics_summary: Optional[CopilotMetricsSummary] = None
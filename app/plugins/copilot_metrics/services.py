@@ -1,44 +1,104 @@
 import json
 import os
-from typing import Optional
+import time
+from typing import Any, Callable, Optional
 
 import httpx
 from sqlalchemy.orm import Session
 
-from .crud import create_or_update_account, save_metrics
+from .crud import create_or_update_account, latest_metrics_for_account, save_metrics
+from .feed import METRICS_SAVED, snapshot_event
+from .proxies import ProxyPool, is_proxy_failure, validate_proxy
 from .utils import encrypt_token, decrypt_token
+from app.config import COPILOT_METRICS__API_URL
 from app.db import SessionLocal
+from app.tracing import annotate, span
 
 
-GITHUB_USER_URL = "https://api.github.com/user"
-COPILOT_USER_URL = "https://api.github.com/copilot_internal/user"
+GITHUB_USER_PATH = "/user"
+COPILOT_USER_PATH = "/copilot_internal/user"
 
 
 class CopilotMetricsService:
-    def __init__(self, db_factory) -> None:
+    """GitHub calls go through `transport` when given (e.g. the bundled simulator).
+
+    Egress: an explicit `proxy`, else the account's stored proxy, else one
+    chosen from `proxy_pool` (whose health is updated from the outcome), else
+    a direct connection.
+    """
+
+    def __init__(
+        self,
+        db_factory,
+        transport: Optional[httpx.BaseTransport] = None,
+        api_url: str = COPILOT_METRICS__API_URL,
+        publish: Optional[Callable[[str, Any], None]] = None,
+        proxy_pool: Optional[ProxyPool] = None,
+    ) -> None:
         self._db_factory = db_factory
+        self._transport = transport
+        self._api_url = api_url
+        # Receives METRICS_SAVED after each snapshot is committed (the cluster bus in the plugin)
+        self._publish = publish
+        self._proxy_pool = proxy_pool
 
     def _client(self, proxy: Optional[str] = None) -> httpx.Client:
+        if self._transport is not None:
+            # An injected transport answers every request; proxies do not apply
+            return httpx.Client(
+                base_url=self._api_url, timeout=20.0, transport=self._transport, headers={"Accept": "*/*"}
+            )
         proxies = {"all": proxy} if proxy else None
-        return httpx.Client(timeout=20.0, proxies=proxies, headers={"Accept": "*/*"})
+        return httpx.Client(base_url=self._api_url, timeout=20.0, proxies=proxies, headers={"Accept": "*/*"})
+
+    def _get(self, client: httpx.Client, path: str, headers: dict) -> httpx.Response:
+        with span(f"GET {path}", "client", **{"http.method": "GET", "http.url": f"{self._api_url}{path}"}):
+            resp = client.get(path, headers=headers)
+            annotate(**{"http.status_code": resp.status_code})
+            resp.raise_for_status()
+            return resp
+
+    def _request(
+        self, path: str, headers: dict, proxy: Optional[str] = None, account_id: Optional[int] = None
+    ) -> httpx.Response:
+        pooled = None
+        if proxy is None and self._proxy_pool is not None:
+            pooled = self._proxy_pool.choose(account_id)
+        ok, error = True, None
+        started = time.perf_counter()
+        try:
+            with self._client(proxy or pooled) as client:
+                return self._get(client, path, headers)
+        except httpx.HTTPStatusError as exc:
+            ok = not is_proxy_failure(exc.response.status_code)
+            error = f"HTTP {exc.response.status_code}"
+            raise
+        except httpx.TransportError as exc:
+            ok, error = False, type(exc).__name__
+            raise
+        finally:
+            if pooled is not None:
+                self._proxy_pool.report(pooled, ok, time.perf_counter() - started, error)
 
     def import_account(self, token: str, proxy: Optional[str] = None) -> int:
+        """Import (or refresh) the token's account; `proxy` is stored and used for its later calls."""
+        if proxy:
+            validate_proxy(proxy)
         secret_hex = os.getenv("COPILOT_METRICS__TOKEN_SECRET")
         if not secret_hex:
             raise RuntimeError("COPILOT_METRICS__TOKEN_SECRET not configured")
 
-        ct_b64, nonce_b64, salt_b64 = encrypt_token(secret_hex, token)
+        with span("argon2id encrypt_token"):
+            ct_b64, nonce_b64, salt_b64 = encrypt_token(secret_hex, token)
 
         db = SessionLocal()
         try:
-            with self._client(proxy) as client:
-                # Fetch user info
-                resp = client.get(
-                    GITHUB_USER_URL,
-                    headers={"authorization": f"token {token}", "user-agent": "Visual Studio Code (desktop)"},
-                )
-                resp.raise_for_status()
-                user = resp.json()
+            resp = self._request(
+                GITHUB_USER_PATH,
+                {"authorization": f"token {token}", "user-agent": "Visual Studio Code (desktop)"},
+                proxy or None,
+            )
+            user = resp.json()
 
             acc = create_or_update_account(
                 db,
@@ -49,6 +109,7 @@ class CopilotMetricsService:
                 token_ciphertext=ct_b64,
                 token_nonce=nonce_b64,
                 token_salt=salt_b64,
+                proxy=proxy or None,
             )
             return acc.id
         finally:
@@ -67,17 +128,22 @@ class CopilotMetricsService:
             if not acc:
                 raise RuntimeError("Account not found")
 
-            token = decrypt_token(secret_hex, acc.token_ciphertext, acc.token_nonce, acc.token_salt)
+            with span("argon2id decrypt_token"):
+                token = decrypt_token(secret_hex, acc.token_ciphertext, acc.token_nonce, acc.token_salt)
 
-            with self._client(proxy) as client:
-                resp = client.get(
-                    COPILOT_USER_URL,
-                    headers={"authorization": f"Bearer {token}", "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X)"},
-                )
-                resp.raise_for_status()
-                data = resp.json()
+            resp = self._request(
+                COPILOT_USER_PATH,
+                {"authorization": f"Bearer {token}", "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X)"},
+                proxy or acc.proxy,
+                acc.id,
+            )
+            data = resp.json()
 
+            # Only needed to flag quota changes for the change feed
+            previous = latest_metrics_for_account(db, acc.id) if self._publish is not None else None
             m = save_metrics(db, account_id=acc.id, payload_json=json.dumps(data))
+            if self._publish is not None:
+                self._publish(METRICS_SAVED, snapshot_event(m, data, json.loads(previous.payload) if previous else None))
             return m.id
         finally:
             db.close()
\ No newline at end of file
@@ -0,0 +1,215 @@
+"""Local stand-in for the two GitHub endpoints the plugin calls.
+
+`GitHubSimulator` is an httpx transport: pass it to `CopilotMetricsService`
+(or register it as the "copilot_metrics.transport" service, or set
+`COPILOT_METRICS__SIMULATE=true`) and `/user` and `/copilot_internal/user` are
+answered in-process. Latency, error rate, per-token rate limits and the size
+of the metrics payload are configurable. Every token is valid and maps to a
+stable fake user, so re-importing a token updates the same account.
+
+It can also run as a standalone server for load tests against a deployed app
+(`COPILOT_METRICS__API_URL=http://localhost:9100`):
+
+    python -m app.plugins.copilot_metrics.simulator --port 9100 --latency-ms 80 --error-rate 0.01
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+
+@dataclass(frozen=True)
+class SimulatorConfig:
+    latency_ms: float = 0.0
+    # Uniform extra latency in [0, jitter_ms)
+    jitter_ms: float = 0.0
+    # Fraction of requests answered with a 500/502/503
+    error_rate: float = 0.0
+    # Requests per token per window (GitHub's primary limit); 0 disables limiting
+    rate_limit: int = 5000
+    rate_limit_window: float = 3600.0
+    # Approximate size of a /copilot_internal/user body
+    payload_bytes: int = 2048
+    seed: Optional[int] = None
+
+
+def _user_id(token: str) -> int:
+    # Positive int4: GithubAccount.github_user_id is an Integer column
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=4).digest(), "big") & 0x7FFFFFFF
+
+
+def _json(status: int, body: Any, headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+    return status, {"content-type": "application/json; charset=utf-8", **(headers or {})}, json.dumps(body).encode()
+
+
+class GitHubSimulator(httpx.BaseTransport):
+    def __init__(self, config: Optional[SimulatorConfig] = None, **overrides: Any) -> None:
+        self.config = replace(config or SimulatorConfig(), **overrides)
+        self._rng = random.Random(self.config.seed)
+        # token -> (window start, requests used)
+        self._windows: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+        self.requests = self.errors = self.rate_limited = self.bytes_sent = 0
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        status, headers, body = self.respond(request.method, request.url.path, request.headers.get("authorization"))
+        return httpx.Response(status, headers=headers, content=body, request=request)
+
+    def respond(self, method: str, path: str, authorization: Optional[str]) -> Tuple[int, Dict[str, str], bytes]:
+        """(status, headers, body) for one request, after the configured latency."""
+        cfg = self.config
+        with self._lock:
+            self.requests += 1
+            delay = (cfg.latency_ms + self._rng.random() * cfg.jitter_ms) / 1000.0
+            fail = self._rng.random() < cfg.error_rate
+            fail_status = self._rng.choice((500, 502, 503))
+        if delay > 0:
+            time.sleep(delay)
+
+        token = (authorization or "").partition(" ")[2].strip()
+        if not token:
+            return _json(401, {"message": "Requires authentication"})
+        limited, headers = self._rate_limit(token)
+        if limited:
+            with self._lock:
+                self.rate_limited += 1
+            return _json(403, {"message": f"API rate limit exceeded for user ID {_user_id(token)}."}, headers)
+        if fail:
+            with self._lock:
+                self.errors += 1
+            return _json(fail_status, {"message": "Server Error"}, headers)
+        if method != "GET":
+            return _json(404, {"message": "Not Found"}, headers)
+        if path == "/user":
+            result = _json(200, self.user(token), headers)
+        elif path == "/copilot_internal/user":
+            result = _json(200, self.copilot_user(token), headers)
+        else:
+            return _json(404, {"message": "Not Found"}, headers)
+        with self._lock:
+            self.bytes_sent += len(result[2])
+        return result
+
+    def user(self, token: str) -> Dict[str, Any]:
+        user_id = _user_id(token)
+        return {
+            "login": f"sim-{user_id}",
+            "id": user_id,
+            "node_id": f"U_sim{user_id:x}",
+            "avatar_url": f"https://avatars.githubusercontent.com/u/{user_id}?v=4",
+            "type": "User",
+        }
+
+    def copilot_user(self, token: str) -> Dict[str, Any]:
+        user_id = _user_id(token)
+        body: Dict[str, Any] = {
+            "login": f"sim-{user_id}",
+            "access_type_sku": "free_limited_copilot",
+            "copilot_plan": "individual",
+            "chat_enabled": True,
+            "quota_reset_date": "2099-01-01",
+            "quota_snapshots": {
+                kind: {"entitlement": 300, "remaining": user_id % 300, "unlimited": False}
+                for kind in ("chat", "completions", "premium_interactions")
+            },
+            "organization_list": [],
+        }
+        # Pad with organizations up to the configured payload size
+        entry = {"login": "org-00000", "name": "Simulated organization 00000"}
+        missing = self.config.payload_bytes - len(json.dumps(body))
+        count = max(0, missing // (len(json.dumps(entry)) + 2))
+        body["organization_list"] = [
+            {"login": f"org-{i:05d}", "name": f"Simulated organization {i:05d}"} for i in range(count)
+        ]
+        return body
+
+    def _rate_limit(self, token: str) -> Tuple[bool, Dict[str, str]]:
+        cfg = self.config
+        if cfg.rate_limit <= 0:
+            return False, {}
+        now = time.time()
+        with self._lock:
+            start, used = self._windows.get(token, (now, 0))
+            if now - start >= cfg.rate_limit_window:
+                start, used = now, 0
+            limited = used >= cfg.rate_limit
+            if not limited:
+                used += 1
+            self._windows[token] = (start, used)
+        headers = {
+            "x-ratelimit-limit": str(cfg.rate_limit),
+            "x-ratelimit-remaining": str(cfg.rate_limit - used),
+            "x-ratelimit-used": str(used),
+            "x-ratelimit-reset": str(int(start + cfg.rate_limit_window)),
+            "x-ratelimit-resource": "core",
+        }
+        return limited, headers
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "rate_limited": self.rate_limited,
+                "bytes_sent": self.bytes_sent,
+            }
+
+    def asgi_app(self):
+        """The simulator as an ASGI app (latency is slept in a worker thread)."""
+        from starlette.concurrency import run_in_threadpool
+
+        async def app(scope, receive, send) -> None:
+            if scope["type"] != "http":
+                return
+            headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+            status, out, body = await run_in_threadpool(
+                self.respond, scope["method"], scope["path"], headers.get("authorization")
+            )
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": status,
+                    "headers": [(k.encode(), v.encode()) for k, v in out.items()],
+                }
+            )
+            await send({"type": "http.response.body", "body": body})
+
+        return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the GitHub API simulator.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=5000)
+    parser.add_argument("--rate-limit-window", type=float, default=3600.0)
+    parser.add_argument("--payload-bytes", type=int, default=2048)
+    args = parser.parse_args()
+    sim = GitHubSimulator(
+        SimulatorConfig(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+            rate_limit=args.rate_limit,
+            rate_limit_window=args.rate_limit_window,
+            payload_bytes=args.payload_bytes,
+        )
+    )
+    uvicorn.run(sim.asgi_app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
-from typing import List, Optional
+from typing import Any, List, Optional, Sequence, Tuple
 
+from sqlalchemy import Row, delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.pagination import keyset_select, split_page
+
 from .models import PluginItem
 from .schemas import PluginItemCreate, PluginItemUpdate
 
@@ -14,31 +18,104 @@ def create_item(db: Session, item: PluginItemCreate) -> PluginItem:
     return obj
 
 
-def get_items(db: Session, skip: int = 0, limit: int = 100) -> List[PluginItem]:
+def get_items(
+    db: Session, skip: int = 0, limit: int = 100, columns: Optional[Sequence[Any]] = None
+) -> List[PluginItem]:
+    if columns is not None:
+        return list(db.execute(select(*columns).offset(skip).limit(limit)))
     return db.query(PluginItem).offset(skip).limit(limit).all()
 
 
+def get_items_page(
+    db: Session,
+    after: Optional[Tuple[Any, ...]],
+    limit: int = 100,
+    sort: str = "id",
+    columns: Optional[Sequence[Any]] = None,
+) -> Tuple[List[PluginItem], Optional[str]]:
+    base = select(*columns) if columns is not None else select(PluginItem)
+    stmt = keyset_select(base, PluginItem, sort, after, limit, db.get_bind().dialect.name)
+    rows = db.execute(stmt).all() if columns is not None else list(db.scalars(stmt))
+    return split_page(rows, sort, limit)
+
+
 def get_item(db: Session, item_id: int) -> Optional[PluginItem]:
     return db.query(PluginItem).filter(PluginItem.id == item_id).first()
 
 
 def update_item(db: Session, item_id: int, item: PluginItemUpdate) -> Optional[PluginItem]:
-    obj = db.query(PluginItem).filter(PluginItem.id == item_id).first()
-    if not obj:
+    values = item.model_dump(exclude_none=True)
+    if not values:
+        return get_item(db, item_id)
+    obj = db.scalars(update(PluginItem).where(PluginItem.id == item_id).values(**values).returning(PluginItem)).first()
+    if obj is None:
         return None
-    if item.name is not None:
-        obj.name = item.name
-    if item.description is not None:
-        obj.description = item.description
+    db.expunge(obj)
     db.commit()
-    db.refresh(obj)
     return obj
 
 
-def delete_item(db: Session, item_id: int) -> bool:
-    obj = db.query(PluginItem).filter(PluginItem.id == item_id).first()
-    if not obj:
-        return False
-    db.delete(obj)
+def delete_item(db: Session, item_id: int) -> Optional[Row]:
+    """Delete one item; returns its (id, created_at), or None if there was none."""
+    stmt = delete(PluginItem).where(PluginItem.id == item_id).returning(PluginItem.id, PluginItem.created_at)
+    deleted = db.execute(stmt).first()
+    if deleted is None:
+        return None
     db.commit()
-    return True
\ No newline at end of file
+    return deleted
+
+
+# Async equivalents (AsyncSession from the "async_db_session_dep" service)
+async def create_item_async(db: AsyncSession, item: PluginItemCreate) -> PluginItem:
+    obj = PluginItem(name=item.name, description=item.description)
+    db.add(obj)
+    await db.commit()
+    await db.refresh(obj)
+    return obj
+
+
+async def get_items_async(
+    db: AsyncSession, skip: int = 0, limit: int = 100, columns: Optional[Sequence[Any]] = None
+) -> List[PluginItem]:
+    if columns is not None:
+        return list(await db.execute(select(*columns).offset(skip).limit(limit)))
+    result = await db.execute(select(PluginItem).offset(skip).limit(limit))
+    return list(result.scalars().all())
+
+
+async def get_items_page_async(
+    db: AsyncSession,
+    after: Optional[Tuple[Any, ...]],
+    limit: int = 100,
+    sort: str = "id",
+    columns: Optional[Sequence[Any]] = None,
+) -> Tuple[List[PluginItem], Optional[str]]:
+    base = select(*columns) if columns is not None else select(PluginItem)
+    stmt = keyset_select(base, PluginItem, sort, after, limit, db.get_bind().dialect.name)
+    rows = (await db.execute(stmt)).all() if columns is not None else list(await db.scalars(stmt))
+    return split_page(rows, sort, limit)
+
+
+async def get_item_async(db: AsyncSession, item_id: int) -> Optional[PluginItem]:
+    result = await db.execute(select(PluginItem).where(PluginItem.id == item_id))
+    return result.scalars().first()
+
+
+async def update_item_async(db: AsyncSession, item_id: int, item: PluginItemUpdate) -> Optional[PluginItem]:
+    values = item.model_dump(exclude_none=True)
+    if not values:
+        return await get_item_async(db, item_id)
+    stmt = update(PluginItem).where(PluginItem.id == item_id).values(**values).returning(PluginItem)
+    obj = (await db.scalars(stmt)).first()
+    if obj is None:
+        return None
+    await db.commit()
+    return obj
+
+
+async def delete_item_async(db: AsyncSession, item_id: int) -> bool:
+    deleted = await db.scalar(delete(PluginItem).where(PluginItem.id == item_id).returning(PluginItem.id))
+    if deleted is None:
+        return False
+    await db.commit()
+    return True
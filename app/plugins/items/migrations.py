@@ -0,0 +1,24 @@
+from app.migrations import Migration, add_column, create_tables, index_migration
+from app.search import index_migrations as search_index_migrations
+
+from .models import PluginItem
+
+
+MIGRATIONS = [
+    Migration(version=1, description="baseline: plugin_items", upgrade=create_tables(PluginItem.__table__)),
+    # Keyset pagination ordered by (created_at, id)
+    index_migration(2, "ix_plugin_items_created_at_id", "plugin_items", "created_at, id"),
+    # GET /plugins/items/search (v3-v7)
+    *search_index_migrations("plugin_items", 3),
+    Migration(
+        version=8,
+        description="plugin_items.updated_at",
+        upgrade=add_column(
+            "plugin_items",
+            "updated_at",
+            {"postgresql": "TIMESTAMP WITH TIME ZONE", "*": "DATETIME"},
+            backfill="created_at",
+            default={"postgresql": "now()"},
+        ),
+    ),
+]
@@ -1,12 +1,14 @@
 from fastapi import APIRouter
 
-from app.core.interfaces import ModuleInterface, ServiceRegistry, MiddlewareDef
-from app.db import engine
-from app.models import Base
+from sqlalchemy import inspect
+
+from app.core.interfaces import ModuleInterface, ServiceRegistry, MiddlewareDef, ReadinessCheck
+from app.db import SessionLocal, engine
+from app.responses import fast_json_enabled
 
 from .middleware import ItemsMiddleware
 from .routes import build_router
-from .services import count_items, ItemsService
+from .services import count_items, count_items_async, ItemsService
 
 
 class Plugin(ModuleInterface):
@@ -24,17 +26,25 @@ class Plugin(ModuleInterface):
 
         # Get DB dependency from registry
         self._db_dep = registry.get_service("db_session_dep")
-        self.router = build_router(self._db_dep)
+        self.router = build_router(
+            self._db_dep,
+            registry.get_service("read_db_session_dep"),
+            publish=registry.publish,
+            fast_json=fast_json_enabled(self.name),
+            async_read_db_dep=registry.get_service("async_read_db_session_dep"),
+        )
 
         # Initialize services provided to the registry
         self._services = {
-            "plugin_items.count": count_items,
-            "plugin_items.service": ItemsService(registry.get_service("db_session_dep")),
+            # Served from the analytics plugin's maintained counter when it is running
+            "plugin_items.count": lambda db: count_items(db, registry.get_service("analytics.counters")),
+            "plugin_items.count_async": count_items_async,
+            # A session factory: the request dependency is a generator, not a context manager
+            "plugin_items.service": ItemsService(SessionLocal, publish=registry.publish),
         }
 
     def start(self) -> None:
-        # Create tables once the application has started and DB is ready
-        Base.metadata.create_all(bind=engine)
+        pass
 
     def stop(self) -> None:
         pass
@@ -45,5 +55,13 @@ class Plugin(ModuleInterface):
     def provides(self):
         return self._services
 
+    def migrations(self):
+        from .migrations import MIGRATIONS
+
+        return MIGRATIONS
+
     def middlewares(self):
-        return [MiddlewareDef(cls=ItemsMiddleware)]
\ No newline at end of file
+        return [MiddlewareDef(cls=ItemsMiddleware)]
+
+    def readiness_checks(self):
+        return [ReadinessCheck(name="table", check=lambda: inspect(engine).has_table("plugin_items"))]
\ No newline at end of file
@@ -1,27 +1,140 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, List, Literal, Optional, Union
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from .schemas import PluginItemCreate, PluginItemUpdate, PluginItemRead
-from .crud import create_item, get_items, get_item, update_item, delete_item
+from app import bulk
+from app.conditional import Validators, conditional_get
+from app.config import BULK_COPY_THRESHOLD, BULK_MAX_BYTES, BULK_MAX_ITEMS, TRANSFER_BATCH_SIZE
+from app.db import SessionLocal, get_async_read_db, read_engine
+from app.events import ITEMS_CREATED, ITEMS_DELETED, creation_days, publish_items
+from app.pagination import InvalidCursor, decode_cursor
+from app.responses import FastJSONResponse, RowSerializer
+from app.schemas import BulkResult
+from app.search import search_items
+from app.transfer import MEDIA_TYPES, ImportResponse, export_rows, import_rows
+
+from .models import PluginItem
+from .schemas import (
+    PluginItemBulkUpdate,
+    PluginItemCreate,
+    PluginItemPage,
+    PluginItemRead,
+    PluginItemSearchPage,
+    PluginItemUpdate,
+)
+from .crud import create_item, get_items_async, get_items_page_async, get_item_async, update_item, delete_item
+
+
+def build_router(db_dep, read_db_dep=None, publish=None, fast_json=False, async_read_db_dep=None) -> APIRouter:
+    """Items routes; `publish` (the registry event bus) receives ITEMS_CREATED/ITEMS_DELETED.
 
+    List and single-item reads are async (`async_read_db_dep`, by default the
+    replica-routed `get_async_read_db`); search and writes use the sync sessions.
 
-def build_router(db_dep) -> APIRouter:
-    router = APIRouter()
+    With `fast_json`, responses render with orjson and the list route skips
+    per-row `response_model` validation.
+    """
+    router = APIRouter(default_response_class=FastJSONResponse) if fast_json else APIRouter()
+    read_db_dep = read_db_dep or db_dep
+    async_read_db_dep = async_read_db_dep or get_async_read_db
+    item_rows = RowSerializer(PluginItemRead)
+    bulk_rows = bulk.json_array_body(BULK_MAX_BYTES)
 
     @router.post("/", response_model=PluginItemRead)
     def create(item: PluginItemCreate, db: Session = Depends(db_dep)):
-        return create_item(db, item)
+        obj = create_item(db, item)
+        publish_items(publish, ITEMS_CREATED, "plugin_items")
+        return obj
+
+    @router.get("/", response_model=Union[list[PluginItemRead], PluginItemPage])
+    async def read(
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[str] = None,
+        sort: Literal["id", "created_at"] = "id",
+        db: AsyncSession = Depends(async_read_db_dep),
+    ):
+        columns = item_rows.columns(PluginItem) if fast_json else None
+        if after is None:
+            items = await get_items_async(db, skip, limit, columns=columns)
+            return item_rows.response(items) if fast_json else items
+        try:
+            cursor = decode_cursor(after, sort)
+        except InvalidCursor as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        items, next_cursor = await get_items_page_async(db, cursor, limit, sort, columns=columns)
+        if fast_json:
+            return FastJSONResponse({"items": item_rows.rows(items), "next_cursor": next_cursor})
+        return {"items": items, "next_cursor": next_cursor}
+
+    @router.get("/search", response_model=PluginItemSearchPage)
+    def search(
+        q: str = Query(..., min_length=1, max_length=200),
+        mode: Literal["fulltext", "prefix", "substring"] = "fulltext",
+        limit: int = Query(20, ge=1, le=100),
+        after: Optional[str] = None,
+        db: Session = Depends(read_db_dep),
+    ):
+        try:
+            hits, next_cursor = search_items(db, PluginItem, q, mode, after, limit)
+        except InvalidCursor as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        items = [{**PluginItemRead.model_validate(obj).model_dump(), "rank": rank} for obj, rank in hits]
+        return {"items": items, "next_cursor": next_cursor}
 
-    @router.get("/", response_model=list[PluginItemRead])
-    def read(skip: int = 0, limit: int = 100, db: Session = Depends(db_dep)):
-        return get_items(db, skip, limit)
+    @router.get("/export")
+    def export(fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format")):
+        return StreamingResponse(
+            export_rows(read_engine(), PluginItem, item_rows, fmt, TRANSFER_BATCH_SIZE),
+            media_type=MEDIA_TYPES[fmt],
+            headers={"Content-Disposition": f'attachment; filename="plugin_items.{fmt}"'},
+        )
+
+    @router.post("/import")
+    async def import_(request: Request, fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format")):
+        def created(count: int) -> None:
+            publish_items(publish, ITEMS_CREATED, "plugin_items", count)
+
+        events = import_rows(
+            request.stream(), fmt, SessionLocal, PluginItem, PluginItemCreate, TRANSFER_BATCH_SIZE, on_batch=created
+        )
+        return ImportResponse(events)
+
+    @router.post("/bulk", response_model=BulkResult)
+    def create_bulk(rows: List[Any] = Depends(bulk_rows), atomic: bool = False, db: Session = Depends(db_dep)):
+        bulk.ensure_batch_size(rows, BULK_MAX_ITEMS)
+        result = bulk.bulk_create(
+            db, PluginItem, PluginItemCreate, rows, copy_threshold=BULK_COPY_THRESHOLD, atomic=atomic
+        )
+        publish_items(publish, ITEMS_CREATED, "plugin_items", result["succeeded"])
+        return result
+
+    @router.patch("/bulk", response_model=BulkResult)
+    def update_bulk(rows: List[Any] = Depends(bulk_rows), atomic: bool = False, db: Session = Depends(db_dep)):
+        bulk.ensure_batch_size(rows, BULK_MAX_ITEMS)
+        return bulk.bulk_update(db, PluginItem, PluginItemBulkUpdate, rows, atomic=atomic)
+
+    @router.delete("/bulk", response_model=BulkResult)
+    def delete_bulk(ids: List[Any] = Depends(bulk_rows), atomic: bool = False, db: Session = Depends(db_dep)):
+        bulk.ensure_batch_size(ids, BULK_MAX_ITEMS)
+        result = bulk.bulk_delete(db, PluginItem, ids, atomic=atomic)
+        publish_items(publish, ITEMS_DELETED, "plugin_items", result["succeeded"], result.get("days"))
+        return result
 
     @router.get("/{item_id}", response_model=PluginItemRead)
-    def read_one(item_id: int, db: Session = Depends(db_dep)):
-        obj = get_item(db, item_id)
+    async def read_one(
+        item_id: int, request: Request, response: Response, db: AsyncSession = Depends(async_read_db_dep)
+    ):
+        obj = await get_item_async(db, item_id)
         if not obj:
             raise HTTPException(status_code=404, detail="Item not found")
-        return obj
+        modified = obj.updated_at or obj.created_at
+        validators = Validators.for_version("plugin_items", item_id, modified, modified=modified)
+        not_modified = conditional_get(request, response, validators, "plugin_items")
+        return not_modified if not_modified is not None else obj
 
     @router.put("/{item_id}", response_model=PluginItemRead)
     def update(item_id: int, item: PluginItemUpdate, db: Session = Depends(db_dep)):
@@ -32,9 +145,10 @@ def build_router(db_dep) -> APIRouter:
 
     @router.delete("/{item_id}")
     def delete(item_id: int, db: Session = Depends(db_dep)):
-        ok = delete_item(db, item_id)
-        if not ok:
+        deleted = delete_item(db, item_id)
+        if deleted is None:
             raise HTTPException(status_code=404, detail="Item not found")
+        publish_items(publish, ITEMS_DELETED, "plugin_items", days=creation_days([deleted.created_at]))
         return {"status": "deleted"}
 
     return router
\ No newline at end of file
@@ -18,9 +18,28 @@ class PluginItemUpdate(BaseModel):
     description: Optional[str] = None
 
 
+class PluginItemBulkUpdate(PluginItemUpdate):
+    id: int
+
+
 class PluginItemRead(PluginItemBase):
     id: int
     created_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class PluginItemPage(BaseModel):
+    items: list[PluginItemRead]
+    next_cursor: Optional[str] = None
+
+
+class PluginItemSearchHit(PluginItemRead):
+    rank: float
+
+
+class PluginItemSearchPage(BaseModel):
+    items: list[PluginItemSearchHit]
+    next_cursor: Optional[str] = None
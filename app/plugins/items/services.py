@@ -1,21 +1,37 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .models import PluginItem
 
 
-def count_items(db: Session) -> int:
+def count_items(db: Session, counters=None) -> int:
+    """Row count from maintained `counters` (analytics plugin) if available, else `COUNT(*)`."""
+    if counters is not None:
+        value = counters.get(PluginItem.__tablename__)
+        if value is not None:
+            return value
     return db.query(PluginItem).count()
 
 
+async def count_items_async(db: AsyncSession) -> int:
+    return (await db.execute(select(func.count()).select_from(PluginItem))).scalar_one()
+
+
 class ItemsService:
-    def __init__(self, db_factory):
+    def __init__(self, db_factory, publish=None):
         self._db_factory = db_factory
+        self._publish = publish
 
     def create_default(self, name: str) -> int:
         """Example service: create a default item and return its id."""
+        from app.events import ITEMS_CREATED, publish_items
+
         from .crud import create_item
         from .schemas import PluginItemCreate
 
         with self._db_factory() as db:
             obj = create_item(db, PluginItemCreate(name=name))
-            return obj.id
\ No newline at end of file
+        # Same event as the routes, so maintained counters see service writes too
+        publish_items(self._publish, ITEMS_CREATED, "plugin_items")
+        return obj.id
\ No newline at end of file
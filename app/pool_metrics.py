@@ -0,0 +1,147 @@
+"""Connection pool telemetry collected from SQLAlchemy pool events."""
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+# Upper bounds (ms) of the checkout wait-time histogram buckets; the last bucket is open-ended
+WAIT_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    """Thread-safe counters and checkout wait-time histogram for one pool."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._engine: Optional[Engine] = None
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters = {
+                "connects": 0,
+                "checkouts": 0,
+                "checkins": 0,
+                "invalidations": 0,
+                "soft_invalidations": 0,
+                "closes": 0,
+                "checkout_timeouts": 0,
+            }
+            self._buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+            self._wait_total = 0.0
+            self._wait_max = 0.0
+            self._wait_count = 0
+
+    def _incr(self, key: str) -> None:
+        with self._lock:
+            self.counters[key] += 1
+
+    def observe_wait(self, seconds: float, timed_out: bool = False) -> None:
+        ms = seconds * 1000.0
+        with self._lock:
+            self._buckets[bisect.bisect_left(WAIT_BUCKETS_MS, ms)] += 1
+            self._wait_total += ms
+            self._wait_max = max(self._wait_max, ms)
+            self._wait_count += 1
+            if timed_out:
+                self.counters["checkout_timeouts"] += 1
+
+    def attach(self, engine: Engine) -> None:
+        """Subscribe to the engine's pool events and let the pool report wait times."""
+        self._engine = engine
+        pool = engine.pool
+        if isinstance(pool, _InstrumentedPoolMixin):
+            pool.metrics = self
+        event.listen(engine, "connect", lambda *a: self._incr("connects"))
+        event.listen(engine, "checkout", lambda *a: self._incr("checkouts"))
+        event.listen(engine, "checkin", lambda *a: self._incr("checkins"))
+        event.listen(engine, "invalidate", lambda *a: self._incr("invalidations"))
+        event.listen(engine, "soft_invalidate", lambda *a: self._incr("soft_invalidations"))
+        event.listen(engine, "close", lambda *a: self._incr("closes"))
+
+    def _pool_state(self) -> Dict[str, Any]:
+        pool = self._engine.pool if self._engine is not None else None
+        if not isinstance(pool, QueuePool):
+            return {"class": type(pool).__name__ if pool is not None else None}
+        return {
+            "class": type(pool).__name__,
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            # Negative while the pool is still below `size` connections
+            "overflow": pool.overflow(),
+            "max_overflow": pool._max_overflow,
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """Compact view used in the health output."""
+        with self._lock:
+            avg = self._wait_total / self._wait_count if self._wait_count else 0.0
+            out = {
+                "checkouts": self.counters["checkouts"],
+                "invalidations": self.counters["invalidations"],
+                "checkout_timeouts": self.counters["checkout_timeouts"],
+                "wait_avg_ms": round(avg, 3),
+                "wait_max_ms": round(self._wait_max, 3),
+            }
+        out.update(self._pool_state())
+        return out
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Full statistics for the admin endpoint."""
+        with self._lock:
+            buckets = {f"le_{b}": n for b, n in zip(WAIT_BUCKETS_MS, self._buckets)}
+            buckets["inf"] = self._buckets[-1]
+            out = {
+                "name": self.name,
+                "counters": dict(self.counters),
+                "wait_ms": {
+                    "count": self._wait_count,
+                    "total": round(self._wait_total, 3),
+                    "max": round(self._wait_max, 3),
+                    "histogram": buckets,
+                },
+            }
+        out["pool"] = self._pool_state()
+        return out
+
+
+class _InstrumentedPoolMixin:
+    """Times `_do_get`, i.e. how long a caller waited for a connection."""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe_wait(time.perf_counter() - started, timed_out)
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep reporting to the same metrics
+        new_pool = super().recreate()
+        new_pool.metrics = self.metrics
+        return new_pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
@@ -0,0 +1,167 @@
+"""Read-replica routing with lag-based ejection and read-your-writes."""
+from __future__ import annotations
+
+import contextvars
+import itertools
+import logging
+import threading
+import time
+from http.cookies import SimpleCookie
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger("db.replicas")
+
+# Set for requests that must read from the primary (recent write by the same client)
+prefer_primary: contextvars.ContextVar[bool] = contextvars.ContextVar("prefer_primary", default=False)
+
+_PG_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class Replica:
+    def __init__(self, name: str, engine: Engine) -> None:
+        self.name = name
+        self.engine = engine
+        self.healthy = True
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "lag_s": self.lag,
+            "error": self.error,
+            "checked_at": self.checked_at,
+        }
+
+
+class ReplicaRouter:
+    """Round-robin over healthy replicas; replicas lagging more than `max_lag` are ejected."""
+
+    def __init__(self, engines: List[Engine], max_lag: float = 5.0, check_interval: float = 5.0) -> None:
+        self.replicas = [Replica(f"replica{i}", eng) for i, eng in enumerate(engines)]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._counter = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def pick(self) -> Optional[Engine]:
+        """Next healthy replica engine, or None to fall back to the primary."""
+        healthy = [r for r in self.replicas if r.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)].engine
+
+    def measure_lag(self, replica: Replica) -> float:
+        with replica.engine.connect() as conn:
+            if replica.engine.dialect.name == "postgresql":
+                return float(conn.execute(_PG_LAG_SQL).scalar() or 0.0)
+            conn.execute(text("SELECT 1"))
+            return 0.0
+
+    def check(self) -> None:
+        for replica in self.replicas:
+            try:
+                replica.lag = self.measure_lag(replica)
+                replica.error = None
+                healthy = replica.lag <= self.max_lag
+            except Exception as exc:
+                replica.lag, replica.error = None, f"{type(exc).__name__}: {exc}"
+                healthy = False
+            if healthy != replica.healthy:
+                logger.warning(
+                    "%s replica %s (lag=%s, error=%s)",
+                    "Readmitting" if healthy else "Ejecting",
+                    replica.name,
+                    replica.lag,
+                    replica.error,
+                )
+            replica.healthy = healthy
+            replica.checked_at = time.time()
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [r.as_dict() for r in self.replicas]
+
+    def start(self) -> None:
+        if not self.replicas or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="replica-lag", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.check_interval + 1)
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.check()
+            self._stop.wait(self.check_interval)
+
+
+class ReadConsistencyMiddleware:
+    """Pure ASGI middleware implementing read-your-writes for replica routing.
+
+    Any non-read request sets a short-lived cookie; reads carrying it (or the
+    `X-Read-Consistency: primary` header) are pinned to the primary until the
+    window has passed and replicas have caught up.
+    """
+
+    cookie_name = "db_primary_until"
+    _read_methods = {"GET", "HEAD", "OPTIONS"}
+
+    def __init__(self, app, window: float = 5.0) -> None:
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if scope["method"] in self._read_methods:
+            token = prefer_primary.set(self._pinned(scope))
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                prefer_primary.reset(token)
+            return
+
+        until = int(time.time() + self.window) + 1
+        cookie = f"{self.cookie_name}={until}; Max-Age={int(self.window) + 1}; Path=/; HttpOnly; SameSite=Lax"
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+    def _pinned(self, scope) -> bool:
+        for key, value in scope.get("headers", []):
+            if key == b"x-read-consistency" and value.lower() == b"primary":
+                return True
+            if key == b"cookie":
+                morsel = SimpleCookie(value.decode("latin-1")).get(self.cookie_name)
+                if morsel is not None:
+                    try:
+                        return float(morsel.value) > time.time()
+                    except ValueError:
+                        return False
+        return False
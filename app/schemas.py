@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel
 
@@ -18,9 +18,41 @@ class ItemUpdate(BaseModel):
     description: Optional[str] = None
 
 
+class ItemBulkUpdate(ItemUpdate):
+    id: int
+
+
 class ItemRead(ItemBase):
     id: int
     created_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ItemPage(BaseModel):
+    items: List[ItemRead]
+    next_cursor: Optional[str] = None
+
+
+class ItemSearchHit(ItemRead):
+    rank: float
+
+
+class ItemSearchPage(BaseModel):
+    items: List[ItemSearchHit]
+    next_cursor: Optional[str] = None
+
+
+class BulkRowResult(BaseModel):
+    index: int
+    status: Literal["created", "updated", "deleted", "skipped", "error"]
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkRowResult]
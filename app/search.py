@@ -0,0 +1,140 @@
+"""Ranked item search shared by the core and plugin item endpoints.
+
+Three modes, each ordered by relevance (rank DESC, id ASC) and paginated
+with a keyset cursor over that pair:
+
+- `fulltext`: `websearch_to_tsquery` against a GIN-indexed `tsvector` of
+  name + description, ranked with `ts_rank_cd`.
+- `prefix`: `lower(name) LIKE 'q%'` on a `text_pattern_ops` B-tree index,
+  ranked by trigram similarity (closer names first).
+- `substring`: `ILIKE '%q%'` on name or description using `pg_trgm` GIN
+  indexes, ranked by `word_similarity`.
+
+Other backends (SQLite in tests) use plain `LIKE` filters with a simple
+term-match rank; results are correct but unindexed.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Float, and_, case, cast, func, literal, literal_column, or_, select
+from sqlalchemy.orm import Session
+
+from .migrations import Migration, index_migration, run_sql
+from .pagination import InvalidCursor, decode_key, encode_cursor
+
+
+SEARCH_MODES = ("fulltext", "prefix", "substring")
+# Text search configuration baked into the tsvector index expression; queries
+# must use the same one for the planner to match the index
+TS_CONFIG = "english"
+
+
+def _vector_sql(table: str = "") -> str:
+    prefix = f"{table}." if table else ""
+    return (
+        f"to_tsvector('{TS_CONFIG}', coalesce({prefix}name, '') || ' ' || coalesce({prefix}description, ''))"
+    )
+
+
+def index_migrations(table: str, first_version: int) -> List[Migration]:
+    """Migrations adding the search indexes to `table` (Postgres only; no-ops elsewhere)."""
+    pg = ("postgresql",)
+    v = first_version
+    return [
+        Migration(
+            version=v,
+            description="pg_trgm extension for substring search",
+            upgrade=run_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm", dialects=pg),
+        ),
+        index_migration(v + 1, f"ix_{table}_search_tsv", table, _vector_sql(), using="gin", dialects=pg),
+        index_migration(v + 2, f"ix_{table}_name_trgm", table, "name gin_trgm_ops", using="gin", dialects=pg),
+        index_migration(
+            v + 3, f"ix_{table}_description_trgm", table, "description gin_trgm_ops", using="gin", dialects=pg
+        ),
+        index_migration(v + 4, f"ix_{table}_name_prefix", table, "lower(name) text_pattern_ops", dialects=pg),
+    ]
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _pg_filter_and_rank(model, q: str, mode: str):
+    name, description = model.name, model.description
+    if mode == "fulltext":
+        vector = literal_column(_vector_sql(model.__tablename__))
+        query = func.websearch_to_tsquery(literal_column(f"'{TS_CONFIG}'"), q)
+        return vector.op("@@")(query), cast(func.ts_rank_cd(vector, query), Float)
+    if mode == "prefix":
+        return (
+            func.lower(name).like(_escape_like(q.lower()) + "%", escape="\\"),
+            cast(func.similarity(name, q), Float),
+        )
+    pattern = f"%{_escape_like(q)}%"
+    return (
+        or_(name.ilike(pattern, escape="\\"), description.ilike(pattern, escape="\\")),
+        cast(
+            func.greatest(
+                func.word_similarity(q, name), func.word_similarity(q, func.coalesce(description, ""))
+            ),
+            Float,
+        ),
+    )
+
+
+def _fallback_filter_and_rank(model, q: str, mode: str):
+    name, description = model.name, func.coalesce(model.description, "")
+    if mode == "prefix":
+        # Share of the name covered by the prefix: exact matches rank first
+        return (
+            func.lower(name).like(_escape_like(q.lower()) + "%", escape="\\"),
+            cast(literal(len(q)), Float) / func.max(func.length(name), 1),
+        )
+    terms = [q] if mode == "substring" else re.findall(r"\w+", q) or [q]
+    conditions, scores = [], []
+    for term in terms:
+        pattern = f"%{_escape_like(term.lower())}%"
+        in_name = func.lower(name).like(pattern, escape="\\")
+        in_description = func.lower(description).like(pattern, escape="\\")
+        conditions.append(or_(in_name, in_description))
+        # Name matches weigh twice as much as description matches
+        scores.append(case((in_name, 1.0), else_=0.5))
+    rank = sum(scores[1:], scores[0]) / float(len(terms))
+    return and_(*conditions), cast(rank, Float)
+
+
+def decode_search_cursor(cursor: Optional[str], mode: str) -> Optional[Tuple[float, int]]:
+    if not cursor:
+        return None
+    key = decode_key(cursor, f"search:{mode}")
+    try:
+        rank, row_id = key
+        return float(rank), int(row_id)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("malformed cursor") from exc
+
+
+def search_items(
+    db: Session, model, q: str, mode: str = "fulltext", after: Optional[str] = None, limit: int = 20
+) -> Tuple[List[Tuple[Any, float]], Optional[str]]:
+    """One page of (row, rank) matches for `q`; returns (hits, next_cursor)."""
+    if mode not in SEARCH_MODES:
+        raise InvalidCursor(f"mode must be one of {SEARCH_MODES}")
+    key = decode_search_cursor(after, mode)
+    if db.get_bind().dialect.name == "postgresql":
+        condition, rank = _pg_filter_and_rank(model, q, mode)
+    else:
+        condition, rank = _fallback_filter_and_rank(model, q, mode)
+    stmt = select(model, rank.label("rank")).where(condition)
+    if key is not None:
+        # Keyset over (rank DESC, id ASC); ranks are recomputed identically per query
+        stmt = stmt.where(or_(rank < key[0], and_(rank == key[0], model.id > key[1])))
+    rows: Sequence[Any] = db.execute(stmt.order_by(rank.desc(), model.id).limit(limit + 1)).all()
+    hits = [(row[0], float(row[1] or 0.0)) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last, last_rank = hits[-1]
+        next_cursor = encode_cursor(f"search:{mode}", (last_rank, last.id))
+    return hits, next_cursor
@@ -0,0 +1,504 @@
+"""Request-scoped tracing: span trees, slow-request/slow-query logs and OTLP export.
+
+`TracingMiddleware` opens a trace per HTTP request (continuing an incoming
+W3C `traceparent`). Nested spans come from:
+
+- every user middleware and route handler (`instrument_middleware`,
+  `instrument_routes`),
+- SQL statements on any engine (`instrument_engines`, cursor events),
+- code wrapped in `span(...)`, such as the GitHub calls and token
+  encryption in the copilot_metrics plugin.
+
+The current trace and span live in context variables, so spans opened in the
+threadpool (sync endpoints and dependencies) nest under the request.
+
+Statements are logged and exported with their literals replaced by `?` and
+only the types of their parameters. Finished traces are exported as OTLP/JSON
+(`ExportTraceServiceRequest`) lines to a file, to an OTLP/HTTP collector, or
+both. Export runs on a background thread with a bounded queue.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from fastapi import FastAPI
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.middleware import Middleware
+from starlette.routing import BaseRoute
+
+from .config import (
+    TRACING_ENABLED,
+    TRACING_MAX_SPANS,
+    TRACING_OTLP_ENDPOINT,
+    TRACING_OTLP_FILE,
+    TRACING_SAMPLE_RATE,
+    TRACING_SERVICE_NAME,
+    TRACING_SLOW_QUERY_MS,
+    TRACING_SLOW_REQUEST_MS,
+)
+
+
+logger = logging.getLogger("app.tracing")
+
+# Longest statement text kept in spans and logs
+MAX_STATEMENT_CHARS = 2000
+# OTLP SpanKind values
+SPAN_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+@dataclass
+class Span:
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    _t0: int = field(default_factory=time.perf_counter_ns, repr=False)
+
+    def finish(self) -> None:
+        # Wall-clock start, monotonic duration
+        self.end_ns = self.start_ns + (time.perf_counter_ns() - self._t0)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class Trace:
+    """Spans of one request, in start order; at most `max_spans` are kept."""
+
+    def __init__(self, trace_id: Optional[str] = None, max_spans: int = 1000) -> None:
+        self.trace_id = trace_id or _new_id(16)
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+        self.dropped = 0
+
+    def start_span(
+        self, name: str, kind: str = "internal", parent_id: Optional[str] = None, attributes: Optional[dict] = None
+    ) -> Span:
+        span = Span(name, kind, self.trace_id, _new_id(8), parent_id, time.time_ns(), attributes=dict(attributes or {}))
+        if len(self.spans) < self.max_spans:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+        return span
+
+    @property
+    def root(self) -> Optional[Span]:
+        return self.spans[0] if self.spans else None
+
+    def tree(self) -> str:
+        """Indented span tree with durations, for logs."""
+        children: Dict[Optional[str], List[Span]] = {}
+        for s in self.spans:
+            children.setdefault(s.parent_id, []).append(s)
+        lines: List[str] = []
+
+        def walk(span: Span, depth: int) -> None:
+            detail = span.attributes.get("db.statement", "")
+            suffix = f"  {detail[:200]}" if detail else ""
+            error = f"  ERROR {span.error}" if span.error else ""
+            lines.append(f"{span.duration_ms:10.2f} ms  {'  ' * depth}{span.name}{suffix}{error}")
+            for child in children.get(span.span_id, []):
+                walk(child, depth + 1)
+
+        root = self.root
+        if root is not None:
+            walk(root, 0)
+        if self.dropped:
+            lines.append(f"({self.dropped} spans dropped)")
+        return "\n".join(lines)
+
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+_span: ContextVar[Optional[Span]] = ContextVar("span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes: Any) -> Iterator[Optional[Span]]:
+    """Child span of the current one; a no-op (yields None) outside a traced request."""
+    trace = _trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _span.get()
+    s = trace.start_span(name, kind, parent.span_id if parent else None, attributes)
+    token = _span.set(s)
+    try:
+        yield s
+    except BaseException as exc:
+        s.error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        _span.reset(token)
+        s.finish()
+
+
+def annotate(**attributes: Any) -> None:
+    """Add attributes to the current span, if any."""
+    s = _span.get()
+    if s is not None:
+        s.attributes.update(attributes)
+
+
+# Redaction
+# Quoted strings and bare numbers, but not placeholders ($1, :name, %(name)s) or identifiers
+_LITERALS = re.compile(r"'(?:[^']|'')*'|(?<![\w$:%.])\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def redact_statement(statement: str) -> str:
+    text = _LITERALS.sub("?", _WHITESPACE.sub(" ", statement).strip())
+    return text if len(text) <= MAX_STATEMENT_CHARS else text[:MAX_STATEMENT_CHARS] + "..."
+
+
+def redact_parameters(parameters: Any, executemany: bool = False) -> Any:
+    """Parameter types only (values never leave the process)."""
+    if executemany and isinstance(parameters, (list, tuple)):
+        return f"<{len(parameters)} rows>"
+    if isinstance(parameters, dict):
+        return {k: type(v).__name__ for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(v).__name__ for v in parameters]
+    return type(parameters).__name__
+
+
+# Export
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": value if isinstance(value, str) else json.dumps(value, default=str)}
+
+
+def _otlp_span(s: Span) -> Dict[str, Any]:
+    out: Dict[str, Any] = {
+        "traceId": s.trace_id,
+        "spanId": s.span_id,
+        "name": s.name,
+        "kind": SPAN_KINDS.get(s.kind, 1),
+        "startTimeUnixNano": str(s.start_ns),
+        "endTimeUnixNano": str(s.end_ns or s.start_ns),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+        "status": {"code": 2, "message": s.error} if s.error else {"code": 0},
+    }
+    if s.parent_id:
+        out["parentSpanId"] = s.parent_id
+    return out
+
+
+def to_otlp(traces: List[Trace], service_name: str = TRACING_SERVICE_NAME) -> Dict[str, Any]:
+    """An OTLP/JSON `ExportTraceServiceRequest` for `traces`."""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "app.tracing"},
+                        "spans": [_otlp_span(s) for t in traces for s in t.spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class OTLPExporter:
+    """Batches finished traces on a background thread; drops them when the queue is full."""
+
+    def __init__(
+        self,
+        file_path: str = "",
+        endpoint: str = "",
+        service_name: str = TRACING_SERVICE_NAME,
+        batch_size: int = 64,
+        interval: float = 2.0,
+        max_queue: int = 2048,
+    ) -> None:
+        self.file_path = file_path
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.exported = self.dropped = self.failed = 0
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.file_path or self.endpoint)
+
+    def submit(self, trace: Trace) -> None:
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self) -> None:
+        if not self.configured or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="trace-export", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
+        self.flush()
+
+    def flush(self) -> None:
+        while True:
+            batch = self._drain()
+            if not batch:
+                return
+            self.export(batch)
+
+    def export(self, traces: List[Trace]) -> None:
+        body = to_otlp(traces, self.service_name)
+        try:
+            if self.file_path:
+                with open(self.file_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(body, separators=(",", ":")) + "\n")
+            if self.endpoint:
+                import httpx
+
+                httpx.post(self.endpoint, json=body, timeout=5.0).raise_for_status()
+            self.exported += len(traces)
+        except Exception:
+            self.failed += len(traces)
+            logger.warning("Trace export failed", exc_info=True)
+
+    def _drain(self) -> List[Trace]:
+        batch: List[Trace] = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+
+class Tracer:
+    def __init__(
+        self,
+        enabled: bool = TRACING_ENABLED,
+        sample_rate: float = TRACING_SAMPLE_RATE,
+        slow_request_ms: float = TRACING_SLOW_REQUEST_MS,
+        slow_query_ms: float = TRACING_SLOW_QUERY_MS,
+        max_spans: int = TRACING_MAX_SPANS,
+        exporter: Optional[OTLPExporter] = None,
+    ) -> None:
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.slow_request_ms = slow_request_ms
+        self.slow_query_ms = slow_query_ms
+        self.max_spans = max_spans
+        self.exporter = exporter or OTLPExporter(TRACING_OTLP_FILE, TRACING_OTLP_ENDPOINT)
+
+    def finish(self, trace: Trace) -> None:
+        root = trace.root
+        if root is None:
+            return
+        if self.slow_request_ms and root.duration_ms >= self.slow_request_ms:
+            logger.warning(
+                "Slow request %s (%.1f ms, trace %s)\n%s", root.name, root.duration_ms, trace.trace_id, trace.tree()
+            )
+        if self.exporter.configured and random.random() < self.sample_rate:
+            self.exporter.submit(trace)
+
+    # SQL statements
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        trace = _trace.get()
+        s = None
+        if trace is not None:
+            parent = _span.get()
+            s = trace.start_span(
+                f"db {statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'statement'}",
+                "client",
+                parent.span_id if parent else None,
+                {"db.system": conn.dialect.name, "db.statement": redact_statement(statement)},
+            )
+        conn.info.setdefault("trace_stack", []).append((time.perf_counter(), s))
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        stack = conn.info.get("trace_stack")
+        if not stack:
+            return
+        t0, s = stack.pop()
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        if s is not None:
+            if cursor.rowcount is not None and cursor.rowcount >= 0:
+                s.attributes["db.rows"] = cursor.rowcount
+            s.finish()
+        if self.slow_query_ms and elapsed_ms >= self.slow_query_ms:
+            trace = _trace.get()
+            logger.warning(
+                "Slow query (%.1f ms%s): %s params=%s",
+                elapsed_ms,
+                f", trace {trace.trace_id}" if trace is not None else "",
+                redact_statement(statement),
+                redact_parameters(parameters, executemany),
+            )
+
+    def _handle_error(self, exception_context) -> None:
+        conn = exception_context.connection
+        stack = conn.info.get("trace_stack") if conn is not None else None
+        if not stack:
+            return
+        _, s = stack.pop()
+        if s is not None:
+            s.error = f"{type(exception_context.original_exception).__name__}: {exception_context.original_exception}"
+            s.finish()
+
+    def instrument_engines(self) -> None:
+        """Time statements on every engine (sync, replica and the async engine's sync core)."""
+        if event.contains(Engine, "before_cursor_execute", self._before_cursor_execute):
+            return
+        event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(Engine, "handle_error", self._handle_error)
+
+    def uninstrument_engines(self) -> None:
+        if event.contains(Engine, "before_cursor_execute", self._before_cursor_execute):
+            event.remove(Engine, "before_cursor_execute", self._before_cursor_execute)
+            event.remove(Engine, "after_cursor_execute", self._after_cursor_execute)
+            event.remove(Engine, "handle_error", self._handle_error)
+
+
+tracer = Tracer()
+
+
+# ASGI
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware: one trace per HTTP request, rooted in a server span.
+
+    Add it last so it is the outermost user middleware.
+    """
+
+    def __init__(self, app, tracer: Tracer = tracer) -> None:
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+        trace_id = parent_id = None
+        for key, value in scope.get("headers", []):
+            if key == b"traceparent":
+                match = _TRACEPARENT.match(value.decode("latin-1").strip())
+                if match:
+                    trace_id, parent_id = match.groups()
+        trace = Trace(trace_id, self.tracer.max_spans)
+        root = trace.start_span(
+            f"{scope['method']} {scope['path']}",
+            "server",
+            parent_id,
+            {"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        trace_token, span_token = _trace.set(trace), _span.set(root)
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-trace-id", trace.trace_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace)
+        except BaseException as exc:
+            root.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            _span.reset(span_token)
+            _trace.reset(trace_token)
+            root.finish()
+            self.tracer.finish(trace)
+
+
+class _TracedASGI:
+    """Wraps an ASGI app (a middleware or a route handler) in a span."""
+
+    def __init__(self, app, name: str, route: Optional[str] = None) -> None:
+        self.app = app
+        self.name = name
+        self.route = route
+
+    async def __call__(self, scope, receive, send):
+        trace = _trace.get()
+        if trace is None:
+            await self.app(scope, receive, send)
+            return
+        if self.route is not None and trace.root is not None:
+            # Name the request after the matched route template (low cardinality)
+            trace.root.name = f"{scope.get('method', '')} {self.route}"
+            trace.root.attributes["http.route"] = self.route
+        with span(self.name):
+            await self.app(scope, receive, send)
+
+
+class _TracedMiddleware:
+    def __init__(self, app, *args: Any, _middleware_cls: Any, **kwargs: Any) -> None:
+        self._asgi = _TracedASGI(_middleware_cls(app, *args, **kwargs), f"middleware {_middleware_cls.__name__}")
+
+    async def __call__(self, scope, receive, send):
+        await self._asgi(scope, receive, send)
+
+
+def instrument_middleware(app: FastAPI) -> None:
+    """Give every user middleware registered so far its own span (before the stack is built)."""
+    app.user_middleware = [
+        m if m.cls in (TracingMiddleware, _TracedMiddleware) else Middleware(
+            _TracedMiddleware, *m.args, _middleware_cls=m.cls, **m.kwargs
+        )
+        for m in app.user_middleware
+    ]
+
+
+def instrument_routes(app: FastAPI) -> None:
+    """Give every route handler (dependencies, endpoint and response) a span; idempotent."""
+    routes: List[BaseRoute] = app.router.routes
+    for route in routes:
+        handler = getattr(route, "app", None)
+        path = getattr(route, "path", None)
+        if handler is None or path is None or isinstance(handler, _TracedASGI):
+            continue
+        route.app = _TracedASGI(handler, f"route {path}", route=path)
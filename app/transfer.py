@@ -0,0 +1,223 @@
+"""Streaming export and import of item tables (NDJSON or CSV).
+
+Export runs on its own connection with a server-side cursor
+(`stream_results`) and yields one encoded chunk per fetched batch, so
+memory stays flat regardless of table size. The request's session cannot be
+used: dependencies with `yield` are closed before a streamed body is sent.
+
+Import parses the upload incrementally from `request.stream()` and loads
+it in batches of `batch_size` rows, each in its own transaction: Postgres
+`COPY ... FROM STDIN`, or a multi-row INSERT elsewhere. Progress is
+streamed back as NDJSON events while the upload is consumed.
+"""
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Engine, insert, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from .bulk import copy_rows, validation_message
+from .responses import RowSerializer, dumps
+
+
+FORMATS = ("ndjson", "csv")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+# Errors listed individually in the final import event; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+
+# Export
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def _encode_csv(rows: Sequence[Sequence[Any]]) -> bytes:
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="\n").writerows(rows)
+    return buf.getvalue().encode()
+
+
+def export_rows(
+    bind: Engine, model, serializer: RowSerializer, fmt: str, batch_size: int = 1000
+) -> Iterator[bytes]:
+    """Encoded chunks of every row of `model` in id order, as `serializer` renders them."""
+    stmt = select(*serializer.columns(model)).order_by(model.id)
+    if fmt == "csv":
+        yield _encode_csv([serializer.fields])
+    with bind.connect() as conn:
+        result = conn.execution_options(stream_results=True, max_row_buffer=batch_size).execute(stmt)
+        for batch in result.partitions(batch_size):
+            if fmt == "csv":
+                yield _encode_csv([[_csv_value(v) for v in serializer.row(row).values()] for row in batch])
+            else:
+                yield b"".join(dumps(serializer.row(row)) + b"\n" for row in batch)
+
+
+# Import
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """UTF-8 lines (with their newline) from a byte stream split at arbitrary points."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def iter_records(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[Tuple[int, Any]]:
+    """(line number, record) pairs; a record that cannot be parsed is an error string."""
+    if fmt == "ndjson":
+        number = 0
+        async for line in lines:
+            number += 1
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError as exc:
+                yield number, f"invalid JSON: {exc}"
+        return
+    header: Optional[List[str]] = None
+    record, start, number = "", 0, 0
+    async for line in lines:
+        number += 1
+        record, start = (record + line, start) if record else (line, number)
+        # A quoted field may contain newlines: wait until quotes are balanced
+        if record.count('"') % 2:
+            continue
+        text, record = record, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        if len(values) != len(header):
+            yield start, f"expected {len(header)} columns, got {len(values)}"
+            continue
+        # Empty CSV cells are NULLs
+        yield start, {k: (v if v != "" else None) for k, v in zip(header, values)}
+    if record:
+        yield start, "unterminated quoted field"
+
+
+def _load_batch(session_factory: Callable[[], Session], model, values: List[Dict[str, Any]]) -> None:
+    table = model.__table__
+    with session_factory() as db:
+        if db.get_bind().dialect.name == "postgresql":
+            columns = list(values[0].keys())
+            copy_rows(db, table.name, columns, [tuple(v[c] for c in columns) for v in values])
+        else:
+            db.execute(insert(table), values)
+        db.commit()
+
+
+class ImportProgress:
+    def __init__(self) -> None:
+        self.rows = self.inserted = self.failed = self.batches = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def error(self, line: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def event(self, name: str) -> bytes:
+        body: Dict[str, Any] = {
+            "event": name,
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+        if name == "done":
+            body["errors"] = self.errors
+        return dumps(body) + b"\n"
+
+
+class ImportResponse(StreamingResponse):
+    """Streams import progress while the request body is still being read.
+
+    `StreamingResponse` listens for a client disconnect on `receive()`,
+    which would swallow the upload's body messages; here the body iterator
+    is the only reader.
+    """
+
+    def __init__(self, content: AsyncIterator[bytes], **kwargs: Any) -> None:
+        super().__init__(content, media_type=MEDIA_TYPES["ndjson"], **kwargs)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def import_rows(
+    chunks: AsyncIterator[bytes],
+    fmt: str,
+    session_factory: Callable[[], Session],
+    model,
+    schema: Type[BaseModel],
+    batch_size: int = 1000,
+    on_batch: Optional[Callable[[int], None]] = None,
+) -> AsyncIterator[bytes]:
+    """Load an upload batch by batch, yielding a progress event after each batch and a final summary.
+
+    Invalid rows are reported with their line number and skipped. A batch the
+    database rejects is rolled back and reported as a whole; earlier batches
+    stay committed. `on_batch(n)` is called after each committed batch.
+    """
+    progress = ImportProgress()
+    batch: List[Tuple[int, Dict[str, Any]]] = []
+
+    async def flush() -> bytes:
+        lines = [line for line, _ in batch]
+        values = [row for _, row in batch]
+        batch.clear()
+        try:
+            await run_in_threadpool(_load_batch, session_factory, model, values)
+        except DBAPIError as exc:
+            reason = str(exc.orig).strip().splitlines()[0] if exc.orig is not None else str(exc)
+            for line in lines:
+                progress.error(line, f"batch rejected: {reason}")
+        else:
+            progress.inserted += len(values)
+            if on_batch is not None:
+                on_batch(len(values))
+        progress.batches += 1
+        return progress.event("progress")
+
+    async for line, record in iter_records(iter_lines(chunks), fmt):
+        progress.rows += 1
+        if isinstance(record, str):
+            progress.error(line, record)
+            continue
+        try:
+            batch.append((line, schema.model_validate(record).model_dump()))
+        except ValidationError as exc:
+            progress.error(line, validation_message(exc))
+            continue
+        if len(batch) >= batch_size:
+            yield await flush()
+    if batch:
+        yield await flush()
+    yield progress.event("done")
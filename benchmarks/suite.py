@@ -0,0 +1,311 @@
+"""Benchmark suite with a stored baseline and regression gates.
+
+Runs every case in-process against `DATABASE_URL` (a local Postgres, or a
+SQLite file as a stand-in) and reports per-operation p50/p99 latency,
+operations per second and peak traced memory:
+
+- core `/items` CRUD and list/page requests through the real app,
+- items plugin routes (mounted on a bare app, like the tests do),
+- `PluginManager` load + start of 50, 500 and 5000 synthetic plugins,
+- `ServiceRegistry.publish` fan-out to 1, 10 and 100 subscribers,
+- serialization of a 1000-row page (response model vs `RowSerializer`).
+
+Results are compared with a baseline JSON (`--baseline`, default
+`benchmarks/baseline.json`); the run exits with status 1 when a metric
+regresses by more than its threshold. Baselines are machine specific: record
+one with `--save-baseline` on the machine that runs the gate.
+
+Usage:
+    DATABASE_URL=sqlite:////tmp/bench.db python -m benchmarks.suite --save-baseline
+    DATABASE_URL=sqlite:////tmp/bench.db python -m benchmarks.suite --max-regression p99_ms=0.3
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import itertools
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+import types
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+
+from app import models, schemas
+from app.core.interfaces import ModuleInterface, ServiceRegistry
+from app.core.manager import PluginManager
+from app.db import get_db, init_db
+from app.responses import RowSerializer
+
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+# Allowed relative regression per metric; latency and memory may grow, throughput may drop
+THRESHOLDS = {"p50_ms": 0.25, "p99_ms": 0.50, "rps": 0.20, "peak_kib": 0.25}
+# Absolute differences below these are noise, whatever the relative change
+NOISE_FLOOR = {"p50_ms": 0.05, "p99_ms": 0.2, "rps": 0.0, "peak_kib": 64.0}
+HIGHER_IS_WORSE = {"p50_ms": True, "p99_ms": True, "rps": False, "peak_kib": True}
+
+
+@dataclass
+class Case:
+    name: str
+    op: Callable[[], Any]
+    repeat: int
+    # Work units per call (e.g. modules loaded), so `rps` is units per second
+    units: int = 1
+    warmup: int = 5
+
+
+def percentile(sorted_samples: List[float], q: float) -> float:
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * q))]
+
+
+def measure(case: Case, memory_repeat: int = 20) -> Dict[str, float]:
+    for _ in range(case.warmup):
+        case.op()
+    samples = []
+    gc.collect()
+    started = time.perf_counter()
+    for _ in range(case.repeat):
+        t0 = time.perf_counter()
+        case.op()
+        samples.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+    # tracemalloc slows allocation-heavy code down, so memory gets its own pass
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        for _ in range(max(1, min(case.repeat, memory_repeat))):
+            case.op()
+        peak = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 4),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 4),
+        "rps": round(case.repeat * case.units / elapsed, 1),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    thresholds: Dict[str, float] = THRESHOLDS,
+) -> List[str]:
+    """Human-readable regressions of `results` against `baseline` (empty when within thresholds)."""
+    regressions = []
+    for name, metrics in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric, limit in thresholds.items():
+            if metric not in metrics or not base.get(metric):
+                continue
+            old, new = base[metric], metrics[metric]
+            worse = new - old if HIGHER_IS_WORSE[metric] else old - new
+            if worse <= NOISE_FLOOR[metric]:
+                continue
+            change = worse / old
+            if change > limit:
+                regressions.append(f"{name} {metric}: {old:g} -> {new:g} ({change:+.0%} worse, limit {limit:.0%})")
+    return regressions
+
+
+# HTTP cases
+def http_cases(client: TestClient, collection: str, name: str, repeat: int) -> List[Case]:
+    """CRUD and list cases for an items collection (`/items` or `/plugins/items/`)."""
+    item = collection.rstrip("/") + "/{}"
+    item_id = client.post(collection, json={"name": "bench", "description": "x" * 200}).json()["id"]
+    for i in range(200):
+        client.post(collection, json={"name": f"bench-page-{i}", "description": "y" * 200})
+    # Rows for the delete case, which consumes one per call
+    doomed = iter([client.post(collection, json={"name": f"doomed-{i}"}).json()["id"] for i in range(repeat + 25)])
+    counter = itertools.count()
+
+    def ok(resp):
+        assert resp.status_code < 400, resp.text
+        return resp
+
+    return [
+        Case(f"{name}.create", lambda: ok(client.post(collection, json={"name": f"c{next(counter)}"})), repeat),
+        Case(f"{name}.read", lambda: ok(client.get(item.format(item_id))), repeat),
+        Case(f"{name}.update", lambda: ok(client.put(item.format(item_id), json={"name": f"u{next(counter)}"})), repeat),
+        Case(f"{name}.list_100", lambda: ok(client.get(collection, params={"limit": 100})), repeat),
+        Case(f"{name}.page_100", lambda: ok(client.get(collection, params={"after": "", "limit": 100})), repeat),
+        Case(f"{name}.delete", lambda: ok(client.delete(item.format(next(doomed)))), repeat, warmup=0),
+    ]
+
+
+def item_cases(repeat: int) -> List[Case]:
+    from app.main import app, on_startup
+
+    on_startup()
+    return http_cases(TestClient(app), "/items", "items", repeat)
+
+
+def plugin_item_cases(repeat: int) -> List[Case]:
+    from app.plugins.items.migrations import MIGRATIONS as ITEMS_MIGRATIONS
+    from app.plugins.items.routes import build_router
+
+    init_db({"items": ITEMS_MIGRATIONS})
+    plugin_app = FastAPI()
+    plugin_app.include_router(build_router(get_db), prefix="/plugins/items")
+    return http_cases(TestClient(plugin_app), "/plugins/items/", "plugin_items", repeat)
+
+
+# Plugin manager cases
+class _SyntheticPlugin(ModuleInterface):
+    """A plugin with one route, one service and one subscription."""
+
+    version = "0.0.0"
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def init(self, app: FastAPI, registry: ServiceRegistry) -> None:
+        registry.subscribe("bench.event", lambda payload: None)
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def get_router(self) -> Optional[APIRouter]:
+        router = APIRouter()
+        router.add_api_route("/", lambda: {"plugin": self.name}, methods=["GET"])
+        return router
+
+    def provides(self) -> Dict[str, Any]:
+        return {f"{self.name}.service": object()}
+
+
+def _install_synthetic_plugins(package: str, count: int) -> List[str]:
+    names = [f"p{i}" for i in range(count)]
+    sys.modules[package] = types.ModuleType(package)
+    for name in names:
+        module = types.ModuleType(f"{package}.{name}.plugin")
+        module.get_plugin = lambda name=name: _SyntheticPlugin(name)  # type: ignore[attr-defined]
+        sys.modules[f"{package}.{name}"] = types.ModuleType(f"{package}.{name}")
+        sys.modules[f"{package}.{name}.plugin"] = module
+    return names
+
+
+def plugin_manager_cases(sizes: List[int]) -> List[Case]:
+    package = "benchmarks._synthetic_plugins"
+    names = _install_synthetic_plugins(package, max(sizes))
+
+    def load_and_start(count: int) -> None:
+        pm = PluginManager(FastAPI(), base_package=package)
+        pm.register_core_services()
+        for name in names[:count]:
+            pm.load(name)
+            pm.start(name)
+        assert sum(1 for s in pm.list_states() if s.status == "started") == count
+
+    # Per-call latency is for the whole batch; rps is modules per second
+    return [
+        Case(f"plugin_manager.load_start_{n}", lambda n=n: load_and_start(n), max(3, 5000 // n), units=n, warmup=1)
+        for n in sizes
+    ]
+
+
+def publish_cases(repeat: int) -> List[Case]:
+    cases = []
+    for subscribers in (1, 10, 100):
+        registry = ServiceRegistry()
+        for _ in range(subscribers):
+            registry.subscribe("bench.event", lambda payload: None)
+        payload = {"table": "items", "count": 1}
+        cases.append(
+            Case(f"registry.publish_fanout_{subscribers}", lambda r=registry: r.publish("bench.event", payload), repeat * 20)
+        )
+    return cases
+
+
+def serialization_cases(repeat: int, rows: int = 1000) -> List[Case]:
+    now = models.utcnow()
+    items = [
+        models.Item(id=i, name=f"item-{i}", description="z" * 120, created_at=now, updated_at=now)
+        for i in range(rows)
+    ]
+    adapter = TypeAdapter(List[schemas.ItemRead])
+    serializer = RowSerializer(schemas.ItemRead)
+    return [
+        Case(f"serialize.response_model_{rows}", lambda: adapter.dump_json(adapter.validate_python(items)), repeat),
+        Case(f"serialize.row_serializer_{rows}", lambda: serializer.response(items).body, repeat),
+    ]
+
+
+def build_cases(args: argparse.Namespace) -> List[Case]:
+    groups = {
+        "items": lambda: item_cases(args.repeat),
+        "plugin_items": lambda: plugin_item_cases(args.repeat),
+        "plugin_manager": lambda: plugin_manager_cases(args.plugin_sizes),
+        "registry": lambda: publish_cases(args.repeat),
+        "serialize": lambda: serialization_cases(args.repeat),
+    }
+    selected = args.only or list(groups)
+    return [case for group in selected for case in groups[group]()]
+
+
+def _threshold(value: str) -> tuple:
+    metric, _, limit = value.partition("=")
+    if metric not in THRESHOLDS or not limit:
+        raise argparse.ArgumentTypeError(f"expected METRIC=FRACTION with METRIC in {sorted(THRESHOLDS)}")
+    return metric, float(limit)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200, help="calls per HTTP/serialization case")
+    parser.add_argument("--plugin-sizes", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--only", nargs="+", choices=["items", "plugin_items", "plugin_manager", "registry", "serialize"])
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write this run's results as the new baseline")
+    parser.add_argument("--output", type=Path, help="also write this run's results as JSON")
+    parser.add_argument(
+        "--max-regression", type=_threshold, action="append", default=[], metavar="METRIC=FRACTION",
+        help=f"override a threshold (defaults: {THRESHOLDS})",
+    )
+    args = parser.parse_args()
+    thresholds = {**THRESHOLDS, **dict(args.max_regression)}
+
+    init_db()
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"{'case':<36} {'p50 ms':>10} {'p99 ms':>10} {'ops/s':>12} {'peak KiB':>10}")
+    for case in build_cases(args):
+        r = results[case.name] = measure(case)
+        print(f"{case.name:<36} {r['p50_ms']:>10.3f} {r['p99_ms']:>10.3f} {r['rps']:>12.1f} {r['peak_kib']:>10.1f}")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+    if args.save_baseline:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"baseline written to {args.baseline}")
+        return
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}; record one with --save-baseline")
+        return
+    regressions = compare(results, json.loads(args.baseline.read_text()), thresholds)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        sys.exit(1)
+    print("no regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
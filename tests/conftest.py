@@ -0,0 +1,11 @@
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client():
+    """TestClient for the main app, started like a worker (migrations, plugins)."""
+    from app.main import app, on_startup
+
+    on_startup()
+    return TestClient(app)
@@ -0,0 +1,77 @@
+from datetime import datetime, timezone
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db import SessionLocal, get_db, init_db
+from app.main import plugin_manager
+from app.plugins.items.migrations import MIGRATIONS as ITEMS_MIGRATIONS
+from app.plugins.items.routes import build_router as build_items_router
+from app.plugins.items.services import ItemsService
+
+
+def test_counters_follow_writes_without_count_queries(client):
+    counters = plugin_manager.registry.get_service("analytics.counters")
+    client.post("/plugins/analytics/recount")
+    before = client.get("/plugins/analytics/count").json()["items_count"]
+
+    created = [client.post("/items", json={"name": f"c{i}"}).json()["id"] for i in range(3)]
+    client.post("/items/bulk", json=[{"name": "b1"}, {"name": "b2"}, {"bad": 1}])
+    client.delete(f"/items/{created[0]}")
+    client.delete(f"/items/{created[0]}")  # 404: not counted
+
+    assert client.get("/plugins/analytics/count").json() == {"items_count": before + 4, "approximate": False}
+    counters.flush()
+    assert client.get("/plugins/analytics/counts").json()["counts"]["items"] == before + 4
+    # The maintained value agrees with a full recount
+    assert client.post("/plugins/analytics/recount", params={"name": "items"}).json()["counts"]["items"] == before + 4
+
+
+def test_daily_timeseries_is_dense_and_includes_todays_creations(client):
+    client.post("/plugins/analytics/recount")
+    today = datetime.now(timezone.utc).date()
+    before = client.get("/plugins/analytics/timeseries", params={"days": 3}).json()["buckets"][-1]["count"]
+
+    client.post("/items", json={"name": "ts"})
+    body = client.get("/plugins/analytics/timeseries", params={"days": 3}).json()
+    assert [b["day"] for b in body["buckets"]][-1] == today.isoformat()
+    assert len(body["buckets"]) == 3
+    assert body["buckets"][-1]["count"] == before + 1
+
+    assert client.get("/plugins/analytics/timeseries", params={"name": "nope"}).status_code == 404
+
+
+def test_approximate_mode_falls_back_to_counter_without_postgres(client):
+    body = client.get("/plugins/analytics/count", params={"approximate": True}).json()
+    assert isinstance(body["items_count"], int)
+    assert body["approximate"] is False
+
+
+def test_deletes_and_service_creates_keep_histograms_in_line_with_recount(client):
+    init_db({"items": ITEMS_MIGRATIONS})
+    counters = plugin_manager.registry.get_service("analytics.counters")
+    client.post("/plugins/analytics/recount")
+
+    def today(name):
+        return client.get("/plugins/analytics/timeseries", params={"name": name, "days": 1}).json()["buckets"][-1]["count"]
+
+    before = {name: today(name) for name in ("items", "plugin_items")}
+    ids = [client.post("/items", json={"name": f"h{i}"}).json()["id"] for i in range(3)]
+    client.delete(f"/items/{ids[0]}")
+    client.request("DELETE", "/items/bulk", json=[ids[1]])
+    # The items plugin is not enabled by default; wire its service and router to the app's bus
+    publish = plugin_manager.registry.publish
+    service = ItemsService(SessionLocal, publish=publish)
+    plugin_app = FastAPI()
+    plugin_app.include_router(build_items_router(get_db, publish=publish), prefix="/plugins/items")
+    plugin_id = service.create_default("from-service")
+    TestClient(plugin_app).delete(f"/plugins/items/{plugin_id}")
+    service.create_default("kept")
+
+    maintained = {name: today(name) for name in ("items", "plugin_items")}
+    assert maintained == {"items": before["items"] + 1, "plugin_items": before["plugin_items"] + 1}
+    counts = counters.all()
+    counters.flush()
+    client.post("/plugins/analytics/recount")
+    assert {name: today(name) for name in maintained} == maintained
+    assert counters.all() == counts
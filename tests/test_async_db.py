@@ -0,0 +1,70 @@
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud, schemas
+from app.core.manager import PluginManager
+from app.db import get_async_engine, init_db, to_async_url
+
+
+def test_to_async_url_maps_drivers():
+    assert to_async_url("postgresql://u:p@postgres:5432/db") == "postgresql+asyncpg://u:p@postgres:5432/db"
+    assert to_async_url("sqlite:////tmp/x.db") == "sqlite+aiosqlite:////tmp/x.db"
+
+
+def test_async_session_dependency_crud_roundtrip():
+    init_db()
+    app = FastAPI()
+    pm = PluginManager(app)
+    pm.register_core_services()
+    async_dep = pm.registry.get_service("async_db_session_dep")
+    assert async_dep is not None
+
+    @app.post("/items", response_model=schemas.ItemRead)
+    async def create(item: schemas.ItemCreate, db: AsyncSession = Depends(async_dep)):
+        return await crud.create_item_async(db, item)
+
+    @app.get("/items/{item_id}", response_model=schemas.ItemRead)
+    async def read(item_id: int, db: AsyncSession = Depends(async_dep)):
+        obj = await crud.get_item_async(db, item_id)
+        if not obj:
+            raise HTTPException(status_code=404, detail="Item not found")
+        return obj
+
+    @app.put("/items/{item_id}", response_model=schemas.ItemRead)
+    async def update(item_id: int, item: schemas.ItemUpdate, db: AsyncSession = Depends(async_dep)):
+        return await crud.update_item_async(db, item_id, item)
+
+    @app.delete("/items/{item_id}")
+    async def delete(item_id: int, db: AsyncSession = Depends(async_dep)):
+        return {"deleted": await crud.delete_item_async(db, item_id)}
+
+    with TestClient(app) as client:
+        created = client.post("/items", json={"name": "async-item"}).json()
+        assert created["name"] == "async-item"
+        assert client.get(f"/items/{created['id']}").json()["id"] == created["id"]
+        assert client.put(f"/items/{created['id']}", json={"description": "d"}).json()["description"] == "d"
+        assert client.delete(f"/items/{created['id']}").json() == {"deleted": True}
+        assert client.get(f"/items/{created['id']}").status_code == 404
+        client.portal.call(get_async_engine().dispose)
+
+
+def test_async_read_dependency_follows_replica_routing(tmp_path, monkeypatch):
+    from sqlalchemy import create_engine
+
+    from app import db as db_module
+    from app.replicas import ReadConsistencyMiddleware, ReplicaRouter
+
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    monkeypatch.setattr(db_module, "replica_router", ReplicaRouter([replica]))
+    app = FastAPI()
+    app.add_middleware(ReadConsistencyMiddleware, window=5.0)
+
+    @app.get("/bind")
+    async def bind(db: AsyncSession = Depends(db_module.get_async_read_db)):
+        return {"replica": db.get_bind().url.database == replica.url.database}
+
+    with TestClient(app) as client:
+        assert client.get("/bind").json() == {"replica": True}
+        assert client.get("/bind", headers={"X-Read-Consistency": "primary"}).json() == {"replica": False}
+        client.portal.call(db_module.async_read_engine().dispose)
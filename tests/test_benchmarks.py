@@ -0,0 +1,27 @@
+from benchmarks.suite import Case, compare, measure, publish_cases
+
+
+def test_compare_flags_only_regressions_beyond_threshold_and_noise():
+    baseline = {
+        "a": {"p50_ms": 10.0, "p99_ms": 20.0, "rps": 1000.0, "peak_kib": 500.0},
+        "fast": {"p50_ms": 0.01, "p99_ms": 0.02, "rps": 100000.0, "peak_kib": 1.0},
+    }
+    results = {
+        # p50 +30% (limit 25%), rps -10% (limit 20%), memory improved
+        "a": {"p50_ms": 13.0, "p99_ms": 21.0, "rps": 900.0, "peak_kib": 100.0},
+        # Doubled, but below the absolute noise floor
+        "fast": {"p50_ms": 0.02, "p99_ms": 0.04, "rps": 100000.0, "peak_kib": 2.0},
+        "new": {"p50_ms": 1.0, "p99_ms": 1.0, "rps": 1.0, "peak_kib": 1.0},
+    }
+    regressions = compare(results, baseline)
+    assert len(regressions) == 1 and regressions[0].startswith("a p50_ms")
+    assert compare(results, baseline, {"p50_ms": 0.5, "rps": 0.05})[0].startswith("a rps")
+
+
+def test_measure_reports_all_metrics():
+    calls = []
+    result = measure(Case("noop", lambda: calls.append(1), repeat=10, units=3, warmup=2), memory_repeat=4)
+    assert len(calls) == 16
+    assert set(result) == {"p50_ms", "p99_ms", "rps", "peak_kib"}
+    assert result["p50_ms"] <= result["p99_ms"] and result["rps"] > 0
+    assert {c.name for c in publish_cases(5)} == {f"registry.publish_fanout_{n}" for n in (1, 10, 100)}
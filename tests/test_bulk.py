@@ -0,0 +1,69 @@
+from app.bulk import _csv_field
+
+
+def test_bulk_create_update_delete_with_per_row_errors(client):
+    resp = client.post("/items/bulk", json=[{"name": "b1"}, {"description": "no name"}, {"name": "b3", "description": "d"}])
+    assert resp.status_code == 200
+    body = resp.json()
+    assert (body["succeeded"], body["failed"]) == (2, 1)
+    assert [r["status"] for r in body["results"]] == ["created", "error", "created"]
+    assert "name" in body["results"][1]["error"]
+    id1, id3 = body["results"][0]["id"], body["results"][2]["id"]
+    assert client.get(f"/items/{id3}").json()["description"] == "d"
+
+    resp = client.patch("/items/bulk", json=[{"id": id1, "name": "b1-new"}, {"id": 10**9, "name": "x"}, {"name": "no id"}])
+    body = resp.json()
+    assert [r["status"] for r in body["results"]] == ["updated", "error", "error"]
+    assert body["results"][1]["error"] == "Item not found"
+    assert client.get(f"/items/{id1}").json()["name"] == "b1-new"
+
+    resp = client.request("DELETE", "/items/bulk", json=[id1, id3, 10**9, "x"])
+    body = resp.json()
+    assert [r["status"] for r in body["results"]] == ["deleted", "deleted", "error", "error"]
+    assert client.get(f"/items/{id1}").status_code == 404
+
+
+def test_atomic_batch_writes_nothing_on_error(client):
+    before = len(client.get("/items", params={"limit": 10**6}).json())
+    body = client.post("/items/bulk", params={"atomic": True}, json=[{"name": "ok"}, {"name": None}]).json()
+    assert [r["status"] for r in body["results"]] == ["skipped", "error"]
+    assert body["succeeded"] == 0
+    assert len(client.get("/items", params={"limit": 10**6}).json()) == before
+
+
+def test_batch_size_is_capped(client, monkeypatch):
+    import app.main as main
+
+    monkeypatch.setattr(main, "BULK_MAX_ITEMS", 2)
+    assert client.post("/items/bulk", json=[{"name": "a"}] * 3).status_code == 413
+    assert client.post("/items/bulk", json=[]).status_code == 422
+
+
+def test_body_size_is_capped_before_parsing():
+    from typing import Any, List
+
+    from fastapi import Depends, FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.bulk import json_array_body
+
+    app = FastAPI()
+
+    @app.post("/rows")
+    def rows(body: List[Any] = Depends(json_array_body(100))):
+        return {"rows": len(body)}
+
+    client = TestClient(app)
+    assert client.post("/rows", json=[{"name": "a"}] * 3).json() == {"rows": 3}
+    assert client.post("/rows", json=[{"name": "a" * 20}] * 10).status_code == 413
+    # Without a Content-Length the streamed read stops at the limit
+    chunks = iter([b"[", b'"' + b"x" * 200 + b'"', b"]"])
+    assert client.post("/rows", content=chunks).status_code == 413
+    assert client.post("/rows", content=b'{"name": "a"}').status_code == 422
+    assert client.post("/rows", content=b"[not json").status_code == 422
+
+
+def test_copy_csv_field_encoding():
+    assert _csv_field(None) == "\\N"
+    assert _csv_field("") == '""'
+    assert _csv_field('say "hi", ok') == '"say ""hi"", ok"'
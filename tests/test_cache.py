@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from app.cache import CACHE_INVALIDATE_TOPIC, Cache, CacheService
+from app.core.interfaces import ServiceRegistry
+from app.main import app
+
+
+def test_lru_ttl_and_memory_bounds(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: now[0])
+    cache = Cache("t", ttl=10, max_entries=2, max_bytes=10_000)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" becomes most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+
+    now[0] += 11
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["evictions"], stats["expirations"]) == (1, 1)
+
+    small = Cache("s", ttl=10, max_entries=100, max_bytes=300)
+    small.set("big", "x" * 1000)  # larger than the whole budget: not stored
+    assert small.get("big") is None
+    for i in range(10):
+        small.set(i, "y" * 50)
+    assert small.stats()["bytes"] <= 300 and small.get(9) is not None and small.get(0) is None
+
+
+def test_single_flight_loads_once():
+    cache = Cache("t", ttl=60, max_entries=10, max_bytes=10_000)
+    calls, results = [], []
+    release = threading.Event()
+
+    def loader():
+        calls.append(1)
+        release.wait(2)
+        return "value"
+
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("k", loader))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    release.set()
+    for t in threads:
+        t.join()
+    assert calls == [1] and results == ["value"] * 8
+    assert cache.stats()["single_flight_waits"] == 7
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("boom", lambda: (_ for _ in ()).throw(RuntimeError("db down")))
+    assert cache.get_or_load("boom", lambda: "recovered") == "recovered"
+
+
+def test_load_racing_an_invalidation_is_not_stored():
+    cache = Cache("t", ttl=60, max_entries=10, max_bytes=10_000)
+
+    def loader():
+        cache.invalidate_local(keys=["k"])  # a write lands while the stale value is loading
+        return "stale"
+
+    assert cache.get_or_load("k", loader) == "stale"
+    assert cache.get("k") is None
+
+
+def test_invalidation_by_key_and_tag_goes_through_the_event_bus():
+    registry = ServiceRegistry()
+    service = CacheService(registry)
+    seen = []
+    registry.subscribe(CACHE_INVALIDATE_TOPIC, seen.append)
+    users = service.namespace("users")
+    assert service.namespace("users") is users
+    users.set(1, "alice", tags=["team:a"])
+    users.set(2, "bob", tags=["team:a"])
+    users.set(3, "carol", tags=["team:b"])
+
+    service.invalidate("users", tags=["team:a"])
+    assert (users.get(1), users.get(2), users.get(3)) == (None, None, "carol")
+    service.invalidate("users", keys=[3])
+    assert users.get(3) is None
+    assert [p["namespace"] for p in seen] == ["users", "users"]
+    assert service.stats()["users"]["invalidations"] == 3
+
+
+def test_item_reads_are_cached_and_invalidated_on_write():
+    from app.main import item_cache, on_startup
+
+    on_startup()
+    client = TestClient(app)
+    item_id = client.post("/items", json={"name": "cached"}).json()["id"]
+
+    before = item_cache.stats()
+    assert client.get(f"/items/{item_id}").json()["name"] == "cached"
+    assert client.get(f"/items/{item_id}").json()["name"] == "cached"
+    after = item_cache.stats()
+    assert (after["misses"] - before["misses"], after["hits"] - before["hits"]) == (1, 1)
+
+    client.put(f"/items/{item_id}", json={"name": "renamed"})
+    assert client.get(f"/items/{item_id}").json()["name"] == "renamed"
+    client.patch("/items/bulk", json=[{"id": item_id, "name": "bulk-renamed"}])
+    assert client.get(f"/items/{item_id}").json()["name"] == "bulk-renamed"
+    client.delete(f"/items/{item_id}")
+    assert client.get(f"/items/{item_id}").status_code == 404
+
+    assert "items" in client.get("/admin/cache").json()
+
+
+def test_item_cache_misses_load_from_the_primary(tmp_path, monkeypatch):
+    from app import db as db_module
+    from app.main import on_startup
+    from app.replicas import ReplicaRouter
+
+    on_startup()
+    client = TestClient(app)
+    item_id = client.post("/items", json={"name": "primary"}).json()["id"]
+    # A replica that has not seen the write (or any table) yet
+    monkeypatch.setattr(db_module, "replica_router", ReplicaRouter([create_engine(f"sqlite:///{tmp_path / 'lag.db'}")]))
+    assert client.get(f"/items/{item_id}").json()["name"] == "primary"
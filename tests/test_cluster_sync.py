@@ -0,0 +1,73 @@
+from fastapi import FastAPI
+
+from app.core.cluster import ClusterBus
+from app.core.lifecycle import LIFECYCLE_TOPIC, PluginStateSync
+from app.core.manager import PluginManager
+from app.db import SessionLocal, engine, init_db
+from app.models import PluginDesiredState, PluginWorkerState
+
+from tests.test_plugins import DummyModule
+
+
+def _worker(worker_id: str):
+    pm = PluginManager(FastAPI())
+    bus = ClusterBus(pm.registry, engine, "test_cluster", worker_id)
+    sync = PluginStateSync(pm, bus, SessionLocal)
+    m = DummyModule()
+    m.name = "dummy_cluster"
+    pm.register_module(m)
+    pm.start(m.name)
+    return pm, bus, sync, m
+
+
+def _cleanup():
+    with SessionLocal() as db:
+        db.query(PluginDesiredState).filter(PluginDesiredState.name == "dummy_cluster").delete()
+        db.query(PluginWorkerState).filter(PluginWorkerState.name == "dummy_cluster").delete()
+        db.commit()
+
+
+def test_lifecycle_command_propagates_and_aggregates():
+    init_db()
+    _cleanup()
+    pm_a, bus_a, sync_a, mod_a = _worker("worker-a")
+    pm_b, bus_b, sync_b, mod_b = _worker("worker-b")
+    try:
+        sync_a.command("dummy_cluster", "stop")
+        assert mod_a.started is False
+
+        with SessionLocal() as db:
+            assert db.get(PluginDesiredState, "dummy_cluster").status == "stopped"
+
+        # Deliver the notification worker-a would have sent over LISTEN/NOTIFY
+        bus_b.dispatch('{"topic": "%s", "origin": "worker-a", "payload": {"name": "dummy_cluster", "action": "stop"}}' % LIFECYCLE_TOPIC)
+        assert mod_b.started is False
+
+        entry = next(p for p in sync_a.aggregate() if p["name"] == "dummy_cluster")
+        assert entry["desired"] == "stopped"
+        assert entry["workers"]["worker-a"]["status"] == "stopped"
+        assert entry["workers"]["worker-b"]["status"] == "stopped"
+    finally:
+        _cleanup()
+
+
+def test_reconcile_applies_desired_state_on_boot():
+    init_db()
+    _cleanup()
+    with SessionLocal() as db:
+        db.add(PluginDesiredState(name="dummy_cluster", status="stopped"))
+        db.commit()
+    try:
+        pm, bus, sync, mod = _worker("worker-c")
+        assert mod.started is True
+        sync.reconcile()
+        assert mod.started is False
+        assert pm.states["dummy_cluster"].status == "stopped"
+    finally:
+        _cleanup()
+
+
+def test_own_messages_are_ignored():
+    pm, bus, sync, mod = _worker("worker-d")
+    bus.dispatch('{"topic": "%s", "origin": "worker-d", "payload": {"name": "dummy_cluster", "action": "stop"}}' % LIFECYCLE_TOPIC)
+    assert mod.started is True
@@ -0,0 +1,111 @@
+import gzip
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.compression import CompressedBodyCache, CompressionMiddleware, CompressionStats, negotiate
+from app.conditional import Validators, conditional_get
+
+ROWS = [{"id": i, "name": f"row-{i}", "description": "x" * 40} for i in range(100)]
+
+
+def _app(cache=None):
+    app = FastAPI()
+    state = {"version": 1, "renders": 0}
+
+    @app.get("/rows")
+    def rows(request: Request, response: Response):
+        validators = Validators.for_version("rows", state["version"])
+        not_modified = conditional_get(request, response, validators, "items")
+        if not_modified is not None:
+            return not_modified
+        state["renders"] += 1
+        return ROWS
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter([b"data: 1\n\n" * 200]), media_type="text/event-stream")
+
+    stats = CompressionStats()
+    app.add_middleware(CompressionMiddleware, min_size=1024, encodings=["zstd", "br", "gzip"], cache=cache, stats=stats)
+    return app, state, stats
+
+
+def test_negotiation_prefers_quality_then_server_order():
+    encodings = ["zstd", "br", "gzip"]
+    assert negotiate("gzip, br", encodings) == "br"
+    assert negotiate("br;q=0.5, gzip", encodings) == "gzip"
+    assert negotiate("*", encodings) == "zstd"
+    assert negotiate("gzip;q=0, identity", encodings) is None
+    assert negotiate("", encodings) is None
+
+
+def test_large_bodies_are_compressed_small_and_sse_are_not():
+    app, _, stats = _app()
+    client = TestClient(app)
+    r = client.get("/rows", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip" and r.headers["vary"] == "Accept-Encoding"
+    assert r.json() == ROWS
+    # The compressed variant has its own validator, and revalidating with it works
+    etag = r.headers["etag"]
+    assert etag.endswith('-gz"')
+    revalidated = client.get("/rows", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert revalidated.status_code == 304 and revalidated.headers["etag"] == etag
+
+    plain = client.get("/rows", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers and not plain.headers["etag"].endswith('-gz"')
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    sse = client.get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in sse.headers and sse.text.startswith("data: 1")
+
+    snapshot = stats.snapshot()
+    assert snapshot["responses"]["compressed"] == 1 and snapshot["responses"]["not_compressible"] == 1
+    assert snapshot["encodings"]["gzip"]["ratio"] > 5
+
+
+def test_cached_variants_skip_rendering_until_the_version_changes():
+    cache = CompressedBodyCache(max_bytes=1024 * 1024, max_entry_bytes=512 * 1024)
+    app, state, stats = _app(cache)
+    client = TestClient(app)
+    first = client.get("/rows", headers={"Accept-Encoding": "gzip"})
+    assert state["renders"] == 1 and cache.stats()["entries"] == 1
+
+    second = client.get("/rows", headers={"Accept-Encoding": "gzip"})
+    assert second.status_code == 200 and second.json() == ROWS
+    assert second.headers["etag"] == first.headers["etag"] and second.headers["content-encoding"] == "gzip"
+    # Replayed without rendering, and the stored variant is byte-identical
+    assert state["renders"] == 1
+    assert gzip.decompress(cache.get("/rows?").variants["gzip"][0]) == cache.get("/rows?").body
+    identity = client.get("/rows", headers={"Accept-Encoding": "identity"})
+    assert identity.json() == ROWS and state["renders"] == 1
+
+    state["version"] = 2
+    assert client.get("/rows", headers={"Accept-Encoding": "gzip"}).headers["etag"] != first.headers["etag"]
+    assert state["renders"] == 2
+    snapshot = stats.snapshot()["cache"]
+    assert snapshot["hits"] == 2 and snapshot["stores"] == 2 and snapshot["compress_cpu_saved_ms"] >= 0
+
+    cache.clear()
+    assert cache.stats()["entries"] == 0
+    tiny = CompressedBodyCache(max_bytes=1024 * 1024, max_entry_bytes=100)
+    app, state, _ = _app(tiny)
+    TestClient(app).get("/rows")
+    assert tiny.stats()["entries"] == 0
+
+
+def test_admin_report_and_cache_clear():
+    from app.main import app, on_startup
+
+    on_startup()
+    client = TestClient(app)
+    client.get("/items", headers={"Accept-Encoding": "gzip"})
+    report = client.get("/admin/compression").json()
+    assert report["enabled"] and "gzip" in report["available_encodings"]
+    assert {"responses", "encodings", "cache", "cache_store"} <= set(report)
+    assert client.delete("/admin/compression/cache").json() == {"status": "cleared"}
+    assert client.get("/admin/compression").json()["cache_store"]["entries"] == 0
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.conditional import Validators
+from app.db import SessionLocal, get_db, init_db
+from app.plugins.copilot_metrics import crud as metrics_crud
+from app.plugins.copilot_metrics.migrations import MIGRATIONS as METRICS_MIGRATIONS
+from app.plugins.copilot_metrics.routes import build_router as build_metrics_router
+
+
+def test_item_etag_roundtrip_and_change_on_update(client):
+    item_id = client.post("/items", json={"name": "etag"}).json()["id"]
+
+    first = client.get(f"/items/{item_id}")
+    etag = first.headers["etag"]
+    assert etag.startswith('"') and first.headers["cache-control"] == "no-cache"
+    assert "last-modified" in first.headers
+
+    cached = client.get(f"/items/{item_id}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.content == b""
+    assert cached.headers["etag"] == etag
+    assert client.get(f"/items/{item_id}", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+
+    # Two updates in quick succession still produce distinct validators
+    client.put(f"/items/{item_id}", json={"name": "etag-2"})
+    second = client.get(f"/items/{item_id}", headers={"If-None-Match": etag})
+    assert second.status_code == 200 and second.json()["name"] == "etag-2"
+    client.put(f"/items/{item_id}", json={"name": "etag-3"})
+    assert client.get(f"/items/{item_id}").headers["etag"] not in (etag, second.headers["etag"])
+
+    client.patch("/items/bulk", json=[{"id": item_id, "description": "bulk"}])
+    assert client.get(f"/items/{item_id}", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_if_modified_since_and_if_none_match_precedence():
+    modified = datetime(2024, 5, 1, 12, 0, 0, 500000, tzinfo=timezone.utc)
+    validators = Validators.for_version("items", 1, modified, modified=modified)
+
+    class _Request:
+        def __init__(self, headers):
+            self.headers = {k.lower(): v for k, v in headers.items()}
+
+    later = format_datetime(modified + timedelta(seconds=1), usegmt=True)
+    same_second = format_datetime(modified.replace(microsecond=0), usegmt=True)
+    earlier = format_datetime(modified - timedelta(seconds=1), usegmt=True)
+    assert validators.is_fresh(_Request({"If-Modified-Since": later}))
+    assert validators.is_fresh(_Request({"If-Modified-Since": same_second}))
+    assert not validators.is_fresh(_Request({"If-Modified-Since": earlier}))
+    assert not validators.is_fresh(_Request({"If-Modified-Since": "garbage"}))
+    assert not validators.is_fresh(_Request({"If-None-Match": '"nope"', "If-Modified-Since": later}))
+
+
+def test_account_and_metrics_conditional_responses(monkeypatch):
+    import app.conditional as conditional
+
+    monkeypatch.setitem(conditional.CACHE_CONTROL, "metrics", "private, max-age=60")
+    init_db({"copilot_metrics": METRICS_MIGRATIONS})
+    with SessionLocal() as db:
+        acc = metrics_crud.create_or_update_account(
+            db, login="cond", github_user_id=777, node_id=None, avatar_url=None,
+            token_ciphertext="c", token_nonce="n", token_salt="s",
+        )
+        metrics_crud.save_metrics(db, acc.id, '{"seats": 1}')
+        account_id = acc.id
+    plugin_app = FastAPI()
+    plugin_app.include_router(build_metrics_router(get_db), prefix="/p")
+    client = TestClient(plugin_app)
+
+    for path in (f"/p/accounts/{account_id}", f"/p/metrics/{account_id}", "/p/metrics"):
+        resp = client.get(path)
+        assert resp.status_code == 200
+        assert client.get(path, headers={"If-None-Match": resp.headers["etag"]}).status_code == 304
+    assert client.get(f"/p/metrics/{account_id}").headers["cache-control"] == "private, max-age=60"
+
+    list_etag = client.get("/p/metrics").headers["etag"]
+    with SessionLocal() as db:
+        metrics_crud.save_metrics(db, account_id, '{"seats": 2}')
+    fresh = client.get("/p/metrics", headers={"If-None-Match": list_etag})
+    assert fresh.status_code == 200
+    assert any(m["payload"] == {"seats": 2} for m in fresh.json())
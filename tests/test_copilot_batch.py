@@ -0,0 +1,82 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import selectinload
+
+from app.db import SessionLocal, get_db, init_db
+from app.plugins.copilot_metrics import crud as metrics_crud
+from app.plugins.copilot_metrics.migrations import MIGRATIONS as METRICS_MIGRATIONS
+from app.plugins.copilot_metrics.models import GithubAccount
+from app.plugins.copilot_metrics.routes import build_router
+
+QUOTA = '{"copilot_plan": "individual", "chat_enabled": true, "quota_snapshots": {"chat": {"entitlement": 300, "remaining": %d, "unlimited": false}}, "big": "%s"}'
+
+
+def _seed(tag):
+    init_db({"copilot_metrics": METRICS_MIGRATIONS})
+    ids, latest = [], {}
+    with SessionLocal() as db:
+        for n in range(3):
+            acc = metrics_crud.create_or_update_account(
+                db, login=f"{tag}-{n}", github_user_id=hash((tag, n)) % 10**8, node_id=None, avatar_url=None,
+                token_ciphertext="c", token_nonce="n", token_salt="s",
+            )
+            ids.append(acc.id)
+            # Account n has n snapshots; the last one is the latest
+            for k in range(n):
+                latest[acc.id] = metrics_crud.save_metrics(db, acc.id, QUOTA % (k, "x" * 100)).id
+    return ids, latest
+
+
+def _client(fast=False):
+    app = FastAPI()
+    app.include_router(build_router(get_db, fast_json=fast), prefix="/p")
+    return TestClient(app)
+
+
+def test_accounts_embed_latest_metrics_and_summary():
+    ids, latest = _seed("embed")
+    query = {"ids": ",".join(map(str, ids))}
+    bodies = {}
+    for fast in (False, True):
+        client = _client(fast)
+        full = client.get("/p/accounts", params={**query, "include": "latest_metrics"}).json()
+        summary = client.get("/p/accounts", params={**query, "include": "latest_metrics_summary"}).json()
+        bodies[fast] = (full, summary)
+    assert bodies[False] == bodies[True]
+
+    full, summary = bodies[False]
+    assert [a["id"] for a in full] == sorted(ids, reverse=True)
+    assert {a["id"]: (a["latest_metrics"] or {}).get("id") for a in full} == {ids[0]: None, **latest}
+    assert full[0]["latest_metrics"]["payload"]["quota_snapshots"]["chat"]["remaining"] == 1
+    assert all("latest_metrics_summary" not in a for a in full)
+    top = summary[0]["latest_metrics_summary"]
+    assert top["copilot_plan"] == "individual" and top["quotas"] == {"chat": {"entitlement": 300, "remaining": 1, "unlimited": False}}
+    assert "payload" not in top and all("latest_metrics" not in a for a in summary)
+
+
+def test_batch_lookups_by_id():
+    ids, latest = _seed("batch")
+    client = _client()
+    picked = [ids[0], ids[2]]
+    accounts = client.get("/p/accounts", params={"ids": f"{picked[1]}, {picked[0]},{picked[0]}"}).json()
+    assert [a["id"] for a in accounts] == sorted(picked, reverse=True) and "latest_metrics" not in accounts[0]
+
+    metrics = client.get("/p/metrics", params={"ids": ",".join(map(str, ids))}).json()
+    assert [(m["account_id"], m["id"]) for m in metrics] == sorted(latest.items())
+    assert client.get("/p/metrics", params={"ids": "1,x"}).status_code == 422
+    assert client.get("/p/accounts", params={"ids": ",".join(map(str, range(1000)))}).status_code == 422
+
+
+def test_metrics_history_is_never_loaded_implicitly():
+    ids, _ = _seed("lazy")
+    with SessionLocal() as db:
+        acc = db.get(GithubAccount, ids[2])
+        with pytest.raises(InvalidRequestError):
+            acc.metrics
+        acc = db.scalars(
+            select(GithubAccount).where(GithubAccount.id == ids[2]).options(selectinload(GithubAccount.metrics))
+        ).one()
+        assert [m.id for m in acc.metrics] == sorted(m.id for m in acc.metrics) and len(acc.metrics) == 2
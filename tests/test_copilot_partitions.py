@@ -0,0 +1,181 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.db import SessionLocal, engine, get_db, init_db
+from app.plugins.copilot_metrics import crud as metrics_crud
+from app.plugins.copilot_metrics.migrations import MIGRATIONS as METRICS_MIGRATIONS
+from app.plugins.copilot_metrics.models import CopilotMetrics
+from app.plugins.copilot_metrics.partitions import (
+    LEGACY,
+    PARENT,
+    Partition,
+    PartitionMaintainer,
+    add_months,
+    expired,
+    months_to_create,
+    parse_bounds,
+)
+from app.plugins.copilot_metrics.routes import build_router
+
+UTC = timezone.utc
+
+
+def _month(year, month):
+    return datetime(year, month, 1, tzinfo=UTC)
+
+
+def test_partition_planning():
+    assert add_months(_month(2024, 11), 3) == _month(2025, 2)
+    assert add_months(_month(2024, 1), -1) == _month(2023, 12)
+    assert parse_bounds("FOR VALUES FROM ('2024-05-01 00:00:00+00') TO ('2024-06-01 02:00:00+02')") == (
+        _month(2024, 5), _month(2024, 6),
+    )
+    assert parse_bounds("FOR VALUES FROM (MINVALUE) TO ('2024-05-01 00:00:00+00')") == (None, _month(2024, 5))
+    assert parse_bounds("DEFAULT") is None
+
+    now = datetime(2024, 5, 17, 12, tzinfo=UTC)
+    assert months_to_create([], now, 2) == [_month(2024, 5), _month(2024, 6), _month(2024, 7)]
+    # Legacy partition already covers May; only later months are created
+    legacy = Partition("copilot_metrics_legacy", None, _month(2024, 6))
+    june = Partition("copilot_metrics_p202406", _month(2024, 6), _month(2024, 7))
+    assert months_to_create([legacy, june], now, 2) == [_month(2024, 7)]
+
+    old = [Partition(f"p{m}", _month(2024, m), _month(2024, m + 1)) for m in (1, 2, 3, 4)]
+    assert expired(old, now, 0) == []
+    # Keep May plus the two months before it: January and February go
+    assert [p.name for p in expired([legacy, *old], now, 2)] == ["p1", "p2"]
+    assert [p.name for p in expired([Partition("legacy", None, _month(2024, 2)), *old], now, 2)] == ["legacy", "p1", "p2"]
+
+
+def test_maintainer_is_a_no_op_without_postgres():
+    maintainer = PartitionMaintainer(engine, retention_months=1)
+    if engine.dialect.name == "postgresql":
+        return
+    assert maintainer.maintain() == {"supported": False}
+    maintainer.start()
+    assert maintainer._thread is None
+
+
+def test_history_and_since_filter_on_fetched_at():
+    init_db({"copilot_metrics": METRICS_MIGRATIONS})
+    base = datetime(2024, 3, 10, tzinfo=UTC)
+    with SessionLocal() as db:
+        acc = metrics_crud.create_or_update_account(
+            db, login="history", github_user_id=424242, node_id=None, avatar_url=None,
+            token_ciphertext="c", token_nonce="n", token_salt="s",
+        )
+        rows = [CopilotMetrics(account_id=acc.id, fetched_at=base + timedelta(days=30 * i), payload=f'{{"n": {i}}}') for i in range(4)]
+        db.add_all(rows)
+        db.commit()
+        ids = [r.id for r in rows]
+        account_id = acc.id
+
+    app = FastAPI()
+    app.include_router(build_router(get_db), prefix="/p")
+    client = TestClient(app)
+
+    history = client.get(
+        f"/p/metrics/{account_id}/history",
+        params={"start": (base + timedelta(days=30)).isoformat(), "end": (base + timedelta(days=90)).isoformat()},
+    ).json()
+    assert [m["id"] for m in history] == [ids[2], ids[1]]
+    assert history[0]["payload"] == {"n": 2}
+    assert [m["id"] for m in client.get(f"/p/metrics/{account_id}/history", params={"limit": 1}).json()] == [ids[3]]
+    assert client.get(f"/p/metrics/{account_id}/history", params={"start": base.isoformat(), "end": base.isoformat()}).status_code == 422
+
+    # Newest snapshot is older than `since`: nothing counts as latest
+    late = (base + timedelta(days=365)).isoformat()
+    assert client.get(f"/p/metrics/{account_id}", params={"since": late}).status_code == 404
+    assert client.get(f"/p/metrics/{account_id}", params={"since": base.isoformat()}).json()["id"] == ids[3]
+    assert client.get("/p/metrics", params={"ids": str(account_id), "since": late}).json() == []
+    embedded = client.get("/p/accounts", params={"ids": str(account_id), "include": "latest_metrics", "since": late}).json()
+    assert embedded[0]["latest_metrics"] is None
+    assert client.get("/p/partitions").json() == {"enabled": False, "partitions": []}
+
+
+def test_latest_is_newest_fetched_at_on_every_path():
+    init_db({"copilot_metrics": METRICS_MIGRATIONS})
+    base = datetime(2024, 3, 10, tzinfo=UTC)
+    with SessionLocal() as db:
+        acc = metrics_crud.create_or_update_account(
+            db, login="backfilled", github_user_id=434343, node_id=None, avatar_url=None,
+            token_ciphertext="c", token_nonce="n", token_salt="s",
+        )
+        # A backfilled snapshot gets a higher id than the newer one
+        newer = CopilotMetrics(account_id=acc.id, fetched_at=base, payload='{"n": "newer"}')
+        db.add(newer)
+        db.commit()
+        older = CopilotMetrics(account_id=acc.id, fetched_at=base - timedelta(days=30), payload='{"n": "older"}')
+        db.add(older)
+        db.commit()
+        assert older.id > newer.id
+
+        assert metrics_crud.latest_metrics_for_account(db, acc.id).id == newer.id
+        assert [m.id for m in metrics_crud.latest_metrics_all(db, ids=[acc.id])] == [newer.id]
+        assert metrics_crud.list_accounts_with_latest(db, ids=[acc.id])[0][1].id == newer.id
+        # The feed's "previous" payload follows the same order
+        db.add(CopilotMetrics(account_id=acc.id, fetched_at=base + timedelta(days=1), payload='{"n": "next"}'))
+        db.commit()
+        rows, previous = metrics_crud.metrics_after(db, older.id, ids=[acc.id])
+        assert len(rows) == 1 and previous == {acc.id: {"n": "newer"}}
+
+
+@pytest.mark.skipif(engine.dialect.name != "postgresql", reason="partitioning needs Postgres")
+def test_conversion_reuses_the_prebuilt_key_and_keeps_rows():
+    # Own schema, so the shared copilot_metrics table is left plain
+    schema = "copilot_partition_test"
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+    scoped = create_engine(engine.url, connect_args={"options": f"-csearch_path={schema}"})
+    try:
+        with scoped.begin() as conn:
+            conn.execute(text("CREATE TABLE copilot_github_accounts (id serial PRIMARY KEY)"))
+            conn.execute(
+                text(
+                    f"CREATE TABLE {PARENT} (id serial PRIMARY KEY, "
+                    "account_id integer NOT NULL REFERENCES copilot_github_accounts(id) ON DELETE CASCADE, "
+                    "fetched_at timestamp with time zone NOT NULL DEFAULT now(), payload text NOT NULL)"
+                )
+            )
+            conn.execute(text(f"CREATE INDEX ix_{PARENT}_account_id ON {PARENT} (account_id)"))
+            conn.execute(text("INSERT INTO copilot_github_accounts DEFAULT VALUES"))
+            for month in (1, 2, 3):
+                conn.execute(
+                    text(f"INSERT INTO {PARENT} (account_id, fetched_at, payload) VALUES (1, :at, '{{}}')"),
+                    {"at": _month(2024, month)},
+                )
+
+        maintainer = PartitionMaintainer(scoped, months_ahead=1)
+        now = datetime(2024, 5, 17, 12, tzinfo=UTC)
+        result = maintainer.maintain(now)
+        assert result["converted"] and result["created"] == [f"{PARENT}_p202406"]
+        assert maintainer.maintain(now)["converted"] is False
+
+        with scoped.begin() as conn:
+            assert [(p.name, p.upper) for p in maintainer.partitions(conn)] == [
+                (LEGACY, _month(2024, 6)), (f"{PARENT}_p202406", _month(2024, 7)),
+            ]
+            # The concurrently built index is the legacy key, and the bound check stays validated
+            legacy_indexes = conn.execute(
+                text("SELECT indexname FROM pg_indexes WHERE tablename = :t AND schemaname = :s ORDER BY 1"),
+                {"t": LEGACY, "s": schema},
+            ).scalars().all()
+            assert legacy_indexes == [f"ix_{PARENT}_account_id_legacy", f"{LEGACY}_pkey"]
+            assert conn.execute(
+                text("SELECT convalidated FROM pg_constraint WHERE conname = :c"), {"c": f"{LEGACY}_bound"}
+            ).scalar() is True
+            new_id = conn.execute(
+                text(f"INSERT INTO {PARENT} (account_id, fetched_at, payload) VALUES (1, :at, '{{}}') RETURNING id"),
+                {"at": datetime(2024, 6, 2, tzinfo=UTC)},
+            ).scalar()
+            assert new_id == 4
+            assert conn.execute(text(f"SELECT count(*) FROM {PARENT}")).scalar() == 4
+    finally:
+        scoped.dispose()
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
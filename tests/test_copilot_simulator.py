@@ -0,0 +1,73 @@
+import json
+import os
+import time
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db import get_db, init_db
+from app.plugins.copilot_metrics.migrations import MIGRATIONS as METRICS_MIGRATIONS
+from app.plugins.copilot_metrics.routes import build_router
+from app.plugins.copilot_metrics.simulator import GitHubSimulator, _user_id
+
+
+def _get(sim, path, token="gho_test"):
+    with httpx.Client(transport=sim, base_url="https://api.github.com") as client:
+        return client.get(path, headers={"authorization": f"token {token}"} if token else {})
+
+
+def test_simulator_users_payload_size_and_auth():
+    sim = GitHubSimulator(payload_bytes=20_000)
+    first, again = _get(sim, "/user").json(), _get(sim, "/user").json()
+    assert first == again and first["login"] == f"sim-{first['id']}"
+    assert _get(sim, "/user", token="gho_other").json()["id"] != first["id"]
+    # Ids fit GithubAccount.github_user_id (int4) for any token
+    assert all(0 <= _user_id(f"gho_{i}") <= 2**31 - 1 for i in range(1000))
+
+    body = _get(sim, "/copilot_internal/user").content
+    assert 19_000 <= len(body) <= 20_500
+    assert json.loads(body)["login"] == first["login"]
+    assert _get(sim, "/user", token=None).status_code == 401
+    assert _get(sim, "/nope").status_code == 404
+
+
+def test_simulator_rate_limits_and_errors():
+    sim = GitHubSimulator(rate_limit=2, rate_limit_window=60)
+    statuses = [_get(sim, "/user") for _ in range(3)]
+    assert [r.status_code for r in statuses] == [200, 200, 403]
+    assert [r.headers["x-ratelimit-remaining"] for r in statuses] == ["1", "0", "0"]
+    assert int(statuses[0].headers["x-ratelimit-reset"]) > 0
+    # Limits are per token
+    assert _get(sim, "/user", token="gho_fresh").status_code == 200
+
+    failing = GitHubSimulator(error_rate=1.0, seed=1)
+    assert _get(failing, "/user").status_code in (500, 502, 503)
+    assert failing.stats()["errors"] == 1
+
+
+def test_ingestion_through_injected_transport(monkeypatch):
+    monkeypatch.setenv("COPILOT_METRICS__TOKEN_SECRET", os.urandom(32).hex())
+    init_db({"copilot_metrics": METRICS_MIGRATIONS})
+    sim = GitHubSimulator(payload_bytes=4096)
+    plugin_app = FastAPI()
+    plugin_app.include_router(build_router(get_db, transport=sim), prefix="/p")
+    client = TestClient(plugin_app)
+
+    account_id = client.post("/p/accounts/import", json={"token": "gho_sim_ingest"}).json()["account_id"]
+    assert client.post("/p/accounts/import", json={"token": "gho_sim_ingest"}).json()["account_id"] == account_id
+    assert client.post(f"/p/metrics/fetch/{account_id}").status_code == 200
+    metrics = client.get(f"/p/metrics/{account_id}").json()
+    assert metrics["payload"]["login"] == client.get(f"/p/accounts/{account_id}").json()["login"]
+    assert sim.stats()["requests"] == 3
+
+    failing = FastAPI()
+    failing.include_router(build_router(get_db, transport=GitHubSimulator(error_rate=1.0)), prefix="/p")
+    assert TestClient(failing).post("/p/accounts/import", json={"token": "gho_x"}).status_code == 400
+
+
+def test_simulated_latency():
+    sim = GitHubSimulator(latency_ms=30)
+    t0 = time.perf_counter()
+    _get(sim, "/user")
+    assert time.perf_counter() - t0 >= 0.03
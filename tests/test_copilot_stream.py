@@ -0,0 +1,121 @@
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db import SessionLocal, get_db, init_db
+from app.plugins.copilot_metrics import crud as metrics_crud
+from app.plugins.copilot_metrics.feed import METRICS_SAVED, MetricsFeed
+from app.plugins.copilot_metrics.migrations import MIGRATIONS as METRICS_MIGRATIONS
+from app.plugins.copilot_metrics.routes import build_router
+from app.plugins.copilot_metrics.services import CopilotMetricsService
+from app.plugins.copilot_metrics.simulator import GitHubSimulator
+
+QUOTA = '{"copilot_plan": "individual", "quota_snapshots": {"chat": {"entitlement": 300, "remaining": %d}}}'
+
+
+def _events(body):
+    out = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line and not line.startswith(":"))
+        if "event" in fields:
+            out.append(fields)
+    return out
+
+
+def _stream(client, feed, params=None, headers=None, publish=()):
+    """Open the stream in a thread, publish `publish` once subscribed, then end it."""
+    result = {}
+    before = feed.subscriber_count
+    thread = threading.Thread(
+        target=lambda: result.setdefault("r", client.get("/p/metrics/stream", params=params, headers=headers))
+    )
+    thread.start()
+    deadline = time.monotonic() + 5
+    while feed.subscriber_count == before and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.1)
+    for event in publish:
+        feed.on_saved(event)
+    feed.close()
+    thread.join(5)
+    return result["r"]
+
+
+def _seed(tag, remaining):
+    init_db({"copilot_metrics": METRICS_MIGRATIONS})
+    with SessionLocal() as db:
+        acc = metrics_crud.create_or_update_account(
+            db, login=tag, github_user_id=hash(tag) % 10**8, node_id=None, avatar_url=None,
+            token_ciphertext="c", token_nonce="n", token_salt="s",
+        )
+        account_id = acc.id
+        ids = [metrics_crud.save_metrics(db, account_id, QUOTA % r).id for r in remaining]
+    return account_id, ids
+
+
+def test_stream_filters_live_events_and_resumes_from_last_event_id():
+    account_id, ids = _seed("stream", [10, 10, 9])
+    feed = MetricsFeed(SessionLocal, heartbeat=60)
+    app = FastAPI()
+    app.include_router(build_router(get_db, feed=feed), prefix="/p")
+    live = [
+        {"id": ids[-1] + 100, "account_id": account_id, "quota_changed": True},
+        {"id": ids[-1] + 101, "account_id": account_id + 1, "quota_changed": True},
+        {"id": ids[-1] + 102, "account_id": account_id, "quota_changed": False},
+    ]
+    with TestClient(app) as client:
+        r = _stream(client, feed, params={"ids": str(account_id)}, publish=live)
+        assert r.headers["content-type"].startswith("text/event-stream")
+        assert r.text.startswith("retry: ")
+        assert [e["id"] for e in _events(r.text)] == [str(ids[-1] + 100), str(ids[-1] + 102)]
+
+        quota = _stream(client, feed, params={"ids": str(account_id), "quota_only": "true"}, publish=live)
+        assert [e["id"] for e in _events(quota.text)] == [str(ids[-1] + 100)]
+
+        # Missed snapshots come back from the database, flagged against the one before them
+        resumed = _stream(client, feed, params={"ids": str(account_id)}, headers={"Last-Event-ID": str(ids[0])})
+        events = _events(resumed.text)
+        assert [e["id"] for e in events] == [str(i) for i in ids[1:]]
+        assert ['"quota_changed":false' in e["data"] for e in events] == [True, False]
+        assert '"remaining":9' in events[-1]["data"]
+
+        feed.replay_limit = 1
+        reset = _stream(client, feed, params={"ids": str(account_id), "last_event_id": str(ids[0])})
+        assert [e["event"] for e in _events(reset.text)] == ["reset"]
+    assert feed.subscriber_count == 0
+
+    feed.max_subscribers = 0
+    with TestClient(app) as client:
+        assert client.get("/p/metrics/stream").status_code == 503
+
+
+def test_live_events_out_of_id_order_are_all_delivered():
+    account_id, ids = _seed("stream-order", [5, 4, 3])
+    feed = MetricsFeed(SessionLocal, heartbeat=60)
+    app = FastAPI()
+    app.include_router(build_router(get_db, feed=feed), prefix="/p")
+    # Snapshot ids commit out of order; only the replayed one is a duplicate
+    live = [
+        {"id": ids[-1], "account_id": account_id, "quota_changed": True},
+        {"id": ids[-1] + 11, "account_id": account_id, "quota_changed": True},
+        {"id": ids[-1] + 10, "account_id": account_id, "quota_changed": True},
+    ]
+    with TestClient(app) as client:
+        r = _stream(client, feed, params={"ids": str(account_id)}, headers={"Last-Event-ID": str(ids[0])}, publish=live)
+    assert [e["id"] for e in _events(r.text)] == [str(i) for i in (ids[1], ids[2], ids[-1] + 11, ids[-1] + 10)]
+
+
+def test_fetch_publishes_snapshot_summaries(monkeypatch):
+    monkeypatch.setenv("COPILOT_METRICS__TOKEN_SECRET", "ab" * 32)
+    init_db({"copilot_metrics": METRICS_MIGRATIONS})
+    published = []
+    svc = CopilotMetricsService(None, transport=GitHubSimulator(), publish=lambda topic, event: published.append((topic, event)))
+    account_id = svc.import_account("stream-publish-token")
+    first = svc.fetch_metrics(account_id)
+    second = svc.fetch_metrics(account_id)
+    assert [(topic, e["id"]) for topic, e in published] == [(METRICS_SAVED, first), (METRICS_SAVED, second)]
+    # Same fake user both times: the second snapshot has the same quotas
+    assert [e["quota_changed"] for _, e in published] == [True, False]
+    assert published[0][1]["account_id"] == account_id and "quotas" in published[0][1]
@@ -0,0 +1,86 @@
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+
+from app import schemas
+from app.db import SessionLocal, get_db, init_db
+from app.main import app
+from app.plugins.copilot_metrics import crud as metrics_crud
+from app.plugins.copilot_metrics.migrations import MIGRATIONS as METRICS_MIGRATIONS
+from app.plugins.copilot_metrics.routes import build_router as build_metrics_router
+from app.plugins.copilot_metrics.schemas import CopilotMetricsRead, GithubAccountRead
+from app.plugins.items.migrations import MIGRATIONS as ITEMS_MIGRATIONS
+from app.plugins.items.routes import build_router as build_items_router
+from app.plugins.items.schemas import PluginItemRead, PluginItemPage
+from app.responses import RowSerializer
+
+
+def _both(build, path, **params):
+    """GET `path` from a router built with and without the fast path."""
+    bodies = []
+    for fast in (False, True):
+        plugin_app = FastAPI()
+        plugin_app.include_router(build(fast), prefix="/p")
+        resp = TestClient(plugin_app).get(f"/p{path}", params=params)
+        assert resp.status_code == 200
+        bodies.append(resp.json())
+    return bodies
+
+
+def test_core_items_fast_path_matches_response_model(monkeypatch):
+    import app.main as main
+    from app.main import on_startup
+
+    on_startup()
+    client = TestClient(app)
+    for i in range(3):
+        client.post("/items", json={"name": f"fast-{i}", "description": None if i else "d"})
+    params = [{"limit": 50}, {"after": "", "limit": 2, "sort": "created_at"}]
+    slow = [client.get("/items", params=p).json() for p in params]
+    monkeypatch.setattr(main, "fast_json", True)
+    fast = [client.get("/items", params=p).json() for p in params]
+
+    assert fast == slow
+    TypeAdapter(List[schemas.ItemRead]).validate_python(fast[0])
+    schemas.ItemPage.model_validate(fast[1])
+
+
+def test_plugin_items_fast_path_matches_response_model():
+    init_db({"items": ITEMS_MIGRATIONS})
+    with SessionLocal() as db:
+        from app.plugins.items.crud import create_item
+        from app.plugins.items.schemas import PluginItemCreate
+
+        create_item(db, PluginItemCreate(name="fast", description="x"))
+    build = lambda fast: build_items_router(get_db, fast_json=fast)  # noqa: E731
+    slow, fast = _both(build, "/", limit=20)
+    assert fast == slow
+    TypeAdapter(List[PluginItemRead]).validate_python(fast)
+    slow, fast = _both(build, "/", after="", limit=1)
+    assert fast == slow
+    PluginItemPage.model_validate(fast)
+
+
+def test_copilot_metrics_fast_path_matches_response_model():
+    init_db({"copilot_metrics": METRICS_MIGRATIONS})
+    with SessionLocal() as db:
+        acc = metrics_crud.create_or_update_account(
+            db, login="octo", github_user_id=4242, node_id=None, avatar_url=None,
+            token_ciphertext="c", token_nonce="n", token_salt="s",
+        )
+        metrics_crud.save_metrics(db, acc.id, '{"seats": 3, "days": [{"day": "2024-01-01", "n": 1}]}')
+    build = lambda fast: build_metrics_router(get_db, fast_json=fast)  # noqa: E731
+    for path, schema in (("/accounts", GithubAccountRead), ("/metrics", CopilotMetricsRead)):
+        slow, fast = _both(build, path)
+        assert fast == slow
+        TypeAdapter(List[schema]).validate_python(fast)
+
+
+def test_row_serializer_accepts_plain_rows():
+    from collections import namedtuple
+
+    Row = namedtuple("Row", ["id", "account_id", "fetched_at", "payload"])
+    ser = RowSerializer(CopilotMetricsRead, json_fields=("payload",))
+    assert ser.row(Row(1, 2, None, '{"a": [1]}')) == {"id": 1, "account_id": 2, "fetched_at": None, "payload": {"a": [1]}}
@@ -0,0 +1,72 @@
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.interfaces import ReadinessCheck
+from app.core.manager import PluginManager
+from app.health import HealthProber
+from app.main import app
+
+from tests.test_plugins import DummyModule
+
+
+class SlowCheckModule(DummyModule):
+    name = "slow_check"
+
+    def readiness_checks(self):
+        return [
+            ReadinessCheck(name="fast", check=lambda: True, timeout=1.0),
+            ReadinessCheck(name="hung", check=lambda: time.sleep(0.5), timeout=0.05),
+        ]
+
+
+def test_livez_and_readyz():
+    from app.main import on_startup
+    on_startup()
+
+    client = TestClient(app)
+    assert client.get("/livez").json() == {"status": "ok"}
+    resp = client.get("/readyz")
+    assert resp.status_code == 200
+    assert resp.json()["checks"]["database"]["ok"] is True
+    assert client.get("/health").json()["database"] == "ok"
+
+
+def test_plugin_checks_have_own_timeout_and_cached_state():
+    pm = PluginManager(FastAPI())
+    module = SlowCheckModule()
+    pm.register_module(module)
+    prober = HealthProber(freshness=60.0)
+    prober.add_source(pm.readiness_checks)
+
+    # Checks of plugins that are not started are not collected
+    assert prober.readiness()["checks"] == {}
+
+    pm.start("slow_check")
+    state = prober.readiness()
+    assert state["status"] == "not_ready"
+    assert state["checks"]["plugin:slow_check:fast"]["ok"] is True
+    assert "timed out" in state["checks"]["plugin:slow_check:hung"]["error"]
+
+    # Served from cache inside the freshness window
+    checked_at = prober.result("plugin:slow_check:fast").checked_at
+    prober.readiness()
+    assert prober.result("plugin:slow_check:fast").checked_at == checked_at
+
+
+def test_stale_results_report_not_ready():
+    prober = HealthProber(interval=60.0, freshness=0.0)
+    prober.register(ReadinessCheck(name="db", check=lambda: True))
+    prober.start()
+    try:
+        deadline = time.time() + 5
+        while prober.result("db") is None and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.01)
+        # The background prober owns probing; stale results are reported, not refreshed inline
+        state = prober.readiness()
+        assert state["status"] == "not_ready"
+        assert state["checks"]["db"]["stale"] is True
+    finally:
+        prober.stop()
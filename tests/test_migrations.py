@@ -0,0 +1,158 @@
+import pytest
+from sqlalchemy import create_engine, event, inspect, text
+
+from app.db import engine as app_engine
+from app.migrations import Migration, MigrationError, add_column, index_migration, migrate, pending_migrations, run_sql
+from app.migrations.base import _partition_index_name, create_index
+from app.migrations.runner import reset_verified
+
+
+def _chain(calls):
+    def create(conn):
+        calls.append("create")
+        run_sql("CREATE TABLE widgets (id INTEGER PRIMARY KEY, owner INTEGER, created INTEGER)")(conn)
+
+    return [
+        Migration(version=1, description="widgets", upgrade=create),
+        index_migration(2, "ix_widgets_owner_created", "widgets", "owner, created DESC"),
+    ]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    reset_verified()
+    eng = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    yield eng
+    reset_verified()
+    eng.dispose()
+
+
+def test_chain_applies_once_and_records_version(engine):
+    calls = []
+    chain = _chain(calls)
+    assert set(pending_migrations(engine, {"widgets": chain})) == {"widgets"}
+
+    assert migrate(engine, {"widgets": chain}) == {"widgets": 2}
+    assert calls == ["create"]
+    assert "ix_widgets_owner_created" in {ix["name"] for ix in inspect(engine).get_indexes("widgets")}
+    assert pending_migrations(engine, {"widgets": chain}) == {}
+
+    # A new process: one version query, nothing applied
+    reset_verified()
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+    assert migrate(engine, {"widgets": chain}) == {}
+    assert len(statements) == 1 and "schema_migrations" in statements[0]
+
+    # Already verified in this process: no query at all
+    statements.clear()
+    migrate(engine, {"widgets": chain})
+    assert statements == []
+
+
+def test_new_steps_are_applied_incrementally(engine):
+    calls = []
+    chain = _chain(calls)
+    migrate(engine, {"widgets": chain[:1]})
+    assert migrate(engine, {"widgets": chain}) == {"widgets": 1}
+    assert calls == ["create"]
+
+
+def test_failed_step_is_not_recorded(engine):
+    def boom(conn):
+        raise RuntimeError("boom")
+
+    chain = [Migration(version=1, description="fails", upgrade=boom)]
+    with pytest.raises(MigrationError):
+        migrate(engine, {"broken": chain})
+    assert set(pending_migrations(engine, {"broken": chain})) == {"broken"}
+
+
+def test_versions_must_increase(engine):
+    noop = run_sql()
+    chain = [Migration(2, "b", noop), Migration(1, "a", noop)]
+    with pytest.raises(MigrationError):
+        migrate(engine, {"bad": chain})
+
+
+def test_add_column_backfills_and_skips_existing(engine):
+    def create(conn):
+        run_sql("CREATE TABLE widgets (id INTEGER PRIMARY KEY, owner INTEGER, created INTEGER)")(conn)
+        conn.exec_driver_sql("INSERT INTO widgets (owner, created) VALUES (1, 42)")
+
+    chain = [
+        Migration(version=1, description="widgets", upgrade=create),
+        Migration(
+            version=2,
+            description="widgets.updated",
+            upgrade=add_column("widgets", "updated", {"postgresql": "BIGINT", "*": "INTEGER"}, backfill="created"),
+        ),
+    ]
+    assert migrate(engine, {"widgets": chain}) == {"widgets": 2}
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT updated FROM widgets").scalar() == 42
+        # Tables created from current models already have the column: no-op
+        add_column("widgets", "updated", "INTEGER")(conn)
+
+
+def test_add_column_sets_the_default_only_after_the_backfill(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cur, stmt, *a: statements.append(stmt))
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE widgets (id INTEGER PRIMARY KEY, created INTEGER)")
+        conn.exec_driver_sql("INSERT INTO widgets (created) VALUES (7)")
+        add_column("widgets", "updated", "INTEGER", backfill="created", default={"postgresql": "now()"})(conn)
+        assert conn.exec_driver_sql("SELECT updated FROM widgets").scalar() == 7
+    ddl = [s for s in statements if s.startswith(("ALTER", "UPDATE"))]
+    # SQLite cannot alter a default, so only the add and the backfill run there
+    assert ddl == [
+        'ALTER TABLE "widgets" ADD COLUMN "updated" INTEGER',
+        'UPDATE "widgets" SET "updated" = created WHERE "updated" IS NULL',
+    ]
+
+
+def test_partition_index_names():
+    assert _partition_index_name("ix_events_at", "events", "events_p202406") == "ix_events_p202406_at"
+    assert _partition_index_name("by_owner", "events", "events_p202406") == "by_owner_events_p202406"
+    assert len(_partition_index_name("ix_" + "x" * 60, "events", "events_p202406")) == 63
+
+
+@pytest.mark.skipif(app_engine.dialect.name != "postgresql", reason="partitioned tables need Postgres")
+def test_index_on_a_partitioned_table_is_built_per_partition():
+    schema = "migrations_partition_test"
+    with app_engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+    scoped = create_engine(app_engine.url, connect_args={"options": f"-csearch_path={schema}"})
+    try:
+        with scoped.begin() as conn:
+            conn.execute(text("CREATE TABLE events (id int, at timestamptz NOT NULL) PARTITION BY RANGE (at)"))
+            for month in (5, 6):
+                conn.execute(
+                    text(
+                        f"CREATE TABLE events_p20240{month} PARTITION OF events "
+                        f"FOR VALUES FROM ('2024-0{month}-01') TO ('2024-0{month + 1}-01')"
+                    )
+                )
+        upgrade = create_index("ix_events_at", "events", "at DESC")
+        with scoped.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            upgrade(conn)
+            # Idempotent, like every non-transactional migration step
+            upgrade(conn)
+            conn.execute(
+                text("CREATE TABLE events_p202407 PARTITION OF events FOR VALUES FROM ('2024-07-01') TO ('2024-08-01')")
+            )
+            rows = conn.execute(
+                text(
+                    "SELECT c.relname, i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                    "JOIN pg_namespace n ON n.oid = c.relnamespace WHERE n.nspname = :s ORDER BY 1"
+                ),
+                {"s": schema},
+            ).all()
+        names = {name for name, _ in rows}
+        assert {"ix_events_at", "ix_events_p202405_at", "ix_events_p202406_at"} <= names and len(names) == 4
+        assert all(valid for _, valid in rows)
+    finally:
+        scoped.dispose()
+        with app_engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
@@ -0,0 +1,42 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.main import app
+from app.pool_metrics import InstrumentedQueuePool, PoolMetrics
+
+
+def test_pool_events_and_wait_histogram(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0
+    )
+    metrics = PoolMetrics("test")
+    metrics.attach(engine)
+    for _ in range(3):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    snap = metrics.snapshot()
+    assert snap["counters"]["connects"] == 1
+    assert snap["counters"]["checkouts"] == 3
+    assert snap["counters"]["checkins"] == 3
+    assert snap["wait_ms"]["count"] == 3
+    assert sum(snap["wait_ms"]["histogram"].values()) == 3
+    assert snap["pool"]["size"] == 1 and snap["pool"]["checked_out"] == 0
+
+    # Survives engine.dispose(), which recreates the pool
+    engine.dispose()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert metrics.snapshot()["wait_ms"]["count"] == 4
+    engine.dispose()
+
+
+def test_admin_pool_endpoint_and_health():
+    client = TestClient(app)
+    resp = client.get("/admin/pool")
+    assert resp.status_code == 200
+    assert "checkouts" in resp.json()["primary"]["counters"]
+
+    health = client.get("/health")
+    assert health.status_code == 200
+    assert "checkouts" in health.json()["pool"]
@@ -0,0 +1,61 @@
+import time
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app import db as db_module
+from app.replicas import ReadConsistencyMiddleware, ReplicaRouter
+
+
+def _engines(tmp_path, n):
+    return [create_engine(f"sqlite:///{tmp_path / f'replica{i}.db'}") for i in range(n)]
+
+
+def test_round_robin_and_lag_ejection(tmp_path):
+    engines = _engines(tmp_path, 2)
+    router = ReplicaRouter(engines, max_lag=1.0)
+    assert [router.pick() for _ in range(4)] == [engines[0], engines[1], engines[0], engines[1]]
+
+    lags = {"replica0": 0.1, "replica1": 30.0}
+    router.measure_lag = lambda replica: lags[replica.name]
+    router.check()
+    assert {r["name"]: r["healthy"] for r in router.status()} == {"replica0": True, "replica1": False}
+    assert {router.pick() for _ in range(4)} == {engines[0]}
+
+    lags["replica0"] = 30.0
+    router.check()
+    assert router.pick() is None
+
+    lags["replica1"] = 0.0
+    router.check()
+    assert router.pick() is engines[1]
+
+
+def test_read_dependency_honors_read_your_writes(tmp_path, monkeypatch):
+    replica = _engines(tmp_path, 1)[0]
+    monkeypatch.setattr(db_module, "replica_router", ReplicaRouter([replica]))
+
+    app = FastAPI()
+    app.add_middleware(ReadConsistencyMiddleware, window=5.0)
+
+    @app.get("/bind")
+    def bind(db: Session = Depends(db_module.get_read_db)):
+        return {"replica": db.get_bind() is replica}
+
+    @app.post("/write")
+    def write():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.get("/bind").json() == {"replica": True}
+    assert client.get("/bind", headers={"X-Read-Consistency": "primary"}).json() == {"replica": False}
+
+    resp = client.post("/write")
+    assert "db_primary_until" in resp.headers["set-cookie"]
+    # The cookie now pins this client to the primary
+    assert client.get("/bind").json() == {"replica": False}
+
+    client.cookies.set("db_primary_until", str(int(time.time()) - 1))
+    assert client.get("/bind").json() == {"replica": True}
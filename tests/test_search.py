@@ -0,0 +1,56 @@
+import uuid
+
+
+def _seed(client):
+    tag = uuid.uuid4().hex[:8]
+    rows = [
+        {"name": f"{tag}alpha", "description": "red widget"},
+        {"name": f"{tag}alphabet soup", "description": "blue"},
+        {"name": f"other {tag}", "description": f"mentions {tag}alpha in passing"},
+        {"name": "unrelated", "description": f"nothing 100%_{tag}"},
+    ]
+    ids = [client.post("/items", json=row).json()["id"] for row in rows]
+    return tag, ids
+
+
+def _search(client, **params):
+    resp = client.get("/items/search", params=params)
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def test_prefix_ranks_closest_name_first(client):
+    tag, ids = _seed(client)
+    body = _search(client, q=f"{tag}ALPHA", mode="prefix")
+    assert [item["id"] for item in body["items"]] == [ids[0], ids[1]]
+    assert body["items"][0]["rank"] > body["items"][1]["rank"]
+
+
+def test_substring_matches_name_or_description_and_escapes_wildcards(client):
+    tag, ids = _seed(client)
+    hits = [item["id"] for item in _search(client, q=f"{tag}alpha", mode="substring")["items"]]
+    assert set(hits) == {ids[0], ids[1], ids[2]}
+    # Name matches outrank description-only matches
+    assert hits[-1] == ids[2]
+    assert [i["id"] for i in _search(client, q=f"0%_{tag}", mode="substring")["items"]] == [ids[3]]
+    literal_percent = [i["id"] for i in _search(client, q="%", mode="substring", limit=100)["items"]]
+    assert ids[3] in literal_percent and ids[0] not in literal_percent
+
+
+def test_fulltext_requires_every_term(client):
+    tag, ids = _seed(client)
+    assert [i["id"] for i in _search(client, q=f"{tag}alpha widget")["items"]] == [ids[0]]
+
+
+def test_search_pages_with_cursor(client):
+    tag, ids = _seed(client)
+    seen, cursor = [], ""
+    while cursor is not None:
+        body = _search(client, q=f"{tag}alpha", mode="substring", limit=1, after=cursor)
+        seen.extend(item["id"] for item in body["items"])
+        cursor = body["next_cursor"]
+    assert sorted(seen) == sorted([ids[0], ids[1], ids[2]])
+    assert len(seen) == 3
+
+    assert client.get("/items/search", params={"q": "x", "after": "bogus"}).status_code == 400
+    assert client.get("/items/search", params={"q": ""}).status_code == 422
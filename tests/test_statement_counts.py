@@ -0,0 +1,95 @@
+"""Round-trip budgets for the item write paths.
+
+Every SQL statement sent through the app engine during a request is counted
+with a `before_cursor_execute` listener; a change that adds a SELECT before
+a write (or a refresh after it) fails here.
+"""
+from contextlib import contextmanager
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.db import engine, get_db, init_db
+from app.plugins.items.migrations import MIGRATIONS as ITEMS_MIGRATIONS
+from app.plugins.items.routes import build_router
+
+
+@contextmanager
+def count_statements(table):
+    # Background probes (health, replicas, cluster) share the engine, so only
+    # statements touching `table` are counted
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if f"{table} " in statement or f'"{table}"' in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+
+def _assert_write_budget(client, path, table):
+    item_id = client.post(path, json={"name": "rt"}).json()["id"]
+
+    with count_statements(table) as stmts:
+        resp = client.put(f"{path}/{item_id}", json={"description": "changed"})
+    assert resp.status_code == 200
+    assert resp.json()["description"] == "changed" and resp.json()["name"] == "rt"
+    assert len(stmts) == 1 and stmts[0].lstrip().upper().startswith("UPDATE"), stmts
+
+    with count_statements(table) as stmts:
+        assert client.put(f"{path}/{10**9}", json={"name": "x"}).status_code == 404
+    assert len(stmts) == 1, stmts
+
+    with count_statements(table) as stmts:
+        assert client.delete(f"{path}/{item_id}").status_code == 200
+    assert len(stmts) == 1 and stmts[0].lstrip().upper().startswith("DELETE"), stmts
+
+    with count_statements(table) as stmts:
+        assert client.delete(f"{path}/{item_id}").status_code == 404
+    assert len(stmts) == 1, stmts
+
+
+def test_core_item_writes_are_single_statement(client):
+    _assert_write_budget(client, "/items", "items")
+
+
+def test_plugin_item_writes_are_single_statement():
+    # The items plugin is not enabled by default; mount its router directly
+    init_db({"items": ITEMS_MIGRATIONS})
+    plugin_app = FastAPI()
+    plugin_app.include_router(build_router(get_db), prefix="/plugins/items")
+    _assert_write_budget(TestClient(plugin_app), "/plugins/items", "plugin_items")
+
+
+def test_accounts_with_latest_metrics_is_one_query():
+    from app.db import SessionLocal
+    from app.plugins.copilot_metrics import crud as metrics_crud
+    from app.plugins.copilot_metrics.migrations import MIGRATIONS as METRICS_MIGRATIONS
+    from app.plugins.copilot_metrics.routes import build_router as build_metrics_router
+
+    init_db({"copilot_metrics": METRICS_MIGRATIONS})
+    with SessionLocal() as db:
+        for n in range(5):
+            acc = metrics_crud.create_or_update_account(
+                db, login=f"n1-{n}", github_user_id=900_000 + n, node_id=None, avatar_url=None,
+                token_ciphertext="c", token_nonce="n", token_salt="s",
+            )
+            for _ in range(n):
+                metrics_crud.save_metrics(db, acc.id, "{}")
+    plugin_app = FastAPI()
+    plugin_app.include_router(build_metrics_router(get_db), prefix="/p")
+    client = TestClient(plugin_app)
+
+    for params in ({"include": "latest_metrics"}, {"include": "latest_metrics_summary"}, {}):
+        with count_statements("copilot_github_accounts") as accounts, count_statements("copilot_metrics") as metrics:
+            assert client.get("/p/accounts", params=params).status_code == 200
+        # The snapshot join is part of the accounts statement, not a query per account
+        assert len(accounts) == 1 and len(metrics) == (1 if params else 0), (accounts, metrics)
+    with count_statements("copilot_metrics") as stmts:
+        assert client.get("/p/metrics").status_code == 200
+    assert len(stmts) == 1, stmts
@@ -0,0 +1,96 @@
+import json
+import logging
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db import get_db
+from app.plugins.items.middleware import ItemsMiddleware
+from app.tracing import (
+    OTLPExporter,
+    Tracer,
+    TracingMiddleware,
+    instrument_middleware,
+    instrument_routes,
+    redact_parameters,
+    redact_statement,
+    span,
+)
+
+
+def test_redaction():
+    statement = "SELECT *  FROM items\n WHERE name = 'bob''s' AND id > 42 AND x = :x AND y = $1 AND t1.c = %(c)s"
+    assert redact_statement(statement) == (
+        "SELECT * FROM items WHERE name = ? AND id > ? AND x = :x AND y = $1 AND t1.c = %(c)s"
+    )
+    assert redact_parameters({"name": "secret", "id": 1}) == {"name": "str", "id": "int"}
+    assert redact_parameters(("secret", 1.5)) == ["str", "float"]
+    assert redact_parameters([{"a": 1}, {"a": 2}], executemany=True) == "<2 rows>"
+
+
+def test_span_is_a_noop_outside_a_request():
+    with span("orphan") as s:
+        assert s is None
+
+
+def test_request_span_tree_slow_logs_and_otlp_file(tmp_path, caplog):
+    out = tmp_path / "traces.jsonl"
+    tracer = Tracer(
+        enabled=True, slow_request_ms=0.001, slow_query_ms=0.001, exporter=OTLPExporter(file_path=str(out))
+    )
+    app = FastAPI()
+
+    @app.get("/traced/{x}")
+    def traced(x: int, db: Session = Depends(get_db)):
+        with span("work", kind="internal", x=x):
+            db.execute(text("SELECT 'secret-literal' AS v WHERE 1 = :p"), {"p": 1}).all()
+        return {"x": x}
+
+    app.add_middleware(ItemsMiddleware)
+    instrument_middleware(app)
+    app.add_middleware(TracingMiddleware, tracer=tracer)
+    instrument_routes(app)
+    instrument_routes(app)  # idempotent
+    tracer.instrument_engines()
+    try:
+        with caplog.at_level(logging.WARNING, logger="app.tracing"):
+            resp = TestClient(app).get(
+                "/traced/7", headers={"traceparent": "00-" + "ab" * 16 + "-" + "cd" * 8 + "-01"}
+            )
+    finally:
+        tracer.uninstrument_engines()
+    assert resp.status_code == 200 and resp.headers["x-trace-id"] == "ab" * 16
+    tracer.exporter.flush()
+
+    spans = json.loads(out.read_text().splitlines()[-1])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    by_name = {s["name"]: s for s in spans}
+    root = by_name["GET /traced/{x}"]
+    assert root["traceId"] == "ab" * 16 and root["parentSpanId"] == "cd" * 8 and root["kind"] == 2
+    attrs = {a["key"]: a["value"] for a in root["attributes"]}
+    assert attrs["http.status_code"] == {"intValue": "200"} and attrs["http.route"] == {"stringValue": "/traced/{x}"}
+    # server -> middleware -> route -> work -> db, across the threadpool hop
+    chain = ["GET /traced/{x}", "middleware ItemsMiddleware", "route /traced/{x}", "work", "db SELECT"]
+    for parent, child in zip(chain, chain[1:]):
+        assert by_name[child]["parentSpanId"] == by_name[parent]["spanId"]
+    db_attrs = {a["key"]: a["value"]["stringValue"] for a in by_name["db SELECT"]["attributes"] if "stringValue" in a["value"]}
+    assert "secret-literal" not in db_attrs["db.statement"] and "?" in db_attrs["db.statement"]
+    assert all(int(s["endTimeUnixNano"]) >= int(s["startTimeUnixNano"]) for s in spans)
+
+    logs = "\n".join(r.getMessage() for r in caplog.records)
+    assert "Slow query" in logs and "Slow request GET /traced/{x}" in logs
+    assert "secret-literal" not in logs and "'int'" in logs
+
+
+def test_plugins_loaded_at_runtime_get_route_spans():
+    from app.core.manager import PluginManager
+    from app.tracing import _TracedASGI
+
+    app = FastAPI()
+    manager = PluginManager(app)
+    manager.register_core_services()
+    manager.on_load(lambda name: instrument_routes(app))
+    assert manager.load("hello").status == "loaded"
+    hello = [r for r in app.router.routes if getattr(r, "path", "").startswith("/plugins/hello")]
+    assert hello and all(isinstance(r.app, _TracedASGI) for r in hello)
@@ -0,0 +1,83 @@
+import csv
+import io
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db import get_db, init_db
+from app.main import app
+from app.plugins.items.migrations import MIGRATIONS as ITEMS_MIGRATIONS
+from app.plugins.items.routes import build_router
+
+
+def _events(resp):
+    assert resp.status_code == 200
+    return [json.loads(line) for line in resp.text.splitlines()]
+
+
+def test_export_streams_every_row_as_ndjson_and_csv():
+    from app.main import on_startup
+
+    on_startup()
+    client = TestClient(app)
+    created = [client.post("/items", json={"name": f"export-{i}", "description": "a,b\nc"}).json() for i in range(3)]
+    ids = {item["id"] for item in created}
+
+    resp = client.get("/items/export")
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["id"] for r in rows] == sorted(r["id"] for r in rows)
+    exported = [r for r in rows if r["id"] in ids]
+    assert exported == [client.get(f"/items/{i['id']}").json() for i in created]
+
+    resp = client.get("/items/export", params={"format": "csv"})
+    assert resp.headers["content-type"].startswith("text/csv")
+    reader = list(csv.DictReader(io.StringIO(resp.text)))
+    assert reader and set(reader[0]) == set(rows[0])
+    assert [r["description"] for r in reader if int(r["id"]) in ids] == ["a,b\nc"] * 3
+
+
+def test_import_reports_progress_and_invalid_lines(monkeypatch):
+    import app.main as main
+    from app.main import on_startup
+
+    on_startup()
+    monkeypatch.setattr(main, "TRANSFER_BATCH_SIZE", 2)
+    client = TestClient(app)
+    body = "\n".join(
+        [
+            json.dumps({"name": "imported-1"}),
+            "{not json",
+            json.dumps({"name": "imported-2", "description": "x"}),
+            json.dumps({"description": "no name"}),
+            json.dumps({"name": "imported-3"}),
+        ]
+    )
+    events = _events(client.post("/items/import", content=body.encode()))
+    assert [e["event"] for e in events] == ["progress", "progress", "done"]
+    done = events[-1]
+    assert (done["rows"], done["inserted"], done["failed"], done["batches"]) == (5, 3, 2, 2)
+    assert [e["line"] for e in done["errors"]] == [2, 4]
+
+    names = {i["name"] for i in client.get("/items", params={"limit": 500}).json()}
+    assert {"imported-1", "imported-2", "imported-3"} <= names
+
+
+def test_csv_import_handles_quoted_newlines_and_roundtrips_export():
+    init_db({"items": ITEMS_MIGRATIONS})
+    plugin_app = FastAPI()
+    plugin_app.include_router(build_router(get_db), prefix="/p")
+    client = TestClient(plugin_app)
+
+    upload = 'name,description\n"multi","line one\nline two"\n,missing name\n"unterminated,"oops\n'
+    done = _events(client.post("/p/import", params={"format": "csv"}, content=upload.encode()))[-1]
+    assert (done["inserted"], done["failed"]) == (1, 2)
+    assert [e["line"] for e in done["errors"]] == [4, 5]
+
+    exported = client.get("/p/export", params={"format": "csv"}).text
+    assert "line one\nline two" in next(r for r in csv.DictReader(io.StringIO(exported)) if r["name"] == "multi")["description"]
+    # An export is a valid import (extra columns such as id are ignored)
+    before = len(list(csv.DictReader(io.StringIO(exported))))
+    done = _events(client.post("/p/import", params={"format": "csv"}, content=exported.encode()))[-1]
+    assert (done["inserted"], done["failed"]) == (before, 0)